@@ -0,0 +1,264 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import warm_start
+from market_cache import cache
+from snapshots import PROFILES, load_snapshot, snapshot_path
+from trading_calendar import korea
+
+# --- 조회용 JSON API ---
+# 추천 스냅샷, 지수, 거래량 순위, 미국 시세를 HTTP/JSON 으로 내줍니다.
+# 대시보드, 봇, 스크립트가 Streamlit 화면을 열어 스크립트 전체를 다시 실행하지 않고 폴링할 수 있습니다.
+# 원격 조회(pykrx/yfinance)는 하지 않습니다. 스냅샷은 디스크 파일에서, 시세는 공유 캐시(market_cache)에 이미 있는 값에서 가져옵니다.
+# 앱 안에서 돌면(start_api, MAGIC_API_PORT 를 지정했을 때만) 그 프로세스의 캐시를 읽습니다.
+# 따로 돌면 warm_start 가 앱별로 저장한 예열 파일을 모두 합쳐 읽으므로 저장 주기(MAGIC_WARM_INTERVAL)만큼 늦을 수 있습니다.
+# 응답 본문과 ETag 는 원본(캐시 version / 파일 수정 시각)이 바뀔 때만 다시 만듭니다.
+# If-None-Match 가 맞으면 본문 없이 304 로 답하므로 폴링이 많아도 비용이 거의 없습니다.
+#
+#   python api_server.py                  # 따로 실행 (예열 파일 기준, 기본 127.0.0.1:8600)
+#   MAGIC_API_PORT=8600 streamlit run app.py   # 앱 프로세스 안에서 같이 띄움 (캐시 기준)
+#   python api_server.py --port 8700
+#   curl -i localhost:8600/picks/KOSPI
+#
+#   GET /picks               스냅샷 목록 (이름, 기준 거래일, 계산 시각, 종목 수)
+#   GET /picks/<이름>         추천 스냅샷 (KOSPI, KOSDAQ, KOSPI-new, KOSDAQ-new, US)
+#   GET /indices             KOSPI/KOSDAQ 지수 + 캐시에 있는 미국 지수(^...)
+#   GET /volume/<시장>        거래량 TOP (KOSPI, KOSDAQ)
+#   GET /quotes              캐시에 있는 미국 시세
+#   GET /health              요청 수, 캐시 통계
+
+API_HOST = os.environ.get("MAGIC_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("MAGIC_API_PORT", "0") or 0)   # 0(기본)이면 앱 안에서 띄우지 않음
+
+
+def _iso(ts):
+    return datetime.datetime.fromtimestamp(ts, korea).isoformat(timespec="seconds")
+
+
+def _plain(o):
+    """json 이 모르는 numpy 스칼라/날짜 값."""
+    return o.item() if hasattr(o, "item") else str(o)
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=_plain).encode("utf-8")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _quote(value):
+    curr, change, rate = value
+    return {"value": curr, "change": change, "rate": rate}
+
+
+def market_view(entries):
+    """캐시 항목 [(키, 만료, 값, 받아 온 시각)] -> {"indices", "volume", "quotes"}. 같은 대상은 최근 값만."""
+    view = {"indices": {}, "volume": {}, "quotes": {}}
+
+    def put(section, name, item, fetched_at, expires):
+        old = view[section].get(name)
+        if old is None or old["_fetched"] < fetched_at:
+            view[section][name] = {**item, "fetched_at": _iso(fetched_at), "expires_at": _iso(expires),
+                                   "_fetched": fetched_at}
+
+    for (name, args, _kwargs), expires, value, fetched_at in entries:
+        fn = name.rsplit(".", 1)[-1]   # 앱마다 모듈 이름이 다름 (app.get_market_data, app_us.get_market_data)
+        if fn == "get_market_data":
+            put("indices", args[0], _quote(value), fetched_at, expires)
+        elif fn == "get_volume_rank":
+            rows = value.reset_index().to_dict("records")
+            put("volume", args[0], {"rows": rows}, fetched_at, expires)
+        elif fn == "get_us_quotes":
+            for symbol, quote in value.items():
+                put("indices" if symbol.startswith("^") else "quotes", symbol, _quote(quote), fetched_at, expires)
+    for section in view.values():
+        for item in section.values():
+            del item["_fetched"]
+    return view
+
+
+class CacheSource:
+    """같은 프로세스의 공유 캐시 (앱 안에서 띄울 때)."""
+    name = "cache"
+
+    def token(self):
+        return cache.version
+
+    def entries(self):
+        return cache.dump()
+
+
+class WarmFileSource:
+    """warm_start 가 앱별로 저장한 예열 파일 전체 (따로 띄울 때). 파일이 생기거나 바뀔 때만 다시 읽습니다.
+    같은 대상을 여러 앱이 받아 두었으면 market_view 가 가장 최근 값을 고릅니다."""
+    name = "warm files"
+
+    def __init__(self, paths=None):
+        self.paths = paths   # None 이면 요청마다 data/warm/*.bin 을 다시 찾음 (나중에 뜬 앱 포함)
+
+    def _paths(self):
+        return self.paths if self.paths is not None else warm_start.paths()
+
+    def token(self):
+        return tuple((path, _mtime(path)) for path in self._paths())
+
+    def entries(self):
+        entries = []
+        for path in self._paths():
+            saved = warm_start.read(path)
+            if saved:
+                entries.extend(saved["entries"])
+        return entries
+
+
+class Api:
+    """경로 -> (상태, 본문, ETag). 본문은 원본 토큰이 같으면 다시 만들지 않습니다."""
+
+    def __init__(self, source):
+        self.source = source
+        self.requests = 0
+        self.not_modified = 0
+        self._bodies = {}     # 경로 -> (토큰, 본문, ETag)
+        self._market = None   # (토큰, market_view)
+        self._lock = threading.Lock()
+
+    def _market_view(self):
+        token = self.source.token()
+        with self._lock:
+            market = self._market
+        if market is None or market[0] != token:
+            market = (token, market_view(self.source.entries()))   # 잠금 밖에서 (느린 요청이 다른 경로를 막지 않게)
+            with self._lock:
+                self._market = market
+        return market
+
+    def _snapshot(self, name):
+        path = snapshot_path(name)
+
+        def build():
+            with open(path, "rb") as f:
+                return f.read()   # 저장된 JSON 그대로
+        return _mtime(path), build
+
+    def _picks_index(self):
+        def build():
+            listing = []
+            for name in PROFILES:
+                snap = load_snapshot(name)
+                listing.append({"name": name, "session": snap and snap["session"],
+                                "computed_at": snap and snap["computed_at"],
+                                "picks": len(snap["picks"]) if snap else 0})
+            return _dumps(listing)
+        return tuple(_mtime(snapshot_path(name)) for name in PROFILES), build
+
+    def _resolve(self, path):
+        """경로 -> (토큰, 본문 만드는 함수). 없는 경로/값이면 (None, 오류 메시지)."""
+        parts = [p for p in path.split("/") if p]
+        if parts == ["picks"]:
+            return self._picks_index()
+        if len(parts) == 2 and parts[0] == "picks":
+            if parts[1] not in PROFILES:
+                return None, f"알 수 없는 스냅샷: {parts[1]}"
+            token, build = self._snapshot(parts[1])
+            return (token, build) if token else (None, f"아직 계산된 스냅샷이 없습니다: {parts[1]}")
+        if parts in (["indices"], ["quotes"]):
+            token, view = self._market_view()
+            return (token, parts[0]), lambda: _dumps(view[parts[0]])
+        if len(parts) == 2 and parts[0] == "volume":
+            token, view = self._market_view()
+            if parts[1] not in view["volume"]:
+                return None, f"캐시에 거래량 순위가 없습니다: {parts[1]}"
+            return (token, parts[1]), lambda: _dumps(view["volume"][parts[1]])
+        return None, f"없는 경로: {path}"
+
+    def respond(self, path, if_none_match=None):
+        # 잠금은 카운터와 본문 캐시만. 파일 읽기/JSON 만들기는 잠금 밖에서 하므로
+        # 같은 본문을 두 요청이 동시에 만들 수는 있지만 결과가 같아 나중 것이 덮어써도 됩니다.
+        with self._lock:
+            self.requests += 1
+            counts = {"requests": self.requests, "not_modified": self.not_modified}
+        if path.rstrip("/") == "/health":
+            return 200, _dumps({"source": self.source.name, **counts, "cache": cache.stats()}), None
+        token, build = self._resolve(path)
+        if token is None:
+            return 404, _dumps({"error": build}), None
+        with self._lock:
+            cached = self._bodies.get(path)
+        if cached is None or cached[0] != token:
+            body = build()
+            cached = (token, body, '"%s"' % hashlib.sha1(body).hexdigest()[:16])
+            with self._lock:
+                self._bodies[path] = cached
+        _, body, etag = cached
+        if if_none_match and (if_none_match.strip() == "*" or
+                              etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))):
+            with self._lock:
+                self.not_modified += 1
+            return 304, b"", etag
+        return 200, body, etag
+
+
+def make_server(api, host=API_HOST, port=API_PORT):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body, etag = api.respond(urlsplit(self.path).path, self.headers.get("If-None-Match"))
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")   # 매번 ETag 로 확인 (바뀌지 않았으면 304)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if status != 304:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass   # 폴링 요청마다 로그를 남기지 않음 (/health 의 요청 수 참고)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_api(host=API_HOST, port=API_PORT):
+    """Streamlit 프로세스 안에서 API 서버를 한 번만 띄웁니다 (이 프로세스의 캐시를 그대로 내줌).
+    MAGIC_API_PORT 를 지정했을 때만 띄웁니다. 포트가 0(기본)이거나 이미 쓰이고 있으면(다른 앱 프로세스가 띄움) 띄우지 않고 None."""
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = make_server(Api(CacheSource()), host, port)
+            except OSError:
+                return None
+            threading.Thread(target=_server.serve_forever, name="api-server", daemon=True).start()
+    return _server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="추천종목/시세 JSON API (예열 파일 기준)")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT or 8600, help="기본 MAGIC_API_PORT, 없으면 8600")
+    args = parser.parse_args()
+    server = make_server(Api(WarmFileSource()), args.host, args.port)
+    print(f"http://{args.host}:{server.server_port}  (/picks /indices /volume/<시장> /quotes /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
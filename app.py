@@ -1,13 +1,20 @@
 import pytz
 korea = pytz.timezone("Asia/Seoul")
 import streamlit as st
-from pykrx import stock
-import pandas as pd
 import datetime
-import numpy as np
-from ta.momentum import RSIIndicator
-from ta.trend import SMAIndicator
-from ta.volatility import BollingerBands
+from name_index import krx_name
+from fetch_scheduler import call
+from market_cache import market_cached
+from trading_calendar import KRX
+from snapshots import compute_snapshot, latest_picks
+from precompute import start_background
+from warm_start import start_warm
+from api_server import start_api
+from page_loader import load_page
+from pick_history import render_history
+from live_board import draw_rows, live_toggle, rows_box, run_live
+from profiling import render_panel, timed
+from render import index_card_html, render_picks, stale_note, top_nav_html, volume_rank_rows
 
 # --- 1. 페이지 설정 ---
 st.set_page_config(page_title="MAGIC STOCK", layout="wide", initial_sidebar_state="collapsed")
@@ -96,51 +103,40 @@ st.markdown("""
 
 # --- 3. 데이터 로직 (기존 로직 유지) ---
 
+start_background(["KOSPI", "KOSDAQ"])  # 장 마감 후 이 앱의 추천종목 사전 계산 (프로세스당 1개)
+
+@timed("app.get_market_data")
+@market_cached("KRX", open_ttl=30)  # 장중 30초, 장 마감 후 다음 개장까지
 def get_market_data(market_name):
+    from pykrx import stock  # pykrx(+matplotlib) 는 1초 넘게 걸려 처음 조회할 때 불러옴
     ticker = "1001" if market_name == "KOSPI" else "2001"
-    end = datetime.datetime.now().strftime("%Y%m%d")
-    start = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime("%Y%m%d")
-    try:
-        df = stock.get_index_ohlcv_by_date(start, end, ticker)
-        curr = df['종가'].iloc[-1]
-        prev = df['종가'].iloc[-2]
-        change = curr - prev
-        rate = (change / prev) * 100
-        return curr, change, rate
-    except:
-        return 0, 0, 0
-
-def analyze_stock(ticker, today):
-    try:
-        start = (datetime.datetime.strptime(today, "%Y%m%d") - datetime.timedelta(days=60)).strftime("%Y%m%d")
-        df = stock.get_market_ohlcv_by_date(start, today, ticker)
-        if len(df) < 30: return 0
-        indicator_bb = BollingerBands(close=df["종가"], window=20, window_dev=2)
-        df['bb_low'] = indicator_bb.bollinger_lband()
-        curr_close, curr_low, prev_low = df['종가'].iloc[-1], df['저가'].iloc[-1], df['저가'].iloc[-2]
-        rsi = RSIIndicator(close=df["종가"], window=14).rsi().iloc[-1]
-        sma5 = SMAIndicator(close=df["종가"], window=5).sma_indicator().iloc[-1]
-        
-        score = 0
-        if (prev_low <= df['bb_low'].iloc[-2]) or (curr_low <= df['bb_low'].iloc[-1]):
-            if curr_close > df['bb_low'].iloc[-1]: score += 4
-        if curr_close > sma5: score += 1
-        if 30 <= rsi <= 50: score += 2
-        if df['거래량'].iloc[-1] > df['거래량'].iloc[-20:-1].mean() * 1.1: score += 1
-        return score
-    except: return -1
+    end = KRX.latest_session().strftime("%Y%m%d")
+    start = KRX.sessions_back(4).strftime("%Y%m%d")
+    # 실패는 그대로 올려 보냄: 캐시가 마지막 정상값을 대신 내주고, 없으면 카드에 어느 제공자가 실패했는지 표시
+    df = call("pykrx", stock.get_index_ohlcv_by_date, start, end, ticker)
+    curr = df['종가'].iloc[-1]
+    prev = df['종가'].iloc[-2]
+    change = curr - prev
+    rate = (change / prev) * 100
+    return curr, change, rate
+
+@timed("app.get_volume_rank")
+@market_cached("KRX", open_ttl=30)
+def get_volume_rank(market_name, n=10):
+    from pykrx import stock
+    df_vol = call("pykrx", stock.get_market_ohlcv_by_ticker, KRX.latest_session().strftime("%Y%m%d"), market=market_name)
+    top_vol = df_vol.sort_values('거래량', ascending=False).head(n)
+    top_vol['종목명'] = top_vol.index.map(krx_name)  # 종목명 인덱스 (O(1) 조회)
+    return top_vol
+
+start_warm()  # 재시작 직후: 지난 프로세스의 시세 캐시를 되살리고 주기적으로/종료 때 저장 (프로세스당 1번)
+start_api()  # 대시보드/봇용 JSON API: 이 프로세스의 캐시와 스냅샷만 내줌 (MAGIC_API_PORT 를 지정했을 때만, 프로세스당 1번)
 
 # --- 4. 메인 UI 구성 ---
 
-# 상단 네비게이션 바
-st.markdown(f"""
-    <div class="top-nav">
-        <div class="brand-name">📊 매직스톡 Ai</div>
-        <div id="live-clock-text" class="live-clock">
-            {datetime.datetime.now(korea).strftime('%Y.%m.%d %H:%M:%S')}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+# 상단 네비게이션 바 (시계는 실시간 갱신 때 이 자리만 다시 그림)
+nav = st.empty()
+draw_clock = lambda: nav.markdown(top_nav_html(datetime.datetime.now(korea)), unsafe_allow_html=True)
 
 # 메인 레이아웃
 main_col1, main_col2 = st.columns([2, 1])
@@ -148,73 +144,52 @@ main_col1, main_col2 = st.columns([2, 1])
 with main_col1:
     st.markdown('<div class="section-title">현재시황</div>', unsafe_allow_html=True)
     idx_col1, idx_col2 = st.columns(2)
-    
-    for m_name, col in zip(["KOSPI", "KOSDAQ"], [idx_col1, idx_col2]):
-        val, chg, rt = get_market_data(m_name)
-        color_class = "up" if chg > 0 else "down"
-        sign = "+" if chg > 0 else ""
-        col.markdown(f"""
-            <div class="index-card">
-                <div class="index-name">{m_name}</div>
-                <div class="index-value">{val:,.2f}</div>
-                <div class="index-change {color_class}">{sign}{chg:,.2f} ({sign}{rt:.2f}%)</div>
-            </div>
-        """, unsafe_allow_html=True)
+    slots = {"KOSPI": idx_col1.empty(), "KOSDAQ": idx_col2.empty()}
 
     st.markdown('<div class="section-title">시장선택</div>', unsafe_allow_html=True)
     m_type = st.radio("시장 선택", ["KOSPI", "KOSDAQ"], horizontal=True, label_visibility="collapsed")
-    
-    if st.button('🎯 AI 추천종목'):
-        today_str = datetime.datetime.now().strftime("%Y%m%d")
+
+with main_col2:
+    live = live_toggle()
+    st.markdown('<div class="section-title">실시간 거래 TOP 순위</div>', unsafe_allow_html=True)
+    slots["volume"] = rows_box()
+
+@timed("render.page_slot")
+def fill(key, value):  # 조회가 끝나는 순서대로 카드/순위 자리를 채움
+    if isinstance(value, Exception):
+        slots[key].caption(f"시세를 불러오지 못했습니다 ({value})")
+    elif key == "volume":  # 실시간 갱신 때 바뀐 행만 새로 그려지도록 행마다 따로
+        draw_rows(slots[key], volume_rank_rows(zip(value['종목명'], value['거래량'])),
+                  stale_note(get_volume_rank.stale(m_type)))
+    else:
+        slots[key].markdown(index_card_html(key, *value, stale=get_market_data.stale(key)), unsafe_allow_html=True)
+
+def draw_board():  # 지수 2개 + 거래 순위를 동시에 조회 (가장 느린 조회 하나만큼만 기다림)
+    load_page({"KOSPI": (get_market_data, "KOSPI"), "KOSDAQ": (get_market_data, "KOSDAQ"),
+               "volume": (get_volume_rank, m_type)}, fill)
+
+# 켜져 있으면 시계 / 지수 카드 / 거래 순위만 주기적으로 다시 실행 (추천 스캔은 다시 돌지 않음)
+run_live(draw_clock, draw_board, "KRX", live)
+
+with main_col1:
+    btn_col1, btn_col2 = st.columns([3, 1])
+    show_picks = btn_col1.button('🎯 AI 추천종목')
+    refresh_picks = btn_col2.button('🔄 새로 분석')
+    if show_picks or refresh_picks: st.session_state['picks_market'] = m_type  # 페이지 이동 등으로 다시 실행돼도 목록 유지
+    if st.session_state.get('picks_market') == m_type:
         with st.spinner('AI 퀀트 알고리즘 추적중...'):
-            df_base = stock.get_market_price_change_by_ticker(today_str, today_str, market=m_type)
-            filtered = df_base[(df_base['등락률'] >= 0.5) & (df_base['거래량'] > 100000)].sort_values('거래량', ascending=False).head(20)
-
-            picks = []
-            for ticker in filtered.index:
-                score = analyze_stock(ticker, today_str)
-                if score >= 4:
-                    picks.append({
-                        'ticker': ticker, 'name': stock.get_market_ticker_name(ticker),
-                        'price': filtered.loc[ticker, '종가'], 'rate': filtered.loc[ticker, '등락률'],
-                        'score': score, 'target': int(filtered.loc[ticker, '종가'] * 1.05)
-                    })
+            # 장 마감 후 미리 계산된 스냅샷을 바로 보여주고, 없거나 '새로 분석' 이면 지금 계산
+            snap = compute_snapshot(m_type) if refresh_picks else latest_picks(m_type)
+            picks = snap['picks']
+            st.caption(f"{snap['computed_at'][:16].replace('T', ' ')} 계산 ({snap['session']} 거래일 기준)")
+            if snap.get('failed'):  # 재시도 후에도 조회 실패한 종목은 순위에서 빠졌음을 알림
+                st.warning(f"조회 실패 {len(snap['failed'])}종목 제외: {', '.join(snap['failed'][:10])}")
 
             if picks:
-                st.markdown('<div style="background: white; border-radius: 12px; overflow: hidden; border: 1px solid #E5E8EB;">', unsafe_allow_html=True)
-                for p in sorted(picks, key=lambda x: x['score'], reverse=True):
-                    color_class = "up" if p['rate'] > 0 else "down"
-                    st.markdown(f"""
-                        <div class="stock-row">
-                            <div class="stock-info-main">
-                                <span class="stock-name">{p['name']}</span>
-                                <span class="stock-code">{p['ticker']} | <b style="color:#0052CC">SCORE {p['score']}</b></span>
-                            </div>
-                            <div class="stock-price-area">
-                                <div class="current-price {color_class}">{p['price']:,}</div>
-                                <div class="price-change {color_class}">{'+' if p['rate'] > 0 else ''}{p['rate']:.2f}%</div>
-                                <div style="font-size:11px; color:#34C759; margin-top:2px;">Target: {p['target']:,}</div>
-                            </div>
-                        </div>
-                    """, unsafe_allow_html=True)
-                st.markdown('</div>', unsafe_allow_html=True)
+                render_picks(picks, key=f"page-{m_type}")  # 전체 목록을 HTML 한 번으로 (많으면 페이지)
             else:
                 st.info("현재 분석 기준을 충족하는 종목이 없습니다.")
-
-with main_col2:
-    st.markdown('<div class="section-title">실시간 거래 TOP 순위</div>', unsafe_allow_html=True)
-    # 간단한 거래량 순위 테이블
-    df_vol = stock.get_market_ohlcv_by_ticker(datetime.datetime.now().strftime("%Y%m%d"), market=m_type)
-    top_vol = df_vol.sort_values('거래량', ascending=False).head(10)
-    top_vol['종목명'] = [stock.get_market_ticker_name(t) for t in top_vol.index]
-    
-    for idx, row in top_vol.iterrows():
-        st.markdown(f"""
-            <div style="display:flex; justify-content:space-between; padding: 10px 5px; border-bottom: 1px solid #E5E8EB;">
-                <span style="font-size:14px; font-weight:500;">{row['종목명']}</span>
-                <span style="font-size:14px; color:#6B7684;">{row['거래량']//10000:,}만</span>
-            </div>
-        """, unsafe_allow_html=True)
+    render_history([m_type], key=f"hist-{m_type}")  # 지난 추천과 이후 성과 (다시 스캔하지 않음)
 
 # --- 5. 푸터 ---
 st.markdown("""
@@ -225,25 +200,4 @@ st.markdown("""
     </div>
     """, unsafe_allow_html=True)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+render_panel()  # MAGIC_PROFILE=1 또는 ?admin=<MAGIC_ADMIN_TOKEN> 일 때만: 구간별 지연 히스토그램 / 캐시 적중률
@@ -1,14 +1,23 @@
 import pytz
 korea = pytz.timezone("Asia/Seoul")
 import streamlit as st
-from pykrx import stock
-import yfinance as yf # 미국 주식 라이브러리 추가
-import pandas as pd
 import datetime
-import numpy as np
-from ta.momentum import RSIIndicator
-from ta.trend import SMAIndicator
-from ta.volatility import BollingerBands
+from us_batch import latest_quotes
+from us_universe import universe as us_universe
+from name_index import krx_name
+from fetch_scheduler import call
+from market_cache import market_cached
+from trading_calendar import KRX
+from snapshots import compute_snapshot, latest_picks
+from precompute import start_background
+from warm_start import start_warm
+from api_server import start_api
+from page_loader import load_page
+from pick_history import render_history
+from live_board import draw_rows, live_toggle, rows_box, run_live
+from profiling import render_panel, timed
+from render import (PAGE_SIZE, index_card_html, picks_html, render_picks, stale_note, top_nav_html,
+                    volume_rank_rows, watch_list_rows)
 
 # --- 1. 페이지 설정 ---
 st.set_page_config(page_title="MAGIC STOCK", layout="wide", initial_sidebar_state="collapsed")
@@ -94,94 +103,52 @@ st.markdown("""
 
 # --- 3. 데이터 로직 ---
 
+start_background(["KOSPI", "KOSDAQ", "US"])  # 장 마감 후 이 앱의 추천종목 사전 계산 (프로세스당 1개)
+
 # [기존] 국내 함수
+@timed("app.get_market_data")
+@market_cached("KRX", open_ttl=30)  # 장중 30초, 장 마감 후 다음 개장까지
 def get_market_data(market_name):
+    from pykrx import stock  # pykrx(+matplotlib) 는 1초 넘게 걸려 처음 조회할 때 불러옴
     ticker = "1001" if market_name == "KOSPI" else "2001"
-    end = datetime.datetime.now().strftime("%Y%m%d")
-    start = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime("%Y%m%d")
-    try:
-        df = stock.get_index_ohlcv_by_date(start, end, ticker)
-        curr = df['종가'].iloc[-1]
-        prev = df['종가'].iloc[-2]
-        change = curr - prev
-        rate = (change / prev) * 100
-        return curr, change, rate
-    except:
-        return 0, 0, 0
-
-def analyze_stock(ticker, today):
-    try:
-        start = (datetime.datetime.strptime(today, "%Y%m%d") - datetime.timedelta(days=60)).strftime("%Y%m%d")
-        df = stock.get_market_ohlcv_by_date(start, today, ticker)
-        if len(df) < 30: return 0
-        indicator_bb = BollingerBands(close=df["종가"], window=20, window_dev=2)
-        df['bb_low'] = indicator_bb.bollinger_lband()
-        curr_close, curr_low, prev_low = df['종가'].iloc[-1], df['저가'].iloc[-1], df['저가'].iloc[-2]
-        rsi = RSIIndicator(close=df["종가"], window=14).rsi().iloc[-1]
-        sma5 = SMAIndicator(close=df["종가"], window=5).sma_indicator().iloc[-1]
-        
-        score = 0
-        if (prev_low <= df['bb_low'].iloc[-2]) or (curr_low <= df['bb_low'].iloc[-1]):
-            if curr_close > df['bb_low'].iloc[-1]: score += 4
-        if curr_close > sma5: score += 1
-        if 30 <= rsi <= 50: score += 2
-        if df['거래량'].iloc[-1] > df['거래량'].iloc[-20:-1].mean() * 1.1: score += 1
-        return score
-    except: return -1
+    end = KRX.latest_session().strftime("%Y%m%d")
+    start = KRX.sessions_back(4).strftime("%Y%m%d")
+    # 실패는 그대로 올려 보냄: 캐시가 마지막 정상값을 대신 내주고, 없으면 카드에 어느 제공자가 실패했는지 표시
+    df = call("pykrx", stock.get_index_ohlcv_by_date, start, end, ticker)
+    curr = df['종가'].iloc[-1]
+    prev = df['종가'].iloc[-2]
+    change = curr - prev
+    rate = (change / prev) * 100
+    return curr, change, rate
+
+@timed("app.get_volume_rank")
+@market_cached("KRX", open_ttl=30)
+def get_volume_rank(market_name, n=10):
+    from pykrx import stock
+    df_vol = call("pykrx", stock.get_market_ohlcv_by_ticker, KRX.latest_session().strftime("%Y%m%d"), market=market_name)
+    top_vol = df_vol.sort_values('거래량', ascending=False).head(n)
+    top_vol['종목명'] = top_vol.index.map(krx_name)  # 종목명 인덱스 (O(1) 조회)
+    return top_vol
 
 # [추가] 미국 함수
-def get_us_index(symbol):
-    try:
-        tk = yf.Ticker(symbol)
-        df = tk.history(period="5d")
-        curr = df['Close'].iloc[-1]
-        prev = df['Close'].iloc[-2]
-        change = curr - prev
-        rate = (change / prev) * 100
-        return curr, change, rate
-    except: return 0, 0, 0
-
-def analyze_us_stock(ticker):
-    try:
-        tk = yf.Ticker(ticker)
-        df = tk.history(period="3mo")
-        if len(df) < 30: return 0, 0, 0
-        
-        indicator_bb = BollingerBands(close=df["Close"], window=20, window_dev=2)
-        df['bb_low'] = indicator_bb.bollinger_lband()
-        
-        curr_close = df['Close'].iloc[-1]
-        curr_low = df['Low'].iloc[-1]
-        prev_low = df['Low'].iloc[-2]
-        rsi = RSIIndicator(close=df["Close"], window=14).rsi().iloc[-1]
-        sma5 = SMAIndicator(close=df["Close"], window=5).sma_indicator().iloc[-1]
-        
-        score = 0
-        if (prev_low <= df['bb_low'].iloc[-2]) or (curr_low <= df['bb_low'].iloc[-1]):
-            if curr_close > df['bb_low'].iloc[-1]: score += 4
-        if curr_close > sma5: score += 1
-        if 30 <= rsi <= 50: score += 2
-        
-        vol_mean = df['Volume'].iloc[-20:-1].mean()
-        if vol_mean > 0 and df['Volume'].iloc[-1] > vol_mean * 1.1: score += 1
-        
-        prev_close = df['Close'].iloc[-2]
-        rate = ((curr_close - prev_close) / prev_close) * 100
-        
-        return score, curr_close, rate
-    except: return -1, 0, 0
+US_INDEXES = {"S&P 500": "^GSPC", "NASDAQ": "^IXIC"}
+US_WATCH_LIST = ['NVDA', 'TSLA', 'AAPL', 'SOXL']
+US_PAGE_SYMBOLS = tuple(US_INDEXES.values()) + tuple(US_WATCH_LIST)
+
+@timed("app.get_us_quotes")
+@market_cached("NYSE", open_ttl=30, validate=bool)
+def get_us_quotes(symbols):
+    """지수 카드 + 관심 종목 시세를 다중 종목 요청 한 번으로 받습니다 (실패하면 캐시의 마지막 정상값)."""
+    return latest_quotes(list(symbols))
+
+start_warm()  # 재시작 직후: 지난 프로세스의 시세 캐시를 되살리고 주기적으로/종료 때 저장 (프로세스당 1번)
+start_api()  # 대시보드/봇용 JSON API: 이 프로세스의 캐시와 스냅샷만 내줌 (MAGIC_API_PORT 를 지정했을 때만, 프로세스당 1번)
 
 # --- 4. 메인 UI 구성 ---
 
-# 상단 네비게이션
-st.markdown(f"""
-    <div class="top-nav">
-        <div class="brand-name">📊 매직스톡 Ai</div>
-        <div id="live-clock-text" class="live-clock">
-            {datetime.datetime.now(korea).strftime('%Y.%m.%d %H:%M:%S')}
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+# 상단 네비게이션 (시계는 실시간 갱신 때 이 자리만 다시 그림)
+nav = st.empty()
+draw_clock = lambda: nav.markdown(top_nav_html(datetime.datetime.now(korea)), unsafe_allow_html=True)
 
 # [핵심] 사이드바 없이 메인 화면에서 국가 선택 (라디오 버튼)
 st.markdown('<div class="section-title">국가 선택</div>', unsafe_allow_html=True)
@@ -189,6 +156,8 @@ country_mode = st.radio("국가 선택", ["🇰🇷 국내주식 (KRX)", "🇺
 
 # 메인 레이아웃 분기
 main_col1, main_col2 = st.columns([2, 1])
+with main_col2:
+    live = live_toggle()
 
 # ==========================================
 # 1. 국내주식 모드 (기존 소스 완벽 유지)
@@ -197,73 +166,51 @@ if "국내" in country_mode:
     with main_col1:
         st.markdown('<div class="section-title">한국 시황</div>', unsafe_allow_html=True)
         idx_col1, idx_col2 = st.columns(2)
-        
-        for m_name, col in zip(["KOSPI", "KOSDAQ"], [idx_col1, idx_col2]):
-            val, chg, rt = get_market_data(m_name)
-            color_class = "up" if chg > 0 else "down"
-            sign = "+" if chg > 0 else ""
-            col.markdown(f"""
-                <div class="index-card">
-                    <div class="index-name">{m_name}</div>
-                    <div class="index-value">{val:,.2f}</div>
-                    <div class="index-change {color_class}">{sign}{chg:,.2f} ({sign}{rt:.2f}%)</div>
-                </div>
-            """, unsafe_allow_html=True)
+        slots = {"KOSPI": idx_col1.empty(), "KOSDAQ": idx_col2.empty()}
 
         st.markdown('<div class="section-title">시장선택</div>', unsafe_allow_html=True)
         m_type = st.radio("시장 선택", ["KOSPI", "KOSDAQ"], horizontal=True, label_visibility="collapsed")
-        
-        if st.button('🎯 AI 추천종목'):
-            today_str = datetime.datetime.now().strftime("%Y%m%d")
+
+    with main_col2:
+        st.markdown('<div class="section-title">실시간 거래 TOP 순위</div>', unsafe_allow_html=True)
+        slots["volume"] = rows_box()
+
+    @timed("render.page_slot")
+    def fill(key, value):  # 조회가 끝나는 순서대로 카드/순위 자리를 채움
+        if isinstance(value, Exception):
+            slots[key].caption(f"시세를 불러오지 못했습니다 ({value})")
+        elif key == "volume":  # 실시간 갱신 때 바뀐 행만 새로 그려지도록 행마다 따로
+            draw_rows(slots[key], volume_rank_rows(zip(value['종목명'], value['거래량'])),
+                      stale_note(get_volume_rank.stale(m_type)))
+        else:
+            slots[key].markdown(index_card_html(key, *value, stale=get_market_data.stale(key)), unsafe_allow_html=True)
+
+    def draw_board():  # 지수 2개 + 거래 순위를 동시에 조회 (가장 느린 조회 하나만큼만 기다림)
+        load_page({"KOSPI": (get_market_data, "KOSPI"), "KOSDAQ": (get_market_data, "KOSDAQ"),
+                   "volume": (get_volume_rank, m_type)}, fill)
+
+    # 켜져 있으면 시계 / 지수 카드 / 거래 순위만 주기적으로 다시 실행 (추천 스캔은 다시 돌지 않음)
+    run_live(draw_clock, draw_board, "KRX", live)
+
+    with main_col1:
+        btn_col1, btn_col2 = st.columns([3, 1])
+        show_picks = btn_col1.button('🎯 AI 추천종목')
+        refresh_picks = btn_col2.button('🔄 새로 분석')
+        if show_picks or refresh_picks: st.session_state['picks_market'] = m_type  # 페이지 이동 등으로 다시 실행돼도 목록 유지
+        if st.session_state.get('picks_market') == m_type:
             with st.spinner('AI 퀀트 알고리즘 추적중...'):
-                df_base = stock.get_market_price_change_by_ticker(today_str, today_str, market=m_type)
-                filtered = df_base[(df_base['등락률'] >= 0.5) & (df_base['거래량'] > 100000)].sort_values('거래량', ascending=False).head(20)
-
-                picks = []
-                for ticker in filtered.index:
-                    score = analyze_stock(ticker, today_str)
-                    if score >= 4:
-                        picks.append({
-                            'ticker': ticker, 'name': stock.get_market_ticker_name(ticker),
-                            'price': filtered.loc[ticker, '종가'], 'rate': filtered.loc[ticker, '등락률'],
-                            'score': score, 'target': int(filtered.loc[ticker, '종가'] * 1.05)
-                        })
+                # 장 마감 후 미리 계산된 스냅샷을 바로 보여주고, 없거나 '새로 분석' 이면 지금 계산
+                snap = compute_snapshot(m_type) if refresh_picks else latest_picks(m_type)
+                picks = snap['picks']
+                st.caption(f"{snap['computed_at'][:16].replace('T', ' ')} 계산 ({snap['session']} 거래일 기준)")
+                if snap.get('failed'):  # 재시도 후에도 조회 실패한 종목은 순위에서 빠졌음을 알림
+                    st.warning(f"조회 실패 {len(snap['failed'])}종목 제외: {', '.join(snap['failed'][:10])}")
 
                 if picks:
-                    st.markdown('<div style="background: white; border-radius: 12px; overflow: hidden; border: 1px solid #E5E8EB;">', unsafe_allow_html=True)
-                    for p in sorted(picks, key=lambda x: x['score'], reverse=True):
-                        color_class = "up" if p['rate'] > 0 else "down"
-                        st.markdown(f"""
-                            <div class="stock-row">
-                                <div class="stock-info-main">
-                                    <span class="stock-name">{p['name']}</span>
-                                    <span class="stock-code">{p['ticker']} | <b style="color:#0052CC">SCORE {p['score']}</b></span>
-                                </div>
-                                <div class="stock-price-area">
-                                    <div class="current-price {color_class}">{p['price']:,}</div>
-                                    <div class="price-change {color_class}">{'+' if p['rate'] > 0 else ''}{p['rate']:.2f}%</div>
-                                    <div style="font-size:11px; color:#34C759; margin-top:2px;">Target: {p['target']:,}</div>
-                                </div>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    render_picks(picks, key=f"page-{m_type}")  # 전체 목록을 HTML 한 번으로 (많으면 페이지)
                 else:
                     st.info("현재 분석 기준을 충족하는 종목이 없습니다.")
-
-    with main_col2:
-        st.markdown('<div class="section-title">실시간 거래 TOP 순위</div>', unsafe_allow_html=True)
-        # 간단한 거래량 순위 테이블
-        df_vol = stock.get_market_ohlcv_by_ticker(datetime.datetime.now().strftime("%Y%m%d"), market=m_type)
-        top_vol = df_vol.sort_values('거래량', ascending=False).head(10)
-        top_vol['종목명'] = [stock.get_market_ticker_name(t) for t in top_vol.index]
-        
-        for idx, row in top_vol.iterrows():
-            st.markdown(f"""
-                <div style="display:flex; justify-content:space-between; padding: 10px 5px; border-bottom: 1px solid #E5E8EB;">
-                    <span style="font-size:14px; font-weight:500;">{row['종목명']}</span>
-                    <span style="font-size:14px; color:#6B7684;">{row['거래량']//10000:,}만</span>
-                </div>
-            """, unsafe_allow_html=True)
+        render_history([m_type], key=f"hist-{m_type}")  # 지난 추천과 이후 성과 (다시 스캔하지 않음)
 
 # ==========================================
 # 2. 미국주식 모드 (추가된 기능)
@@ -272,85 +219,60 @@ else:
     with main_col1:
         st.markdown('<div class="section-title">미국 시황</div>', unsafe_allow_html=True)
         idx_col1, idx_col2 = st.columns(2)
-        
-        for name, ticker in zip(["S&P 500", "NASDAQ"], ["^GSPC", "^IXIC"]):
-            val, chg, rt = get_us_index(ticker)
-            color_class = "up" if chg > 0 else "down"
-            sign = "+" if chg > 0 else ""
-            
-            # 국내장과 동일한 카드 디자인 적용
-            with (idx_col1 if name == "S&P 500" else idx_col2):
-                st.markdown(f"""
-                    <div class="index-card">
-                        <div class="index-name">{name}</div>
-                        <div class="index-value">{val:,.2f}</div>
-                        <div class="index-change {color_class}">{sign}{chg:,.2f} ({sign}{rt:.2f}%)</div>
-                    </div>
-                """, unsafe_allow_html=True)
+        slots = {name: col.empty() for name, col in zip(US_INDEXES, [idx_col1, idx_col2])}
+        slots["note"] = st.empty()
 
+    with main_col2:
+        st.markdown('<div class="section-title">실시간 거래 TOP 순위</div>', unsafe_allow_html=True)
+        slots["watch"] = rows_box()
+
+    def draw_board():
+        # 지수 카드와 관심 종목은 다중 종목 요청 한 번(get_us_quotes)으로 함께 받음 (페이지 제한 시간까지만 기다림)
+        us_quotes = load_page({"quotes": (get_us_quotes, US_PAGE_SYMBOLS)})["quotes"]
+        if isinstance(us_quotes, Exception):
+            slots["note"].caption(f"시세를 불러오지 못했습니다 ({us_quotes})")
+            us_quotes = {}
+        else:
+            slots["note"].empty()  # 실시간 갱신 중 실패해도 쓸 수 있게 매번 이 자리를 채움
+        us_stale = get_us_quotes.stale(US_PAGE_SYMBOLS)
+        for name, ticker in US_INDEXES.items():  # 국내장과 동일한 카드
+            slots[name].markdown(index_card_html(name, *us_quotes.get(ticker, (0, 0, 0)), stale=us_stale),
+                                 unsafe_allow_html=True)
+        quotes = [(ticker, *us_quotes[ticker]) for ticker in US_WATCH_LIST if ticker in us_quotes]
+        draw_rows(slots["watch"], watch_list_rows(quotes), stale_note(us_stale))
+
+    run_live(draw_clock, draw_board, "NYSE", live)
+
+    with main_col1:
         st.markdown('<div class="section-title">주요 종목 분석</div>', unsafe_allow_html=True)
-        st.info("미국장은 주요 인기 종목 20개를 대상으로 분석합니다.")
+        st.info(f"미국장은 S&P 500 · NASDAQ-100 등 {len(us_universe(refresh_stale=False))}개 종목을 대상으로 분석합니다.")
         
-        if st.button('🎯 AI 추천종목'):
-            us_tickers = ['AAPL', 'NVDA', 'TSLA', 'MSFT', 'AMZN', 'GOOGL', 'META', 'AMD', 'INTC', 'QQQ', 'SPY', 'SOXL', 'TQQQ', 'COIN', 'PLTR', 'IONQ', 'JOBY', 'NFLX', 'DIS', 'KO']
-            
+        btn_col1, btn_col2 = st.columns([3, 1])
+        show_picks = btn_col1.button('🎯 AI 추천종목')
+        refresh_picks = btn_col2.button('🔄 새로 분석')
+        if show_picks or refresh_picks: st.session_state['picks_market'] = "US"
+        if st.session_state.get('picks_market') == "US":
             with st.spinner('Wall Street 데이터 분석중...'):
-                picks = []
                 bar = st.progress(0)
-                
-                for i, ticker in enumerate(us_tickers):
-                    score, price, rate = analyze_us_stock(ticker)
-                    if score >= 4:
-                        picks.append({
-                            'ticker': ticker, 'name': ticker,
-                            'price': price, 'rate': rate,
-                            'score': score, 'target': price * 1.05
-                        })
-                    bar.progress((i + 1) / len(us_tickers))
+                partial_slot = st.empty()  # 100종목 묶음이 끝날 때마다 지금까지의 추천을 먼저 보여줌
+                on_progress = lambda done, total: bar.progress(done / total, text=f"{done}/{total}")
+                on_partial = lambda picks, done, total: partial_slot.markdown(
+                    f"<small>중간 결과 ({done}/{total}종목 분석)</small>" + picks_html(picks[:PAGE_SIZE], us=True),
+                    unsafe_allow_html=True)
+                snap = (compute_snapshot("US", on_progress, on_partial) if refresh_picks
+                        else latest_picks("US", on_progress, on_partial))
                 bar.empty()
+                partial_slot.empty()
+                picks = snap['picks']
+                st.caption(f"{snap['computed_at'][:16].replace('T', ' ')} (한국시간) 계산 ({snap['session']} 거래일 기준)")
+                if snap.get('failed'):  # 재시도 후에도 조회 실패한 종목은 순위에서 빠졌음을 알림
+                    st.warning(f"조회 실패 {len(snap['failed'])}종목 제외: {', '.join(snap['failed'][:10])}")
 
                 if picks:
-                    st.markdown('<div style="background: white; border-radius: 12px; overflow: hidden; border: 1px solid #E5E8EB;">', unsafe_allow_html=True)
-                    for p in sorted(picks, key=lambda x: x['score'], reverse=True):
-                        color_class = "up" if p['rate'] > 0 else "down"
-                        st.markdown(f"""
-                            <div class="stock-row">
-                                <div class="stock-info-main">
-                                    <span class="stock-name">{p['name']}</span>
-                                    <span class="stock-code">US MARKET | <b style="color:#0052CC">SCORE {p['score']}</b></span>
-                                </div>
-                                <div class="stock-price-area">
-                                    <div class="current-price {color_class}">${p['price']:,.2f}</div>
-                                    <div class="price-change {color_class}">{'+' if p['rate'] > 0 else ''}{p['rate']:.2f}%</div>
-                                    <div style="font-size:11px; color:#34C759; margin-top:2px;">Target: ${p['target']:,.2f}</div>
-                                </div>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    render_picks(picks, key="page-US", us=True)  # 전체 목록을 HTML 한 번으로 (많으면 페이지)
                 else:
                     st.info("분석 기준(강력 매수 시그널)을 충족하는 종목이 없습니다.")
-
-    with main_col2:
-        st.markdown('<div class="section-title">실시간 거래 TOP 순위</div>', unsafe_allow_html=True)
-        watch_list = ['NVDA', 'TSLA', 'AAPL', 'SOXL']
-        
-        for ticker in watch_list:
-            try:
-                tk = yf.Ticker(ticker)
-                hist = tk.history(period="2d")
-                curr = hist['Close'].iloc[-1]
-                prev = hist['Close'].iloc[-2]
-                chg = curr - prev
-                rt = (chg/prev)*100
-                color = "#E52E2E" if chg > 0 else "#0055FF"
-                
-                st.markdown(f"""
-                    <div style="display:flex; justify-content:space-between; padding: 15px 5px; border-bottom: 1px solid #E5E8EB;">
-                        <span style="font-size:14px; font-weight:600;">{ticker}</span>
-                        <span style="font-size:14px; color:{color}; font-weight:700;">${curr:.2f} ({rt:.2f}%)</span>
-                    </div>
-                """, unsafe_allow_html=True)
-            except: pass
+        render_history(["US"], key="hist-US", us=True)
 
 # --- 5. 푸터 ---
 st.markdown("""
@@ -361,6 +283,4 @@ st.markdown("""
     </div>
     """, unsafe_allow_html=True)
 
-
-
-
+render_panel()  # MAGIC_PROFILE=1 또는 ?admin=<MAGIC_ADMIN_TOKEN> 일 때만: 구간별 지연 히스토그램 / 캐시 적중률
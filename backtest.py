@@ -0,0 +1,200 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import KRX_RULE, NEWSTOCK_RULE, US_RULE, bollinger_lband, rolling_mean
+from scanner import ANALYSIS_SESSIONS
+
+# --- 추천 규칙 백테스트 (배열 연산) ---
+# 모든 (날짜, 종목)에 대해 analyze_stock 점수를 한 번에 계산하고,
+# 신호일 종가 매수 후 N 거래일 안에 +5% 목표가 / 손절가 중 무엇에 먼저 닿았는지를 집계합니다.
+#
+#   python backtest.py --market KRX --start 2016-01-01 --horizon 10 --stop 0.03
+#   python backtest.py --market KRX --matrix          # ohlcv_matrix 빌드에서 읽기 (빠름)
+
+US_LOOKBACK = 63   # analyze_us_stock 의 history(period="3mo") ≈ 63 거래일
+
+
+def _shift(x, n=1):
+    out = np.full(x.shape, np.nan)
+    out[n:] = x[:-n]
+    return out
+
+
+def windowed_rsi(close, window=14, lookback=ANALYSIS_SESSIONS):
+    """각 날짜마다 '최근 lookback 봉만으로' 계산한 Wilder RSI.
+
+    analyze_stock 은 41 봉 구간에서 RSIIndicator 를 새로 계산하므로 지수평균의 시작점이 구간 첫 봉입니다.
+    adjust=False 지수평균은 구간 안 diff 들의 고정 가중합(FIR)과 같으므로 합성곱 한 번으로 전 구간을 계산합니다.
+    """
+    close = np.asarray(close, dtype=float)
+    diff = np.full(close.shape, np.nan)
+    diff[1:] = close[1:] - close[:-1]
+    with np.errstate(invalid="ignore"):
+        up = np.where(diff > 0, diff, 0.0)
+        dn = np.where(diff < 0, -diff, 0.0)
+    taps = lookback - 1                     # 구간 첫 봉의 diff 는 ta 에서 0 으로 처리
+    alpha = 1.0 / window
+    weights = alpha * (1 - alpha) ** np.arange(taps)[::-1]   # 오래된 diff -> 최신 diff
+    # 데이터 시작 전은 diff 0 과 같으므로 앞쪽을 0 으로 채워 모든 날짜를 같은 길이로 계산
+    pad = np.zeros((taps - 1,) + close.shape[1:])
+    ema_up = sliding_window_view(np.concatenate([pad, up]), taps, axis=0) @ weights
+    ema_dn = sliding_window_view(np.concatenate([pad, dn]), taps, axis=0) @ weights
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_dn == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_dn))
+
+
+def score_series(close, low, volume, rule=KRX_RULE, lookback=ANALYSIS_SESSIONS):
+    """(날짜 x 종목) 패널의 모든 날짜 점수. analyze_stock 을 날짜마다 돌린 것과 같습니다."""
+    close = np.asarray(close, dtype=float)
+    low = np.asarray(low, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+
+    bb_low = bollinger_lband(close, rule.bb_window, rule.bb_dev)
+    prev_bb, prev_low = _shift(bb_low), _shift(low)
+    sma = rolling_mean(close, rule.sma_window)
+    rsi = windowed_rsi(close, rule.rsi_window, lookback)
+    vol_mean = _shift(rolling_mean(volume, rule.vol_window - 1))
+    # 구간 안 유효 봉 수 (상장 직후 종목)
+    bars = np.minimum(np.cumsum(~np.isnan(close), axis=0), lookback)
+
+    with np.errstate(invalid="ignore"):
+        touched = (prev_low <= prev_bb * rule.touch_tol) | (low <= bb_low * rule.touch_tol)
+        score = np.where(touched & (close > bb_low), 4, 0)
+        score += close > sma
+        score += 2 * ((rsi >= rule.rsi_low) & (rsi <= rule.rsi_high))
+        vol_hit = volume > vol_mean * rule.vol_mult
+        if rule.vol_mean_positive:
+            vol_hit &= vol_mean > 0
+        score += vol_hit
+    score[(bars < rule.min_bars) | np.isnan(close)] = 0
+    return score
+
+
+def candidate_mask(close, volume, min_rate=0.5, min_volume=100000, top_n=None):
+    """스캔 1차 필터 (등락률 >= 0.5%, 거래량 > 10만주, 거래량 상위 top_n)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = (close / _shift(close) - 1) * 100
+        mask = (rate >= min_rate) & (volume > min_volume)
+    if top_n:
+        ranked = np.where(mask, volume, -np.inf)
+        order = np.argsort(-ranked, axis=1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(order.shape[1])[None, :].repeat(len(order), 0), axis=1)
+        mask &= rank < top_n
+    return mask
+
+
+def market_prefilter(market):
+    """시장별 1차 필터 기본값. 국내 스캔만 등락률/거래량 조건으로 후보를 고르고 미국 스캔은 목록 전 종목을 채점합니다."""
+    return market != "US"
+
+
+def simulate(close, high, low, horizon=10, target=0.05, stop=0.03):
+    """신호일 종가 진입 기준 결과 배열 (outcome, return, holding).
+
+    outcome: 1 목표가 도달, -1 손절, 0 기간 만료 (같은 날 둘 다 닿으면 보수적으로 손절)
+    """
+    close = np.asarray(close, dtype=float)
+    T = len(close)
+    tgt = close * (1 + target)
+    stp = close * (1 - stop) if stop else np.full(close.shape, -np.inf)
+    never = horizon + 1
+    first_tgt = np.full(close.shape, never)
+    first_stp = np.full(close.shape, never)
+    with np.errstate(invalid="ignore"):
+        for k in range(horizon, 0, -1):     # 뒤에서부터 덮어써서 '처음' 닿은 날을 남김
+            fut_high = np.full(close.shape, np.nan)
+            fut_low = np.full(close.shape, np.nan)
+            fut_high[:T - k] = high[k:]
+            fut_low[:T - k] = low[k:]
+            first_tgt[fut_high >= tgt] = k
+            first_stp[fut_low <= stp] = k
+
+    exit_close = np.full(close.shape, np.nan)
+    exit_close[:T - horizon] = close[horizon:]
+    outcome = np.where(first_stp <= first_tgt, np.where(first_stp < never, -1, 0), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ret = np.where(outcome == 1, target, np.where(outcome == -1, -stop, exit_close / close - 1))
+    holding = np.where(outcome == 0, horizon, np.minimum(first_tgt, first_stp))
+    # 데이터 끝 부분에서 아직 결과가 나지 않은 신호는 ret 이 NaN 으로 남아 집계에서 빠집니다
+    return outcome, ret, holding
+
+
+def run_backtest(close, high, low, volume, rule=KRX_RULE, lookback=ANALYSIS_SESSIONS,
+                 horizon=10, target=0.05, stop=0.03, top_n=None, prefilter=True):
+    """점수 구간별 성과표 (DataFrame)."""
+    close, high, low, volume = (np.asarray(a, dtype=float) for a in (close, high, low, volume))
+    score = score_series(close, low, volume, rule, lookback)
+    outcome, ret, holding = simulate(close, high, low, horizon, target, stop)
+    valid = ~np.isnan(ret) & ~np.isnan(close)
+    if prefilter:
+        valid &= candidate_mask(close, volume, top_n=top_n)
+
+    rows = []
+    for s in range(int(score.max(initial=0)) + 1):
+        sel = valid & (score == s)
+        n = int(sel.sum())
+        if not n:
+            continue
+        rows.append({
+            "score": s, "signals": n,
+            "hit_rate": float((outcome[sel] == 1).mean()),
+            "stop_rate": float((outcome[sel] == -1).mean()),
+            "avg_return": float(ret[sel].mean()),
+            "avg_holding": float(holding[sel].mean()),
+        })
+    report = pd.DataFrame(rows).set_index("score") if rows else pd.DataFrame()
+    picked = valid & (score >= rule.cutoff)
+    if picked.any():
+        report.attrs["picks"] = {
+            "signals": int(picked.sum()), "hit_rate": float((outcome[picked] == 1).mean()),
+            "avg_return": float(ret[picked].mean()), "avg_holding": float(holding[picked].mean()),
+        }
+    return report
+
+
+def load_panels(market, tickers, start, end, store=None):
+    """저장소에서 (날짜 x 종목) close/high/low/volume 패널을 읽습니다."""
+    from ohlcv_store import get_store
+    store = store or get_store()
+    panels = [store.read_panel(market, tickers, start, end, field) for field in ("close", "high", "low", "volume")]
+    return tuple(p.to_numpy(dtype=float) for p in panels), panels[0].index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="추천 규칙 백테스트 (로컬 저장소 일봉 사용)")
+    parser.add_argument("--market", default="KRX", choices=["KRX", "US"])
+    parser.add_argument("--rule", default=None, choices=["krx", "new", "us"])
+    parser.add_argument("--start", default="2016-01-01")
+    parser.add_argument("--end", default="2100-01-01")
+    parser.add_argument("--horizon", type=int, default=10, help="보유 기간 (거래일)")
+    parser.add_argument("--target", type=float, default=0.05)
+    parser.add_argument("--stop", type=float, default=0.03)
+    parser.add_argument("--top-n", type=int, default=None, help="날짜별 거래량 상위 N 개만 (앱: 20)")
+    parser.add_argument("--prefilter", action=argparse.BooleanOptionalAction, default=None,
+                        help="등락률/거래량 1차 필터 (기본: 스캔과 같게 KRX 켬, US 끔)")
+    parser.add_argument("--matrix", action="store_true", help="SQLite 대신 메모리 맵 행렬(ohlcv_matrix)에서 읽기")
+    args = parser.parse_args()
+
+    from ohlcv_store import get_store
+    rule = {"krx": KRX_RULE, "new": NEWSTOCK_RULE, "us": US_RULE}[args.rule or ("us" if args.market == "US" else "krx")]
+    if args.matrix:
+        from ohlcv_matrix import open_matrix
+        matrix = open_matrix(args.market)
+        if matrix is None:
+            parser.error(f"{args.market} 행렬 빌드가 없습니다 (python ohlcv_matrix.py build {args.market})")
+        tickers = matrix.tickers
+        (close, high, low, volume), dates = matrix.panels(tickers, args.start, args.end)
+    else:
+        tickers = get_store().tickers(args.market)
+        (close, high, low, volume), dates = load_panels(args.market, tickers, args.start, args.end)
+    report = run_backtest(close, high, low, volume, rule, US_LOOKBACK if args.market == "US" else ANALYSIS_SESSIONS,
+                          args.horizon, args.target, args.stop, args.top_n,
+                          market_prefilter(args.market) if args.prefilter is None else args.prefilter)
+    print(f"{args.market} {len(tickers)}종목 x {len(dates)}일, 보유 {args.horizon}일, 목표 +{args.target:.0%}, 손절 -{args.stop:.0%}")
+    print(report.to_string(float_format=lambda v: f"{v:.4f}"))
+    if "picks" in report.attrs:
+        print("추천 편입(점수 >= %d):" % rule.cutoff, report.attrs["picks"])
@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import config
+import fake_provider
+from render import picks_html
+
+# --- 추천종목 스캔 벤치마크 ---
+# 가짜 pykrx / yfinance(fake_provider)로 앱의 스캔 경로를 종목 수별로 돌려
+# 전체 시간, 단계별 시간(네트워크 / 지표 계산 / 렌더링), 최대 메모리를 재고 결과를 이력 파일에 쌓습니다.
+#
+#   python benchmark.py                                  # 전체 시나리오 x 20, 100, 500, 2500 종목
+#   python benchmark.py --scenarios krx --sizes 20 500 --latency-ms 80
+#   python benchmark.py --show                           # 지난 결과
+
+SIZES = (20, 100, 500, 2500)
+# 시나리오 -> 앱 화면
+SCENARIOS = {"krx": "app.py / app_us.py 국내", "newstock": "new-stock.py", "us": "app_us.py 미국"}
+REGRESSION = 0.2   # 직전 같은 조건 대비 20% 이상 느려지면 표시
+HISTORY_PATH = config.data_path("benchmarks", "history.jsonl")
+
+
+class _Timer:
+    """함수를 감싸 호출 시간을 합산합니다 (스레드별 시간의 합)."""
+
+    def __init__(self, module, name):
+        self.module, self.name = module, name
+        self.original = getattr(module, name)
+        self.total = 0.0
+
+    def __enter__(self):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return self.original(*args, **kwargs)
+            finally:
+                self.total += time.perf_counter() - started
+        setattr(self.module, self.name, timed)
+        return self
+
+    def __exit__(self, *exc):
+        setattr(self.module, self.name, self.original)
+
+
+def _scan(scenario, size, max_workers):
+    from indicators import KRX_RULE, NEWSTOCK_RULE, US_RULE
+    from scanner import scan_krx, scan_us
+    if scenario == "us":
+        return scan_us(fake_provider.us_tickers(size), US_RULE, max_workers=max_workers)
+    rule = NEWSTOCK_RULE if scenario == "newstock" else KRX_RULE
+    return scan_krx("KOSPI", None, rule, limit=size, max_workers=max_workers)
+
+
+def _fresh_store(scenario, size, warm, max_workers, tag):
+    import ohlcv_store
+    ohlcv_store._default = ohlcv_store.OhlcvStore(os.path.join(config.DATA_DIR, f"{scenario}-{size}-{tag}.sqlite"))
+    if warm:
+        _scan(scenario, size, max_workers)
+
+
+def peak_memory(scenario, size, provider, max_workers=None, warm=False):
+    """스캔 + 렌더링 중 최대 파이썬 메모리(MB). tracemalloc 은 느리므로 지연 없이 따로 한 번 더 돌립니다."""
+    latency, provider.latency = provider.latency, 0.0
+    try:
+        _fresh_store(scenario, size, warm, max_workers, "mem")
+        tracemalloc.start()
+        picks_html(_scan(scenario, size, max_workers))
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+        provider.latency = latency
+
+
+def run_case(scenario, size, provider, max_workers=None, warm=False):
+    """시나리오 1건을 새 저장소(warm 이면 한 번 채운 저장소)에서 실행하고 측정값 dict 를 돌려줍니다."""
+    import scanner
+
+    _fresh_store(scenario, size, warm, max_workers, "time")
+    provider.reset_stats()
+    started = time.perf_counter()
+    # 국내는 종목별 score_frame, 미국은 묶음별 score_panel
+    with _Timer(scanner, "score_frame") as per_ticker, _Timer(scanner, "score_panel") as per_chunk:
+        picks = _scan(scenario, size, max_workers)
+    scan_wall = time.perf_counter() - started
+    render_started = time.perf_counter()
+    picks_html(picks)
+    render = time.perf_counter() - render_started
+    network, calls = provider.busy, provider.calls
+    peak = peak_memory(scenario, size, provider, max_workers, warm)
+
+    return {
+        "scenario": scenario, "size": size, "warm": warm,
+        "wall": round(scan_wall + render, 4),
+        "network": round(network, 4), "calls": calls,
+        "indicators": round(per_ticker.total + per_chunk.total, 4), "render": round(render, 4),
+        "peak_mb": round(peak, 2), "picks": len(picks),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_history(path=HISTORY_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def _key(r):
+    return r["scenario"], r["size"], r["warm"], r["latency_ms"], r["workers"]
+
+
+def run(scenarios=tuple(SCENARIOS), sizes=SIZES, latency_ms=50.0, per_symbol_ms=0.0, max_workers=None,
+        warm=True, history_path=HISTORY_PATH, log=print):
+    from parallel_scan import SCAN_MAX_WORKERS
+    previous = {_key(r): r for r in load_history(history_path)}
+    meta = {"run_at": datetime.datetime.now().isoformat(timespec="seconds"), "commit": _commit(),
+            "latency_ms": latency_ms, "per_symbol_ms": per_symbol_ms, "workers": max_workers or SCAN_MAX_WORKERS}
+
+    # 측정 중 만들어지는 저장소/종목명 인덱스는 임시 폴더에 두어 실제 데이터와 섞이지 않게 합니다
+    real_dir, config.DATA_DIR = config.DATA_DIR, tempfile.mkdtemp(prefix="magic-bench-")
+    provider = fake_provider.install(latency_ms, per_symbol_ms, universe=max(sizes))
+    results = []
+    try:
+        for scenario in scenarios:
+            for size in sizes:
+                for is_warm in ((False, True) if warm else (False,)):
+                    result = {**meta, **run_case(scenario, size, provider, max_workers, is_warm)}
+                    prev = previous.get(_key(result))
+                    if prev and prev["wall"] > 0:
+                        result["vs_prev"] = round(result["wall"] / prev["wall"] - 1, 3)
+                    results.append(result)
+                    log(_format(result))
+    finally:
+        provider.uninstall()
+        shutil.rmtree(config.DATA_DIR, ignore_errors=True)
+        config.DATA_DIR = real_dir
+
+    with open(history_path, "a", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return results
+
+
+def _format(r):
+    line = (f"{r['scenario']:<8} {r['size']:>5} {'warm' if r['warm'] else 'cold':<4} "
+            f"wall {r['wall']:7.2f}s  net {r['network']:7.2f}s ({r['calls']:>5} calls)  "
+            f"ind {r['indicators']:6.2f}s  render {r['render'] * 1000:6.1f}ms  peak {r['peak_mb']:7.1f}MB")
+    if "vs_prev" in r:
+        line += f"  {r['vs_prev']:+.0%}" + ("  <- 느려짐" if r["vs_prev"] > REGRESSION else "")
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI 추천종목 스캔 벤치마크 (가짜 시세 제공자 사용)")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="제공자 호출 1회 지연")
+    parser.add_argument("--per-symbol-ms", type=float, default=0.0, help="다중 종목 요청의 종목당 추가 지연")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-warm", action="store_true", help="저장소가 채워진 상태의 재실행은 생략")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--show", action="store_true", help="이력만 출력")
+    args = parser.parse_args()
+
+    if args.show:
+        for r in load_history(args.history):
+            print(r["run_at"], r.get("commit") or "-", f"{r['latency_ms']:g}ms", _format(r))
+    else:
+        run(args.scenarios, args.sizes, args.latency_ms, args.per_symbol_ms, args.workers,
+            not args.no_warm, args.history)
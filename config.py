@@ -0,0 +1,11 @@
+import os
+
+# 로컬 데이터(시세 저장소, 스냅샷 등) 보관 위치 (환경 변수 MAGIC_DATA_DIR 로 변경 가능)
+DATA_DIR = os.environ.get("MAGIC_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+
+def data_path(*parts):
+    """DATA_DIR 아래 경로를 돌려주고, 상위 폴더가 없으면 만듭니다."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,180 @@
+import sys
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# --- 가짜 시세 제공자 (pykrx / yfinance 대역) ---
+# 네트워크 없이 종목 코드로 시드를 고정한 합성 일봉을 돌려줍니다. 같은 종목은 언제 받아도 같은 값이라
+# 로컬 저장소의 수정주가 변경 감지에 걸리지 않습니다. 호출마다 latency_ms 만큼 지연을 넣을 수 있습니다.
+#
+#   provider = fake_provider.install(latency_ms=50)   # 이후 `from pykrx import stock` / `import yfinance` 는 가짜
+#   ...
+#   provider.uninstall()
+
+HISTORY_DAYS = 400   # 합성 일봉 길이 (달력일). 스캔은 최근 3개월만 씁니다.
+PERIOD_DAYS = {"5d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366}
+
+
+def krx_tickers(n):
+    return [f"{i:06d}" for i in range(1, n + 1)]
+
+
+def us_tickers(n):
+    return [f"FK{i:04d}" for i in range(1, n + 1)]
+
+
+def _series(ticker, dates):
+    """종목별 고정 합성 일봉. 캐시하지 않아 측정 메모리에 섞이지 않습니다."""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    n = len(dates)
+    close = np.round(rng.uniform(2000, 100000) * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+    spread = np.abs(rng.normal(0, 0.01, (2, n)))
+    high = np.round(close * (1 + spread[0]))
+    low = np.round(close * (1 - spread[1]))
+    open_ = np.clip(np.round(close * (1 + rng.normal(0, 0.005, n))), low, high)
+    volume = np.round(rng.lognormal(12, 0.6, n))
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=dates)
+
+
+class FakeProvider:
+    """설치된 동안 pykrx.stock / yfinance 대신 쓰이는 가짜 모듈과 호출 통계."""
+
+    def __init__(self, latency_ms=0.0, per_symbol_ms=0.0, universe=2500, today=None):
+        self.latency = latency_ms / 1000.0
+        self.per_symbol = per_symbol_ms / 1000.0
+        self.universe = universe
+        self.today = pd.Timestamp(today or pd.Timestamp.now().normalize()).strftime("%Y-%m-%d")
+        self.dates = pd.bdate_range(pd.Timestamp(self.today) - pd.Timedelta(days=HISTORY_DAYS), self.today)
+        self.calls = 0
+        self.busy = 0.0          # 제공자 안에서 보낸 시간 합계 (스레드별 합산)
+        self._lock = threading.Lock()
+        self._saved = {}
+
+    # --- 공통 ---
+
+    def _call(self, symbols=1):
+        started = time.perf_counter()
+        delay = self.latency + self.per_symbol * symbols
+        if delay:
+            time.sleep(delay)
+        return started
+
+    def _done(self, started):
+        with self._lock:
+            self.calls += 1
+            self.busy += time.perf_counter() - started
+
+    def _bars(self, ticker, start, end):
+        df = _series(ticker, self.dates)
+        return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls, self.busy = 0, 0.0
+
+    # --- pykrx.stock ---
+
+    def get_market_price_change_by_ticker(self, fromdate, todate, market="KOSPI"):
+        started = self._call()
+        tickers = krx_tickers(self.universe)
+        close = [_series(t, self.dates)["close"].iloc[-1] for t in tickers]
+        # 스캔 1차 필터(+0.5%, 10만주)를 모두 통과하도록 등락률/거래량을 고정
+        df = pd.DataFrame({
+            "종목명": [f"{market}{t}" for t in tickers], "시가": close, "종가": close, "변동폭": 0,
+            "등락률": 1.0, "거래량": [200000 + self.universe - i for i in range(len(tickers))], "거래대금": 0,
+        }, index=pd.Index(tickers, name="티커"))
+        self._done(started)
+        return df
+
+    def get_market_ohlcv_by_date(self, fromdate, todate, ticker):
+        started = self._call()
+        df = self._bars(ticker, fromdate, todate).rename(
+            columns={"open": "시가", "high": "고가", "low": "저가", "close": "종가", "volume": "거래량"})
+        df.index.name = "날짜"
+        self._done(started)
+        return df
+
+    def get_market_ohlcv_by_ticker(self, date, market="KOSPI"):
+        """거래 TOP 순위용 전 종목 당일 시세 (거래량은 종목 순서대로 내림차순)."""
+        started = self._call()
+        tickers = krx_tickers(self.universe)
+        close = [_series(t, self.dates)["close"].iloc[-1] for t in tickers]
+        df = pd.DataFrame({"시가": close, "고가": close, "저가": close, "종가": close,
+                           "거래량": [200000 + self.universe - i for i in range(len(tickers))], "거래대금": 0,
+                           "등락률": 1.0}, index=pd.Index(tickers, name="티커"))
+        self._done(started)
+        return df
+
+    def get_index_ohlcv_by_date(self, fromdate, todate, ticker):
+        return self.get_market_ohlcv_by_date(fromdate, todate, f"IDX{ticker}")
+
+    def get_market_ticker_name(self, ticker):
+        started = self._call()
+        self._done(started)
+        return f"KRX{ticker}"
+
+    # --- yfinance ---
+
+    def download(self, tickers, start=None, end=None, period=None, group_by="ticker", **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        started = self._call(len(tickers))
+        if period:
+            start = pd.Timestamp(self.today) - pd.Timedelta(days=PERIOD_DAYS.get(period, 92))
+            end = pd.Timestamp(self.today) + pd.Timedelta(days=1)
+        frames = {t: self._bars(t, start, pd.Timestamp(end) - pd.Timedelta(days=1)).rename(columns=str.title)
+                  for t in tickers}
+        df = pd.concat(frames, axis=1)
+        self._done(started)
+        return df
+
+    def ticker(self, symbol):
+        provider = self
+
+        class _Ticker:
+            @property
+            def info(self):
+                started = provider._call()
+                provider._done(started)
+                return {"shortName": f"Fake {symbol}"}
+
+            def history(self, start=None, end=None, period=None, **kwargs):
+                if period:
+                    return provider.download([symbol], period=period)[symbol]
+                return provider.download([symbol], start=start, end=end)[symbol]
+        return _Ticker()
+
+    # --- 설치 / 해제 ---
+
+    def modules(self):
+        stock = types.ModuleType("pykrx.stock")
+        for name in ("get_market_price_change_by_ticker", "get_market_ohlcv_by_date", "get_market_ohlcv_by_ticker",
+                     "get_index_ohlcv_by_date", "get_market_ticker_name"):
+            setattr(stock, name, getattr(self, name))
+        pykrx = types.ModuleType("pykrx")
+        pykrx.stock = stock
+        yf = types.ModuleType("yfinance")
+        yf.download = self.download
+        yf.Ticker = self.ticker
+        return {"pykrx": pykrx, "pykrx.stock": stock, "yfinance": yf}
+
+    def install(self):
+        for name, module in self.modules().items():
+            self._saved[name] = sys.modules.get(name)
+            sys.modules[name] = module
+        return self
+
+    def uninstall(self):
+        for name, module in self._saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        self._saved = {}
+
+
+def install(latency_ms=0.0, per_symbol_ms=0.0, universe=2500, today=None):
+    return FakeProvider(latency_ms, per_symbol_ms, universe, today).install()
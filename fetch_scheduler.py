@@ -0,0 +1,305 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from profiling import span
+
+# --- 원격 조회 스케줄러 (제공자별 속도 제한) ---
+# pykrx / yfinance 호출은 모두 여기를 거칩니다.
+#  - 토큰 버킷으로 초당 요청 수 제한, 동시 호출 수 제한
+#  - 오류·느린 응답이면 속도를 절반으로, 정상 응답이 이어지면 조금씩 올림 (AIMD)
+#  - 지터를 넣은 지수 백오프로 재시도, 호출마다 제한 시간
+#  - 제공자 + 엔드포인트(함수 이름)별 회로 차단기: 연속 실패·느린 응답이 쌓이면 잠시 바로 실패시키고,
+#    쉬는 시간이 지나면 호출 1개로 회복을 확인 (그동안 화면은 market_cache 의 마지막 정상값을 씀)
+#    일괄 스캔(with batch(): ...) 안의 호출은 바로 실패하지 않고 회복을 기다립니다 (종목이 순위에서 조용히 빠지지 않도록).
+#    기다리는 시간은 호출당 최대 breaker_wait 초.
+#  - 제공자별 호출/재시도/실패/시간 초과 횟수를 stats() 로 노출
+#
+#   df = call("pykrx", stock.get_market_ohlcv_by_date, start, end, ticker)
+
+# MAGIC_OFFLINE=1 이면 원격 조회를 하지 않고 바로 FetchError (시작 시간 측정, 네트워크 없는 환경)
+OFFLINE = os.environ.get("MAGIC_OFFLINE") == "1"
+
+# 일괄 스캔 중인지 (contextvar 라 parallel_scan.run_scan 이 워커 스레드로 넘겨 줌)
+_batch = contextvars.ContextVar("fetch_batch", default=False)
+
+
+@contextmanager
+def batch():
+    """이 안의 원격 조회는 회로가 열려 있으면 바로 실패하지 않고 회복을 기다립니다 (스캔용).
+    화면의 단건 조회는 이 밖에서 바로 실패하고 캐시의 마지막 정상값을 씁니다."""
+    token = _batch.set(True)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+
+
+class FetchError(Exception):
+    """재시도를 모두 소진한 원격 조회 실패."""
+
+    def __init__(self, provider, cause):
+        super().__init__(f"{provider}: {cause!r}")
+        self.provider, self.cause = provider, cause
+
+
+class TokenBucket:
+    """초당 rate 개, 최대 burst 개까지 모아 두는 토큰 버킷. rate 는 실행 중 바꿀 수 있습니다."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """토큰 1개를 얻을 때까지 기다립니다. 기다린 시간(초)을 돌려줍니다."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """closed -> (연속 threshold 번 실패/느린 응답) open -> cooldown 초 뒤 half-open (탐색 호출 1개만 허용)
+    -> 성공하면 closed, 실패하면 다시 open (cooldown 2배, 최대 max_cooldown)."""
+
+    def __init__(self, threshold=3, cooldown=30.0, max_cooldown=300.0):
+        self.threshold, self.base_cooldown, self.max_cooldown = threshold, cooldown, max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.trips = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)   # 닫힘/다시 열림을 기다리는 일괄 호출용
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.probing or time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        """지금 호출해도 되는지. half-open 에서는 탐색 호출 하나만 True."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def wait(self, timeout):
+        """호출해도 될 때까지 최대 timeout 초 기다립니다: 탐색 호출이 성공해 닫히거나, 쉬는 시간이 끝나
+        이 호출이 탐색 차례를 받으면 True. 시간 안에 안 되면 False."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.opened_at is None:
+                    return True
+                if not self.probing and now - self.opened_at >= self.cooldown:
+                    self.probing = True
+                    return True
+                if now >= deadline:
+                    return False
+                until = deadline if self.probing else min(deadline, self.opened_at + self.cooldown)
+                self._changed.wait(until - now)
+
+    def success(self):
+        with self._lock:
+            self.failures, self.opened_at, self.probing, self.cooldown = 0, None, False, self.base_cooldown
+            self._changed.notify_all()
+
+    def failure(self):
+        with self._lock:
+            self._changed.notify_all()
+            self.failures += 1
+            if self.probing:   # 탐색 실패: 더 오래 쉼
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self.opened_at, self.probing = time.monotonic(), False
+            elif self.opened_at is None and self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.trips += 1
+
+
+class ProviderScheduler:
+    def __init__(self, name, max_rate, min_rate=0.5, burst=None, concurrency=8, timeout=20.0,
+                 retries=3, backoff=0.5, max_backoff=10.0, slow=5.0, breaker_threshold=3, breaker_cooldown=30.0,
+                 breaker_wait=300.0):
+        self.name = name
+        self.max_rate, self.min_rate = float(max_rate), float(min_rate)
+        self.bucket = TokenBucket(max_rate, burst or max_rate)
+        self.timeout, self.retries = timeout, retries
+        self.backoff, self.max_backoff = backoff, max_backoff
+        self.slow = slow                      # 이보다 오래 걸린 응답은 과부하 신호로 봄
+        self._slots = threading.BoundedSemaphore(concurrency)
+        # 제한 시간을 넘긴 호출은 취소할 수 없으므로 여유분을 둔 별도 풀에서 실행
+        self._pool = ThreadPoolExecutor(max_workers=concurrency * 2, thread_name_prefix=f"fetch-{name}")
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "ok": 0, "retries": 0, "errors": 0, "timeouts": 0, "slow": 0, "failed": 0,
+                       "rejected": 0}
+        self.breaker_threshold, self.breaker_cooldown = breaker_threshold, breaker_cooldown
+        self.breaker_wait = breaker_wait      # 일괄 호출이 열린 회로의 회복을 기다리는 최대 시간(초)
+        self.breakers = {}   # 엔드포인트(함수 이름) -> CircuitBreaker
+        self.latency_total = 0.0
+        self.waited_total = 0.0
+
+    # --- 속도 조절 (AIMD) ---
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _faster(self):
+        with self.bucket._lock:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate / 20)
+
+    def _slower(self):
+        with self.bucket._lock:
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counts[key] += n
+
+    def breaker(self, fn):
+        endpoint = getattr(fn, "__name__", type(fn).__name__)
+        with self._lock:
+            b = self.breakers.get(endpoint)
+            if b is None:
+                b = self.breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return b
+
+    # --- 호출 ---
+
+    def _sleep_before_retry(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        time.sleep(delay * random.uniform(0.5, 1.5))   # 지터: 동시에 실패한 호출들이 한꺼번에 재시도하지 않도록
+
+    def call(self, fn, *args, retry_if=None, **kwargs):
+        """fn(*args, **kwargs) 를 제한 안에서 실행합니다.
+
+        retry_if(result) 가 참이면(예: 빈 응답) 재시도하고, 끝까지 그렇다면 마지막 결과를 그대로 돌려줍니다.
+        예외·시간 초과가 재시도 횟수를 넘기거나 엔드포인트 회로가 열려 있으면 FetchError.
+        batch() 안에서는 열린 회로의 회복을 breaker_wait 초까지 기다린 뒤에야 실패합니다.
+        """
+        self._count("calls")
+        breaker = self.breaker(fn)
+        last_error, result = None, None
+        for attempt in range(self.retries + 1):
+            if not breaker.allow() and not (_batch.get() and breaker.wait(self.breaker_wait)):
+                # 회로가 열려 있음: 단건 조회는 바로, 일괄 조회는 기다려도 회복되지 않으면 실패
+                self._count("rejected")
+                self._count("failed")
+                raise FetchError(self.name, last_error or f"{getattr(fn, '__name__', fn)} 회로 차단")
+            if attempt:
+                self._count("retries")
+                self._sleep_before_retry(attempt - 1)
+            with self._slots:
+                waited = self.bucket.acquire()
+                started = time.monotonic()
+                future = self._pool.submit(fn, *args, **kwargs)
+                try:
+                    result = future.result(timeout=self.timeout)
+                except FutureTimeout as e:
+                    last_error = e
+                    self._count("timeouts")
+                    self._slower()
+                    breaker.failure()
+                    continue
+                except Exception as e:
+                    last_error = e
+                    self._count("errors")
+                    self._slower()
+                    breaker.failure()
+                    continue
+                finally:
+                    elapsed = time.monotonic() - started
+                    with self._lock:
+                        self.latency_total += elapsed
+                        self.waited_total += waited
+            if elapsed > self.slow:
+                self._count("slow")
+                self._slower()
+                breaker.failure()   # 느린 응답도 누적되면 차단 (이번 결과는 그대로 씀)
+            else:
+                self._faster()
+                breaker.success()
+            if retry_if is not None and retry_if(result) and attempt < self.retries:
+                last_error = None
+                continue
+            self._count("ok")
+            return result
+        self._count("failed")
+        raise FetchError(self.name, last_error)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            attempts = counts["calls"] + counts["retries"]
+            breakers = dict(self.breakers)
+        return {**counts, "rate": round(self.rate, 2),
+                "avg_latency": round(self.latency_total / attempts, 3) if attempts else 0.0,
+                "avg_wait": round(self.waited_total / attempts, 3) if attempts else 0.0,
+                "circuits": {name: b.state for name, b in breakers.items()}}
+
+
+# 제공자별 기본값. 상한까지는 지연 없이, 오류가 나면 스스로 낮춥니다.
+SCHEDULERS = {
+    "pykrx": ProviderScheduler("pykrx", max_rate=10, concurrency=8, timeout=20),
+    "yfinance": ProviderScheduler("yfinance", max_rate=5, concurrency=4, timeout=30),
+    "web": ProviderScheduler("web", max_rate=1, concurrency=2, timeout=20),   # 지수 구성 종목 표 등
+}
+
+
+def call(provider, fn, *args, **kwargs):
+    if OFFLINE:
+        raise FetchError(provider, "offline")
+    with span(f"net.{provider}"):   # 대기 + 재시도를 포함한 원격 조회 시간
+        return SCHEDULERS[provider].call(fn, *args, **kwargs)
+
+
+def share(n):
+    """이 프로세스가 n 개 프로세스 중 하나일 때 제공자별 속도 상한을 1/n 로 나눕니다 (scan_cli)."""
+    for s in SCHEDULERS.values():
+        s.max_rate /= n
+        s.min_rate = min(s.min_rate, s.max_rate)
+        with s.bucket._lock:
+            s.bucket.rate = min(s.bucket.rate, s.max_rate)
+            s.bucket.burst = max(1.0, s.bucket.burst / n)
+
+
+def stats():
+    """{제공자: 통계 dict}."""
+    return {name: s.stats() for name, s in SCHEDULERS.items()}
+
+
+def failure_summary():
+    """화면 표시용 한 줄 요약. 실패·재시도가 없으면 빈 문자열."""
+    parts = []
+    for name, s in stats().items():
+        if s["failed"] or s["retries"]:
+            parts.append(f"{name} 재시도 {s['retries']} · 실패 {s['failed']} · 시간초과 {s['timeouts']}")
+        opened = [endpoint for endpoint, state in s["circuits"].items() if state != "closed"]
+        if opened:
+            parts.append(f"{name} 차단 중: {', '.join(opened)}")
+    return " / ".join(parts)
@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from profiling import timed
+
+# --- 채점 규칙 ---
+# analyze_stock / analyze_us_stock 의 점수 규칙을 파라미터로 정리한 것.
+# 시세는 (날짜 x 종목) 패널로 받아 모든 종목을 한 번의 배열 연산으로 채점합니다.
+
+
+@dataclass(frozen=True)
+class ScoreRule:
+    bb_window: int = 20
+    bb_dev: float = 2.0
+    rsi_window: int = 14
+    rsi_low: float = 30
+    rsi_high: float = 50
+    sma_window: int = 5
+    touch_tol: float = 1.0         # 저가가 BB 하단 * touch_tol 이하면 '터치'
+    vol_window: int = 20           # 거래량 평균은 iloc[-vol_window:-1] (당일 제외)
+    vol_mult: float = 1.1
+    vol_mean_positive: bool = False  # 미국 규칙: 평균 거래량 > 0 일 때만 거래량 가점
+    min_bars: int = 30
+    cutoff: int = 4                # 추천 편입 최소 점수
+
+
+KRX_RULE = ScoreRule()                                 # app.py / app_us.py 국내
+NEWSTOCK_RULE = ScoreRule(rsi_high=60, touch_tol=1.02)  # new-stock.py
+US_RULE = ScoreRule(vol_mean_positive=True)            # app_us.py 미국
+
+
+# --- 지표 (축 0 = 날짜, 축 1 = 종목) ---
+
+# pandas rolling 은 창 안의 값이 모두 같으면 평균 = 그 값, 표준편차 = 0 을 정확히 돌려줍니다.
+# numpy 로 그냥 계산하면 0.1+0.2 같은 실수 보합 구간에서 끝자리 오차가 생겨
+# '종가 > BB 하단' 같은 비교가 ta 와 달라지므로 보합 창은 따로 맞춥니다 (live_indicators 의 run 과 같은 규칙).
+
+def _flat(windows):
+    with np.errstate(invalid="ignore"):
+        return windows.max(axis=-1) == windows.min(axis=-1)
+
+
+def rolling_mean(x, window):
+    """window 길이 이동평균. 앞쪽 window-1 행은 NaN (ta 의 fillna=False 와 동일)."""
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        windows = sliding_window_view(x, window, axis=0)
+        out[window - 1:] = np.where(_flat(windows), x[window - 1:], windows.mean(axis=-1))
+    return out
+
+
+def rolling_std(x, window):
+    """window 길이 이동 표준편차 (ddof=0, BollingerBands 와 동일)."""
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        windows = sliding_window_view(x, window, axis=0)
+        out[window - 1:] = np.where(_flat(windows), 0.0, windows.std(axis=-1))
+    return out
+
+
+def bollinger_lband(close, window=20, window_dev=2.0):
+    return rolling_mean(close, window) - window_dev * rolling_std(close, window)
+
+
+def wilder_rsi(close, window=14):
+    """RSIIndicator 와 같은 Wilder RSI (ewm alpha=1/window, adjust=False) 를 전 종목 동시에 계산."""
+    close = np.asarray(close, dtype=float)
+    diff = np.empty_like(close)
+    diff[0] = np.nan
+    diff[1:] = close[1:] - close[:-1]
+    # ta 와 동일하게 NaN(첫 행, 상장 전 구간)은 0 으로 취급
+    with np.errstate(invalid="ignore"):
+        up = np.where(diff > 0, diff, 0.0)
+        dn = np.where(diff < 0, -diff, 0.0)
+
+    alpha = 1.0 / window
+    old_wt = 1.0 - alpha
+    ema_up = np.empty_like(up)
+    ema_dn = np.empty_like(dn)
+    ema_up[0], ema_dn[0] = up[0], dn[0]
+    for t in range(1, len(up)):
+        ema_up[t] = (old_wt * ema_up[t - 1] + alpha * up[t]) / (old_wt + alpha)
+        ema_dn[t] = (old_wt * ema_dn[t - 1] + alpha * dn[t]) / (old_wt + alpha)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(ema_dn == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_dn))
+    rsi[:window - 1] = np.nan
+    return rsi
+
+
+# --- 채점 ---
+
+def score_panel(close, low, volume, rule=KRX_RULE):
+    """(날짜 x 종목) 종가/저가/거래량 패널의 마지막 행 기준 점수 벡터를 돌려줍니다.
+
+    각 열은 해당 종목의 최근 세션이 아래쪽에 오도록 정렬되어 있어야 하며,
+    상장 전 구간은 위쪽에 NaN 으로 채웁니다. 유효 봉이 min_bars 미만이면 0 점.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=float).T).T
+    low = np.atleast_2d(np.asarray(low, dtype=float).T).T
+    volume = np.atleast_2d(np.asarray(volume, dtype=float).T).T
+    n_bars = np.count_nonzero(~np.isnan(close), axis=0)
+    if len(close) < 2:
+        return np.zeros(close.shape[1], dtype=int)
+
+    # BB 는 마지막 두 행만 필요하므로 꼬리 구간만 계산
+    bb_tail = close[-(rule.bb_window + 1):]
+    bb_low = bollinger_lband(bb_tail, rule.bb_window, rule.bb_dev)
+    bb_prev, bb_curr = bb_low[-2], bb_low[-1]
+    sma = rolling_mean(close[-rule.sma_window:], rule.sma_window)[-1]
+    rsi = wilder_rsi(close, rule.rsi_window)[-1]
+    vol_mean = volume[-rule.vol_window:-1].mean(axis=0)
+
+    curr_close, curr_low, prev_low = close[-1], low[-1], low[-2]
+    with np.errstate(invalid="ignore"):
+        touched = (prev_low <= bb_prev * rule.touch_tol) | (curr_low <= bb_curr * rule.touch_tol)
+        score = np.where(touched & (curr_close > bb_curr), 4, 0)
+        score += curr_close > sma
+        score += 2 * ((rsi >= rule.rsi_low) & (rsi <= rule.rsi_high))
+        vol_hit = volume[-1] > vol_mean * rule.vol_mult
+        if rule.vol_mean_positive:
+            vol_hit &= vol_mean > 0
+        score += vol_hit
+
+    score[n_bars < rule.min_bars] = 0
+    return score.astype(int)
+
+
+def panel_from_frames(frames, columns):
+    """종목별 DataFrame 딕셔너리를 최근 봉 기준으로 맞춘 (날짜 x 종목) 배열 튜플로 바꿉니다.
+
+    반환값: (tickers, [columns 순서의 2차원 배열...])
+    """
+    tickers = list(frames)
+    depth = max((len(df) for df in frames.values()), default=0)
+    arrays = []
+    for col in columns:
+        arr = np.full((depth, len(tickers)), np.nan)
+        for j, ticker in enumerate(tickers):
+            values = frames[ticker][col].to_numpy(dtype=float)
+            if len(values):
+                arr[depth - len(values):, j] = values
+        arrays.append(arr)
+    return tickers, arrays
+
+
+def frame_indicators(df, rule=KRX_RULE, close="종가", low="저가", volume="거래량"):
+    """score_frame 이 보는 마지막 봉 기준 지표 값 dict (CLI 출력용). 값이 없으면 NaN."""
+    c = df[close].to_numpy(dtype=float)
+    v = df[volume].to_numpy(dtype=float)
+    nan = float("nan")
+    bb = bollinger_lband(c[-(rule.bb_window + 1):], rule.bb_window, rule.bb_dev) if len(c) else []
+    return {
+        "close": float(c[-1]) if len(c) else nan,
+        "bb_low": float(bb[-1]) if len(bb) else nan,
+        "prev_bb_low": float(bb[-2]) if len(bb) > 1 else nan,
+        "sma": float(rolling_mean(c[-rule.sma_window:], rule.sma_window)[-1]) if len(c) >= rule.sma_window else nan,
+        "rsi": float(wilder_rsi(c, rule.rsi_window)[-1]) if len(c) >= rule.rsi_window else nan,
+        "volume": float(v[-1]) if len(v) else nan,
+        "vol_mean": float(v[-rule.vol_window:-1].mean()) if len(v) > 1 else nan,
+        "bars": len(c),
+    }
+
+
+@timed("indicators.score_frame")
+def score_frame(df, rule=KRX_RULE, close="종가", low="저가", volume="거래량"):
+    """종목 1개의 OHLCV DataFrame 을 채점합니다 (기존 analyze_stock 규칙과 동일한 결과)."""
+    if len(df) < rule.min_bars:
+        return 0
+    return int(score_panel(df[close].to_numpy(), df[low].to_numpy(), df[volume].to_numpy(), rule)[0])
@@ -0,0 +1,63 @@
+import os
+
+import streamlit as st
+
+from market_cache import market_is_open
+from profiling import span
+
+# --- 실시간 자동 갱신 ---
+# 시계 / 지수 카드 / 거래 TOP 순위만 fragment 로 다시 실행합니다. 추천 스캔과 나머지 화면은 다시 실행하지 않습니다.
+#   - 시계: LIVE_INTERVAL 초마다. 시세 조회 없이 시계 한 줄만 보냄.
+#   - 카드/순위: 장중에만, 시세 캐시 TTL 보다 자주 돌지 않음 (그 사이에는 값이 바뀔 수 없음).
+#     장이 닫혀 있으면 타이머를 걸지 않고, 개장/마감이 바뀌면 시계가 전체 실행을 한 번 걸어 주기를 다시 정합니다.
+# 시세는 프로세스 공유 캐시(market_cached)에서 오므로 보는 사람이 늘어도 원격 조회는 TTL 당 한 번입니다.
+# fragment 가 다시 돌 때 Streamlit 은 다시 그리지 않은 자리를 지우므로 카드/순위는 매번 다시 보냅니다.
+# 대신 순위는 행마다 별도 요소로 보내 값이 바뀐 행만 화면에서 새로 그려지게 합니다.
+#
+#   live = live_toggle()
+#   run_live(draw_clock, draw_board, "KRX", live)
+
+LIVE_INTERVAL = float(os.environ.get("MAGIC_LIVE_INTERVAL", "10"))   # 시계 갱신 주기(초)
+
+
+def live_toggle():
+    return st.toggle(f"⏱ 실시간 자동 갱신 ({LIVE_INTERVAL:g}초)", key="live_refresh")
+
+
+def rows_box():
+    """행 단위 요소를 간격 없이 쌓는 자리 (순위/관심 종목)."""
+    return st.container(gap=None)
+
+
+def draw_rows(box, rows, note=""):
+    for row in rows:
+        box.markdown(row, unsafe_allow_html=True)
+    if note: box.markdown(note, unsafe_allow_html=True)
+
+
+def run_live(clock, board, exchange="KRX", enabled=False, ttl=30):
+    """clock() 과 board() 를 지금 그리고, enabled 면 각각 fragment 로 주기적으로 다시 그립니다.
+
+    board 는 시세를 조회해 카드/순위를 그리는 함수, ttl 은 그 시세 캐시의 장중 TTL(초) 입니다.
+    자리표시자는 호출 전에 fragment 밖에서 만들어 두고, 두 함수가 매번 같은 자리를 모두 채워야 합니다.
+    """
+    if not enabled:
+        clock()
+        board()
+        return
+    opened = market_is_open(exchange)
+    st.session_state["_live_open"] = opened
+
+    @st.fragment(run_every=LIVE_INTERVAL)
+    def clock_tick():
+        clock()
+        if market_is_open(exchange) != st.session_state.get("_live_open"):
+            st.rerun()   # 개장/마감 전환: 카드/순위 갱신 주기를 다시 정함
+
+    @st.fragment(run_every=max(LIVE_INTERVAL, ttl) if opened else None)
+    def board_tick():
+        with span("live.board"):
+            board()
+
+    clock_tick()
+    board_tick()
@@ -0,0 +1,382 @@
+import json
+import math
+import os
+import tempfile
+import threading
+
+from indicators import KRX_RULE, ScoreRule
+
+# --- 장중 실시간 지표 (O(1) 갱신) ---
+# 새 봉(update) 또는 최신 봉 수정(revise) 마다 전체 구간을 다시 계산하지 않고 상태만 갱신합니다.
+# 결과는 ta 라이브러리(BollingerBands / RSIIndicator / SMAIndicator)와 부동소수점 오차 이내로 같습니다.
+# 모든 객체는 state() / from_state() 로 종목별 체크포인트를 남길 수 있습니다.
+# 스캐너의 장중 재채점(scanner.analyze_stock)은 LiveBook 으로 종목별 LiveScorer 를 들고 있다가
+# 지난 봉이 그대로면 최신 봉만 revise 하고, 새 거래일이 되면 그 종목 구간만 한 번 다시 만듭니다.
+
+
+class RollingWindow:
+    """고정 길이 링 버퍼 + 합계/제곱합. 평균·표준편차를 O(1) 로 제공.
+
+    분산은 (n*Σx² - (Σx)²) / n² 로 계산하므로 정수 가격(KRX)에서는 오차가 없고 보합 구간은 정확히 0 입니다.
+    실수 가격의 누적 오차는 window 번 갱신마다 버퍼에서 다시 합산해 없앱니다 (분할 상환 O(1)).
+    revise 는 버퍼에서 바로 다시 합산합니다 (O(window)). 장중 임시 값(실수)을 빼고 더한 끝자리 오차가
+    정수 가격의 평균에 남으면 '종가 > SMA' 같은 비교가 전체 재계산과 달라지기 때문입니다.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buf = [0.0] * window
+        self.pos = 0            # 다음에 쓸 위치
+        self.count = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.run = 0            # 끝에서부터 같은 값이 이어진 개수 (보합 구간 판별, pandas 와 동일)
+        self._run_prev = 0      # 최신 값 직전까지의 run (revise 용)
+        self._since_sync = 0
+
+    @property
+    def full(self):
+        return self.count >= self.window
+
+    @property
+    def n(self):
+        return min(self.count, self.window)
+
+    @property
+    def mean(self):
+        if not self.n:
+            return math.nan
+        return self.last() if self.run >= self.n else self.sum / self.n
+
+    def _resync(self):
+        values = self.values()
+        self.sum = float(sum(values))
+        self.sumsq = float(sum(v * v for v in values))
+        self._since_sync = 0
+
+    def _tick(self):
+        self._since_sync += 1
+        if self._since_sync >= self.window:
+            self._resync()
+
+    def push(self, value):
+        value = float(value)
+        if self.count >= self.window:
+            old = self.buf[self.pos]
+            self.sum -= old
+            self.sumsq -= old * old
+        self.sum += value
+        self.sumsq += value * value
+        self._run_prev = self.run
+        self.run = self.run + 1 if self.count and value == self.last() else 1
+        self.buf[self.pos] = value
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        self._tick()
+
+    def revise(self, value):
+        """가장 최근 값을 value 로 바꿉니다."""
+        if self.count == 0:
+            return self.push(value)
+        value = float(value)
+        last = (self.pos - 1) % self.window
+        prev = self.buf[(self.pos - 2) % self.window]
+        self.run = self._run_prev + 1 if self.count > 1 and value == prev else 1
+        self.buf[last] = value
+        self._resync()
+
+    def last(self):
+        return self.buf[(self.pos - 1) % self.window]
+
+    def values(self):
+        n = self.n
+        return [self.buf[(self.pos - n + i) % self.window] for i in range(n)]
+
+    def std(self):
+        n = self.n
+        if not n or self.run >= n:
+            return 0.0   # 창 전체가 같은 값이면 정확히 0
+        var = (n * self.sumsq - self.sum * self.sum) / (n * n)   # ddof=0
+        return math.sqrt(var) if var > 0 else 0.0
+
+    def state(self):
+        return {"window": self.window, "values": self.values(), "count": self.count,
+                "run": self.run, "run_prev": self._run_prev}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"])
+        for v in state["values"]:
+            obj.push(v)
+        obj.count = state["count"]
+        obj.run, obj._run_prev = state["run"], state["run_prev"]
+        obj._resync()
+        return obj
+
+
+class SMA:
+    def __init__(self, window=5):
+        self.win = RollingWindow(window)
+
+    def update(self, close):
+        self.win.push(close)
+        return self.value
+
+    def revise(self, close):
+        self.win.revise(close)
+        return self.value
+
+    @property
+    def value(self):
+        return self.win.mean if self.win.full else math.nan
+
+    def state(self):
+        return self.win.state()
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"])
+        obj.win = RollingWindow.from_state(state)
+        return obj
+
+
+class BollingerLow(SMA):
+    """BB 하단 = 이동평균 - dev * 표준편차(ddof=0)."""
+
+    def __init__(self, window=20, window_dev=2.0):
+        super().__init__(window)
+        self.window_dev = window_dev
+
+    @property
+    def value(self):
+        return self.win.mean - self.window_dev * self.win.std() if self.win.full else math.nan
+
+    def state(self):
+        return {**self.win.state(), "window_dev": self.window_dev}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"], state["window_dev"])
+        obj.win = RollingWindow.from_state(state)
+        return obj
+
+
+class PriorVolumeMean(SMA):
+    """당일을 제외한 직전 window-1 봉의 평균 (analyze_stock 의 iloc[-20:-1].mean())."""
+
+    @property
+    def value(self):
+        n = self.win.n
+        if n < 2:
+            return math.nan
+        return (self.win.sum - self.win.last()) / (n - 1)
+
+
+class WilderRSI:
+    """RSIIndicator 와 같은 Wilder RSI. 최신 봉 수정을 위해 직전 상태를 함께 보관합니다."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.alpha = 1.0 / window
+        self.count = 0
+        self.prev_close = None      # 최신 봉 직전 종가
+        self.last_close = None
+        self.up = self.dn = 0.0     # 최신 봉 반영 후 지수평균
+        self._up0 = self._dn0 = 0.0  # 최신 봉 반영 전 지수평균
+
+    def _step(self, close):
+        if self.prev_close is None:
+            return 0.0, 0.0         # ta: 첫 diff(NaN) 는 0
+        diff = close - self.prev_close
+        up, dn = (diff if diff > 0 else 0.0), (-diff if diff < 0 else 0.0)
+        old_wt = 1.0 - self.alpha
+        return ((old_wt * self._up0 + self.alpha * up) / (old_wt + self.alpha),
+                (old_wt * self._dn0 + self.alpha * dn) / (old_wt + self.alpha))
+
+    def update(self, close):
+        close = float(close)
+        self.prev_close, self.last_close = self.last_close, close
+        self._up0, self._dn0 = self.up, self.dn
+        self.count += 1
+        self.up, self.dn = self._step(close)
+        return self.value
+
+    def revise(self, close):
+        close = float(close)
+        self.last_close = close
+        if self.count > 1:
+            self.up, self.dn = self._step(close)
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.window:
+            return math.nan
+        if self.dn == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.up / self.dn)
+
+    def state(self):
+        return {k: getattr(self, k) for k in ("window", "count", "prev_close", "last_close", "up", "dn", "_up0", "_dn0")}
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(state["window"])
+        for k, v in state.items():
+            setattr(obj, k, v)
+        return obj
+
+
+class LiveScorer:
+    """종목 하나의 점수를 봉 단위로 O(1) 갱신합니다 (indicators.score_panel 과 같은 규칙)."""
+
+    def __init__(self, rule=KRX_RULE):
+        self.rule = rule
+        self.bb = BollingerLow(rule.bb_window, rule.bb_dev)
+        self.rsi = WilderRSI(rule.rsi_window)
+        self.sma = SMA(rule.sma_window)
+        self.vol = PriorVolumeMean(rule.vol_window)
+        self.bars = 0
+        self.prev_low = self.prev_bb = math.nan
+        self.low = self.bb_low = self.close = self.volume = math.nan
+
+    def update(self, close, low, volume):
+        """새 봉 추가 후 점수."""
+        self.prev_low, self.prev_bb = self.low, self.bb_low
+        self.bars += 1
+        self.close, self.low, self.volume = float(close), float(low), float(volume)
+        self.bb_low = self.bb.update(close)
+        self.rsi.update(close)
+        self.sma.update(close)
+        self.vol.update(volume)
+        return self.score()
+
+    def revise(self, close, low, volume):
+        """장중 최신 봉이 바뀌었을 때 (새 봉 추가 없이) 점수."""
+        self.close, self.low, self.volume = float(close), float(low), float(volume)
+        self.bb_low = self.bb.revise(close)
+        self.rsi.revise(close)
+        self.sma.revise(close)
+        self.vol.revise(volume)
+        return self.score()
+
+    def score(self):
+        r = self.rule
+        if self.bars < r.min_bars:
+            return 0
+        score = 0
+        if (self.prev_low <= self.prev_bb * r.touch_tol) or (self.low <= self.bb_low * r.touch_tol):
+            if self.close > self.bb_low: score += 4
+        if self.close > self.sma.value: score += 1
+        if r.rsi_low <= self.rsi.value <= r.rsi_high: score += 2
+        vol_mean = self.vol.value
+        if (not r.vol_mean_positive or vol_mean > 0) and self.volume > vol_mean * r.vol_mult: score += 1
+        return score
+
+    @classmethod
+    def from_frame(cls, df, rule=KRX_RULE, close="종가", low="저가", volume="거래량"):
+        """과거 일봉으로 상태를 채운 LiveScorer."""
+        obj = cls(rule)
+        for c, l, v in zip(df[close], df[low], df[volume]):
+            obj.update(c, l, v)
+        return obj
+
+    def state(self):
+        return {
+            "rule": self.rule.__dict__, "bars": self.bars,
+            "bars_state": [self.prev_low, self.prev_bb, self.low, self.bb_low, self.close, self.volume],
+            "bb": self.bb.state(), "rsi": self.rsi.state(), "sma": self.sma.state(), "vol": self.vol.state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        obj = cls(ScoreRule(**state["rule"]))
+        obj.bars = state["bars"]
+        obj.prev_low, obj.prev_bb, obj.low, obj.bb_low, obj.close, obj.volume = state["bars_state"]
+        obj.bb = BollingerLow.from_state(state["bb"])
+        obj.rsi = WilderRSI.from_state(state["rsi"])
+        obj.sma = SMA.from_state(state["sma"])
+        obj.vol = PriorVolumeMean.from_state(state["vol"])
+        return obj
+
+
+def _write_json(obj, path):
+    # 임시 파일 이름을 매번 새로: 여러 앱 프로세스가 같은 체크포인트를 동시에 저장해도 섞이지 않음
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".",
+                                     prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False) as f:
+        json.dump(obj, f)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+def save_checkpoint(scorers, path):
+    """{종목: LiveScorer} 를 JSON 체크포인트로 저장합니다."""
+    _write_json({t: s.state() for t, s in scorers.items()}, path)
+
+
+def load_checkpoint(path):
+    with open(path, encoding="utf-8") as f:
+        return {t: LiveScorer.from_state(s) for t, s in json.load(f).items()}
+
+
+class LiveBook:
+    """규칙 하나에 대한 종목별 LiveScorer 묶음 (장중 재채점용).
+
+    score(종목, 구간 일봉) 은 score_frame(구간, rule) 과 같은 점수를 돌려줍니다.
+    마지막 봉을 뺀 구간(첫 날짜, 직전 봉 날짜/값, 봉 수)이 지난번과 같으면 마지막 봉만 revise 하고 (O(1)),
+    다르면(새 거래일, 직전 봉 확정) 그 종목만 구간으로 다시 만듭니다. path 를 주면 save() 로 체크포인트를 남기고
+    다음 프로세스가 이어서 씁니다 (규칙이 바뀌었으면 버림).
+    """
+
+    def __init__(self, rule=KRX_RULE, path=None):
+        self.rule = rule
+        self.path = path
+        self.entries = {}    # 종목 -> (구간 키, LiveScorer)
+        self.revised = 0     # 최신 봉만 고친 횟수
+        self.rebuilt = 0     # 구간을 다시 만든 횟수
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    @staticmethod
+    def _key(df, close, low, volume):
+        if len(df) < 2:
+            return [len(df)]
+        prev = df.iloc[-2]
+        return [str(df.index[0]), str(df.index[-2]), float(prev[close]), float(prev[low]), float(prev[volume]),
+                len(df)]
+
+    def score(self, ticker, df, close="종가", low="저가", volume="거래량"):
+        if len(df) < self.rule.min_bars:
+            return 0
+        key = self._key(df, close, low, volume)
+        last = df.iloc[-1]
+        bar = (last[close], last[low], last[volume])
+        with self._lock:
+            entry = self.entries.get(ticker)
+            if entry is not None and entry[0] == key:
+                self.revised += 1
+                return entry[1].revise(*bar)
+            scorer = LiveScorer.from_frame(df.iloc[:-1], self.rule, close, low, volume)
+            self.entries[ticker] = (key, scorer)
+            self.rebuilt += 1
+            return scorer.update(*bar)
+
+    def save(self):
+        with self._lock:
+            state = {"rule": self.rule.__dict__,
+                     "entries": {t: {"key": key, "scorer": s.state()} for t, (key, s) in self.entries.items()}}
+        _write_json(state, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("rule") != self.rule.__dict__:
+            return
+        self.entries = {t: (e["key"], LiveScorer.from_state(e["scorer"])) for t, e in state["entries"].items()}
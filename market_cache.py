@@ -0,0 +1,239 @@
+import datetime
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from trading_calendar import get_calendar
+
+# --- 장 운영 시간 기반 캐시 ---
+# 장중에는 짧은 TTL, 장 마감 후에는 다음 개장까지 캐시합니다 (휴장일/특수 세션은 trading_calendar 기준).
+# 모듈 전역 캐시라 같은 프로세스의 모든 Streamlit 세션이 공유하고,
+# 같은 키를 동시에 요청하면 한 번만 조회합니다 (나머지는 결과를 기다림).
+# 만료된 값은 마지막 정상값으로 남겨 두고, 다시 조회하다 실패하면(예외/validate 실패) 그 값을 대신 돌려줍니다.
+# 이때 wrapper.stale(인자...) 가 그 값을 받아 온 시각을 알려 화면에 '지연' 표시를 할 수 있습니다.
+# 재시작 때 warm_start 가 저장해 둔 값을 restore() 로 되살립니다. 만료된 값은 첫 요청에 바로 '지연' 으로 내주고
+# 뒤에서 한 번 다시 조회합니다 (재시작 직후 첫 화면이 원격 조회를 기다리지 않도록).
+
+# 마감 직후 종가 확정까지 장중으로 취급하는 여유 시간
+CLOSE_GRACE = datetime.timedelta(minutes=10)
+
+
+def market_is_open(exchange, now=None):
+    """거래소가 장중(마감 여유 시간 포함)인지 여부."""
+    cal = get_calendar(exchange)
+    now = cal.local_now(now)
+    if not cal.is_session(now.date()):
+        return False
+    opens, closes = cal.session_times(now.date())
+    return opens <= now < closes + CLOSE_GRACE
+
+
+def next_open(exchange, now=None):
+    """다음 개장 시각 (장중이면 다음 세션의 개장)."""
+    return get_calendar(exchange).next_open(now)
+
+
+def session_ttl(exchange, open_ttl, now=None):
+    """장중이면 open_ttl 초, 장 마감 후면 다음 개장까지 남은 초."""
+    if market_is_open(exchange, now):
+        return open_ttl
+    cal = get_calendar(exchange)
+    return max(open_ttl, (next_open(exchange, now) - cal.local_now(now)).total_seconds())
+
+
+class SessionCache:
+    """크기 제한(LRU) + 만료 시각이 있는 스레드 안전 캐시. 만료된 값도 LRU 에서 밀려날 때까지 보관합니다."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self._data = OrderedDict()   # key -> (만료 시각, 값, 받아 온 시각)
+        self._stale = set()          # 지금 마지막 정상값을 대신 내주고 있는 키
+        self._revalidate = set()     # 재시작 때 만료된 채로 되살린 키 (첫 요청은 기다리지 않고 그 값으로)
+        self._refreshing = set()     # 뒤에서 다시 조회 중인 키
+        self.version = 0             # set() 할 때마다 증가 (warm_start 가 바뀐 게 있을 때만 저장)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _lookup(self, key, now):
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= now:
+            return False, None
+        self._data.move_to_end(key)
+        return True, entry[1]
+
+    def _last_good(self, key):
+        """조회 실패 시: 보관 중인 마지막 정상값 (found, 값) 을 돌려주고 키를 '지연' 으로 표시."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            self.stale_hits += 1
+            self._stale.add(key)
+            return True, entry[1]
+
+    def get(self, key):
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+        return value if found else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = time.time()
+            self._data[key] = (now + ttl, value, now)
+            self._data.move_to_end(key)
+            self._stale.discard(key)
+            self._revalidate.discard(key)
+            self.version += 1
+            while len(self._data) > self.maxsize:
+                evicted = self._data.popitem(last=False)[0]
+                self._stale.discard(evicted)
+                self._revalidate.discard(evicted)
+                self.evictions += 1
+
+    def stale_since(self, key):
+        """key 가 마지막 정상값으로 대신 나가고 있으면 그 값을 받아 온 시각(epoch 초), 아니면 None."""
+        with self._lock:
+            return self._data[key][2] if key in self._stale and key in self._data else None
+
+    def get_or_load(self, key, loader, ttl, validate=None):
+        """캐시에 있으면 돌려주고, 없으면 키별로 한 번만 loader() 를 호출해 저장합니다.
+
+        ttl 은 초 또는 (조회 시점에 계산되는) 초를 돌려주는 함수. validate(값) 이 False 면 저장하지 않습니다.
+        loader 가 예외를 내거나 validate 에 걸리면 마지막 정상값이 있을 때 그것을 돌려줍니다 (없으면 예외/값 그대로).
+        """
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            if found:
+                self.hits += 1
+                return value
+            if key in self._revalidate and key in self._data:
+                # 재시작 전 값: 기다리지 않고 '지연' 으로 내주고 다시 조회는 뒤에서 한 번만
+                self.stale_hits += 1
+                self._stale.add(key)
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, loader, ttl, validate),
+                                     name="cache-revalidate", daemon=True).start()
+                return self._data[key][1]
+        return self._load(key, loader, ttl, validate)
+
+    def _refresh(self, key, loader, ttl, validate):
+        try:
+            self._load(key, loader, ttl, validate)
+        except Exception:
+            pass   # 마지막 정상값이 남아 있으니 다음 요청에서 다시 시도
+        finally:
+            with self._lock:
+                self._revalidate.discard(key)
+                self._refreshing.discard(key)
+
+    def _load(self, key, loader, ttl, validate):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # 기다리는 동안 다른 세션이 채웠을 수 있음
+            with self._lock:
+                found, value = self._lookup(key, time.time())
+                if found:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+            try:
+                value = loader()
+            except Exception:
+                found, last = self._last_good(key)
+                if found:
+                    return last
+                raise
+            if validate is None or validate(value):
+                self.set(key, value, ttl() if callable(ttl) else ttl)
+                return value
+            found, last = self._last_good(key)
+            return last if found else value
+
+    def dump(self):
+        """저장용 [(키, 만료 시각, 값, 받아 온 시각)] (LRU 순서)."""
+        with self._lock:
+            return [(key, *entry) for key, entry in self._data.items()]
+
+    def restore(self, entries, now=None):
+        """dump() 결과를 되살립니다. 이미 이 프로세스에서 받은 키는 건드리지 않습니다.
+
+        market_cached 로 등록된 함수의 값은 받아 온 시각 기준 TTL 을 지금 거래일 달력으로 다시 계산하고,
+        만료된 값은 첫 요청 때 기다리지 않고 내준 뒤 뒤에서 다시 조회합니다. (새 값, 만료된 값) 개수를 돌려줍니다.
+        """
+        now = time.time() if now is None else now
+        fresh = expired = 0
+        with self._lock:
+            for key, expires, value, fetched_at in entries:
+                if key in self._data:
+                    continue
+                if key[0] in _registry:
+                    exchange, open_ttl = _registry[key[0]]
+                    fetched = datetime.datetime.fromtimestamp(fetched_at, datetime.timezone.utc)
+                    expires = min(expires, fetched_at + session_ttl(exchange, open_ttl, fetched))
+                self._data[key] = (expires, value, fetched_at)
+                if expires > now:
+                    fresh += 1
+                else:
+                    self._revalidate.add(key)
+                    expired += 1
+            while len(self._data) > self.maxsize:
+                evicted = self._data.popitem(last=False)[0]
+                self._stale.discard(evicted)
+                self._revalidate.discard(evicted)
+        return fresh, expired
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._stale.clear()
+            self._revalidate.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "stale_hits": self.stale_hits, "stale": len(self._stale), "revalidate": len(self._revalidate),
+                    "size": len(self._data), "hit_rate": self.hits / total if total else 0.0}
+
+
+cache = SessionCache()
+_registry = {}   # market_cached 함수 이름 -> (거래소, 장중 TTL). 되살린 값의 만료 재계산용
+
+
+def cache_name(fn):
+    """캐시 키의 함수 이름: '모듈.함수'. Streamlit 스크립트는 모듈이 __main__ 이라 파일 이름을 씁니다
+    (app.py 와 app_us.py 의 같은 이름 함수가 예열 파일에서 섞이지 않도록)."""
+    module = fn.__module__
+    if module == "__main__":
+        module = os.path.splitext(os.path.basename(fn.__code__.co_filename))[0]
+    return f"{module}.{fn.__qualname__}"
+
+
+def market_cached(exchange, open_ttl=30, validate=None):
+    """함수 결과를 거래소 세션 기준 TTL 로 공유 캐시에 저장하는 데코레이터.
+
+    Streamlit 재실행마다 함수가 다시 정의되어도 키는 ('모듈.함수', 인자) 이므로 캐시가 유지됩니다.
+    """
+    def decorator(fn):
+        name = cache_name(fn)
+        _registry[name] = (exchange, open_ttl)
+
+        def key(args, kwargs):
+            return name, args, tuple(sorted(kwargs.items()))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_load(key(args, kwargs), lambda: fn(*args, **kwargs),
+                                     lambda: session_ttl(exchange, open_ttl), validate)
+        # 마지막 정상값을 대신 내주는 중이면 그 값을 받아 온 시각, 아니면 None
+        wrapper.stale = lambda *args, **kwargs: cache.stale_since(key(args, kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,175 @@
+import datetime
+import json
+import threading
+
+import pytz
+
+from config import data_path
+from fetch_scheduler import call
+from profiling import hit
+from trading_calendar import KRX
+
+korea = pytz.timezone("Asia/Seoul")
+
+# --- 종목명/메타 인덱스 ---
+# KOSPI/KOSDAQ 전 종목 이름을 하루 한 번 일괄로 읽어 프로세스 전역 딕셔너리에 둡니다.
+# Streamlit 은 임포트된 모듈을 세션 간에 공유하므로 모든 사용자가 같은 인덱스를 씁니다.
+
+KRX_MARKETS = ("KOSPI", "KOSDAQ")
+
+# 자주 쓰는 미국 종목은 네트워크 없이 바로 보여줍니다. 나머지는 처음 조회 시 받아 디스크에 보관.
+US_NAMES = {
+    'AAPL': 'Apple', 'NVDA': 'NVIDIA', 'TSLA': 'Tesla', 'MSFT': 'Microsoft', 'AMZN': 'Amazon',
+    'GOOGL': 'Alphabet', 'META': 'Meta Platforms', 'AMD': 'AMD', 'INTC': 'Intel',
+    'QQQ': 'Invesco QQQ', 'SPY': 'SPDR S&P 500', 'SOXL': 'Direxion Semicon Bull 3X',
+    'TQQQ': 'ProShares UltraPro QQQ', 'COIN': 'Coinbase', 'PLTR': 'Palantir', 'IONQ': 'IonQ',
+    'JOBY': 'Joby Aviation', 'NFLX': 'Netflix', 'DIS': 'Walt Disney', 'KO': 'Coca-Cola',
+}
+
+_lock = threading.Lock()
+_load_lock = threading.Lock()   # 일괄 로딩은 한 세션만 수행
+_krx = {}          # 종목코드 -> {'name': ..., 'market': ...}
+_krx_loaded_on = None
+_us = dict(US_NAMES)
+_path = None
+_disk_checked = False
+_refreshing = False   # 지난 날짜 인덱스로 답하면서 오늘자를 받는 중
+
+
+def _index_path():
+    global _path
+    if _path is None:
+        _path = data_path("names.json")
+    return _path
+
+
+def _today():
+    return datetime.datetime.now(korea).strftime("%Y%m%d")
+
+
+def _save():
+    with open(_index_path(), "w", encoding="utf-8") as f:
+        json.dump({"date": _krx_loaded_on, "KRX": _krx, "US": _us}, f, ensure_ascii=False)
+
+
+def _load_from_disk(today):
+    """저장된 인덱스를 읽고 오늘자인지 돌려줍니다. 지난 날짜 KRX 이름도 오늘자를 받기 전까지 씁니다."""
+    global _krx_loaded_on, _disk_checked
+    _disk_checked = True
+    try:
+        with open(_index_path(), encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return False
+    _us.update(saved.get("US", {}))
+    for ticker, entry in saved.get("KRX", {}).items():
+        _krx.setdefault(ticker, entry)   # 이 프로세스에서 이미 받은 이름은 덮지 않음
+    if saved.get("date") != today:
+        return False
+    _krx_loaded_on = today
+    return True
+
+
+def update_krx(names, market):
+    """종목코드 -> 종목명 매핑(예: get_market_price_change_by_ticker 의 '종목명' 열)을 인덱스에 합칩니다."""
+    with _lock:
+        for ticker, name in dict(names).items():
+            _krx[ticker] = {"name": name, "market": market}
+
+
+def update_us(names):
+    """미국 종목 -> 이름 매핑(예: 지수 구성 종목 목록)을 합치고 디스크에 저장합니다 (이후 .info 조회 없음)."""
+    with _lock:
+        if not _disk_checked:
+            _load_from_disk(_today())
+        _us.update(dict(names))
+        _save()
+
+
+def _fetch_krx():
+    """최근 거래일 전 종목 표(공유 캐시)에서 KRX 인덱스를 채우고 저장합니다."""
+    global _krx_loaded_on
+    from scanner import price_change_table
+    date_str = KRX.latest_session().strftime("%Y%m%d")
+    for market in KRX_MARKETS:
+        try:
+            df = price_change_table(market, date_str)
+        except Exception:
+            continue
+        if not df.empty and '종목명' in df:
+            update_krx(df['종목명'], market)
+    with _lock:
+        _krx_loaded_on = _today()
+        _save()
+
+
+def _refresh_in_background():
+    global _refreshing
+    try:
+        _fetch_krx()
+    finally:
+        with _lock:
+            _refreshing = False
+
+
+def load_krx(force=False):
+    """오늘자 KRX 인덱스를 준비합니다. 이미 오늘 읽었다면 아무 것도 하지 않습니다.
+
+    디스크에 지난 날짜 인덱스만 있으면 (재시작 직후 등) 그 이름으로 바로 답하고 오늘자는 뒤에서 받습니다.
+    """
+    global _refreshing
+    today = _today()
+    if not force and _krx_loaded_on == today:
+        return
+    with _load_lock:
+        with _lock:
+            if not force and (_krx_loaded_on == today or _refreshing or _load_from_disk(today)):
+                return
+            if not force and _krx:
+                _refreshing = True
+                threading.Thread(target=_refresh_in_background, name="name-index", daemon=True).start()
+                return
+        _fetch_krx()
+
+
+def krx_name(ticker):
+    load_krx()
+    entry = _krx.get(ticker)
+    hit("name_index", entry is not None)
+    if entry is not None:
+        return entry["name"]
+    # 신규 상장 등 인덱스에 없는 종목만 개별 조회
+    from pykrx import stock
+    try:
+        name = call("pykrx", stock.get_market_ticker_name, ticker)
+    except Exception:
+        return ticker
+    update_krx({ticker: name}, None)
+    return name
+
+
+def krx_market(ticker):
+    load_krx()
+    entry = _krx.get(ticker)
+    return entry["market"] if entry else None
+
+
+def us_name(symbol):
+    name = _us.get(symbol)
+    if name is not None:
+        return name
+    with _lock:
+        if not _disk_checked:
+            _load_from_disk(_today())
+    if symbol in _us:
+        return _us[symbol]
+    import yfinance as yf
+    try:
+        info = call("yfinance", lambda: yf.Ticker(symbol).info)
+        name = info.get("shortName") or info.get("longName") or symbol
+    except Exception:
+        return symbol
+    with _lock:
+        _us[symbol] = name
+        _save()
+    return name
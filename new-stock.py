@@ -1,15 +1,15 @@
 import pytz
 import streamlit as st
-from pykrx import stock
-import pandas as pd
 import datetime
-import numpy as np
-from ta.momentum import RSIIndicator
-from ta.trend import SMAIndicator
-from ta.volatility import BollingerBands
-import time
-import random
 import streamlit.components.v1 as components  # 위젯 사용을 위한 컴포넌트 추가
+from trading_calendar import KRX
+from snapshots import compute_snapshot, latest_picks
+from precompute import start_background
+from warm_start import start_warm
+from api_server import start_api
+from render import render_picks
+from pick_history import render_history
+from profiling import render_panel, timed
 
 # --- 0. 기본 설정 ---
 korea = pytz.timezone("Asia/Seoul")
@@ -95,47 +95,15 @@ st.markdown("""
 
 # --- 3. 데이터 로직 ---
 
+start_background(["KOSPI-new", "KOSDAQ-new"])  # 장 마감 후 이 앱의 추천종목 사전 계산 (프로세스당 1개)
+
+@timed("app.get_latest_trading_day")
 def get_latest_trading_day():
-    """가장 최근 영업일을 찾습니다 (주말/공휴일 대비)"""
-    date = datetime.datetime.now(korea)
-    # 장 마감 전(오전 9시 이전)이면 전일 데이터를 쓰도록 할 수도 있으나, 
-    # AI 분석은 '오늘' 날짜 기준으로 시도하고 실패시 전일을 찾음
-    for _ in range(7):
-        date_str = date.strftime("%Y%m%d")
-        try:
-            # 아주 가벼운 조회로 휴장일 체크
-            check_df = stock.get_index_ohlcv_by_date(date_str, date_str, "1001")
-            if not check_df.empty:
-                return date_str
-        except:
-            pass
-        date -= datetime.timedelta(days=1)
-    return datetime.datetime.now(korea).strftime("%Y%m%d")
+    """가장 최근 영업일을 찾습니다 (주말/공휴일 대비, 로컬 거래일 달력 기준 - 네트워크 호출 없음)"""
+    return KRX.latest_session().strftime("%Y%m%d")
 
-def analyze_stock(ticker, target_date):
-    """AI 분석 로직 (기존 유지)"""
-    try:
-        end_date = target_date
-        start_date = (datetime.datetime.strptime(target_date, "%Y%m%d") - datetime.timedelta(days=60)).strftime("%Y%m%d")
-        df = stock.get_market_ohlcv_by_date(start_date, end_date, ticker)
-        if len(df) < 30: return 0
-        
-        indicator_bb = BollingerBands(close=df["종가"], window=20, window_dev=2)
-        df['bb_low'] = indicator_bb.bollinger_lband()
-        
-        curr_close, curr_low, prev_low = df['종가'].iloc[-1], df['저가'].iloc[-1], df['저가'].iloc[-2]
-        rsi = RSIIndicator(close=df["종가"], window=14).rsi().iloc[-1]
-        sma5 = SMAIndicator(close=df["종가"], window=5).sma_indicator().iloc[-1]
-        
-        score = 0
-        if (prev_low <= df['bb_low'].iloc[-2] * 1.02) or (curr_low <= df['bb_low'].iloc[-1] * 1.02):
-            if curr_close > df['bb_low'].iloc[-1]: score += 4
-        if curr_close > sma5: score += 1
-        if 30 <= rsi <= 60: score += 2
-        if df['거래량'].iloc[-1] > df['거래량'].iloc[-20:-1].mean() * 1.1: score += 1
-        return score
-    except:
-        return -1
+start_warm()  # 재시작 직후: 지난 프로세스의 시세 캐시(전 종목 등락률 표 등)를 되살림 (프로세스당 1번)
+start_api()  # 대시보드/봇용 JSON API: 이 프로세스의 캐시와 스냅샷만 내줌 (MAGIC_API_PORT 를 지정했을 때만, 프로세스당 1번)
 
 # --- 4. 메인 UI 구성 ---
 
@@ -203,61 +171,35 @@ with main_col1:
 
     m_type = st.radio("분석 대상 시장", ["KOSPI", "KOSDAQ"], horizontal=True)
     
-    if st.button('🎯 AI 추천종목 찾기 (Start Analysis)'):
+    btn_col1, btn_col2 = st.columns([3, 1])
+    show_picks = btn_col1.button('🎯 AI 추천종목 찾기 (Start Analysis)')
+    refresh_picks = btn_col2.button('🔄 새로 분석')
+    if show_picks or refresh_picks: st.session_state['picks_market'] = m_type  # 페이지 이동 등으로 다시 실행돼도 목록 유지
+    if st.session_state.get('picks_market') == m_type:
         target_date = get_latest_trading_day()
         
-        with st.spinner(f'{target_date} 기준 데이터 분석중... (약 10~20초 소요)'):
+        with st.spinner(f'{target_date} 기준 데이터 분석중... (약 수 초 소요)'):
             try:
-                # 1. 시세 데이터 가져오기 (여기는 Python API 사용 - 분석용)
-                df_base = stock.get_market_price_change_by_ticker(target_date, target_date, market=m_type)
-                
-                # 2. 거래량 상위 & 상승 종목 1차 필터링
-                filtered = df_base[(df_base['등락률'] >= 0.5) & (df_base['거래량'] > 100000)]
-                filtered = filtered.sort_values('거래량', ascending=False).head(30) # 속도를 위해 상위 30개만
-
-                picks = []
+                # 장 마감 후 미리 계산된 스냅샷을 바로 보여주고, 없거나 '새로 분석' 이면 지금 계산
+                # (new-stock 규칙: RSI 30~60, BB 하단 1.02배 터치, 거래량 상위 30개)
                 progress_bar = st.progress(0)
-                total_items = len(filtered)
-                
-                for idx, (ticker, row) in enumerate(filtered.iterrows()):
-                    score = analyze_stock(ticker, target_date)
-                    if score >= 4:
-                        picks.append({
-                            'ticker': ticker, 
-                            'name': stock.get_market_ticker_name(ticker),
-                            'price': row['종가'], 
-                            'rate': row['등락률'],
-                            'score': score, 
-                            'target': int(row['종가'] * 1.05)
-                        })
-                    progress_bar.progress((idx + 1) / total_items)
-                
+                on_progress = lambda done, total: progress_bar.progress(done / total)
+                snap_name = f"{m_type}-new"
+                snap = compute_snapshot(snap_name, on_progress) if refresh_picks else latest_picks(snap_name, on_progress)
                 progress_bar.empty()
+                picks = snap['picks']
+                st.caption(f"{snap['computed_at'][:16].replace('T', ' ')} 계산 ({snap['session']} 거래일 기준)")
+                if snap.get('failed'):  # 재시도 후에도 조회 실패한 종목은 순위에서 빠졌음을 알림
+                    st.warning(f"조회 실패 {len(snap['failed'])}종목 제외: {', '.join(snap['failed'][:10])}")
 
                 if picks:
                     st.success(f"분석 완료! {len(picks)}개의 추천 종목을 찾았습니다.")
-                    st.markdown('<div style="background: white; border-radius: 12px; overflow: hidden; border: 1px solid #E5E8EB;">', unsafe_allow_html=True)
-                    
-                    for p in sorted(picks, key=lambda x: x['score'], reverse=True):
-                        color_class = "up" if p['rate'] > 0 else "down"
-                        st.markdown(f"""
-                            <div class="stock-row">
-                                <div class="stock-info-main">
-                                    <span class="stock-name">{p['name']}</span>
-                                    <span class="stock-code">{p['ticker']} | <b style="color:#0052CC">SCORE {p['score']}</b></span>
-                                </div>
-                                <div class="stock-price-area">
-                                    <div class="current-price {color_class}">{p['price']:,}</div>
-                                    <div class="price-change {color_class}">{'+' if p['rate'] > 0 else ''}{p['rate']:.2f}%</div>
-                                    <div style="font-size:11px; color:#34C759; margin-top:2px;">Target: {p['target']:,}</div>
-                                </div>
-                            </div>
-                        """, unsafe_allow_html=True)
-                    st.markdown('</div>', unsafe_allow_html=True)
+                    render_picks(picks, key=f"page-{m_type}-new")  # 전체 목록을 HTML 한 번으로 (많으면 페이지)
                 else:
                     st.warning("현재 기준에 부합하는 종목이 없습니다.")
             except Exception as e:
                 st.error(f"데이터 접속 중 오류 발생: {e}")
+    render_history([f"{m_type}-new"], key=f"hist-{m_type}-new")  # 지난 추천과 이후 성과 (다시 스캔하지 않음)
 
 # [오른쪽] 실시간 순위 (위젯으로 대체)
 with main_col2:
@@ -307,3 +249,5 @@ st.markdown("""
         Copyright ⓒ 2026 Bohemian All rights reserved.
     </div>
     """, unsafe_allow_html=True)
+
+render_panel()  # MAGIC_PROFILE=1 또는 ?admin=<MAGIC_ADMIN_TOKEN> 일 때만: 구간별 지연 히스토그램 / 캐시 적중률
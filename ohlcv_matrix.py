@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import data_path
+
+# --- 메모리 맵 OHLCV 행렬 ---
+# 저장소(ohlcv_store)의 일봉을 시장별 (날짜 x 종목) 행렬로 떠서 .npy 파일로 둡니다.
+# 가격은 float32, 거래량은 float64 (정수 거래량도 정확히 담김). 없는 봉은 모두 NaN 이라 backtest.load_panels 와 같습니다.
+# 종목/날짜 목록은 index.json.
+# 읽을 때는 np.load(mmap_mode="r") 로 열기만 하므로 세션/워커 프로세스가 OS 페이지 캐시를 그대로 공유합니다.
+# 10년 x (KOSPI+KOSDAQ 약 2,700 + S&P 500) ≈ 2,500일 x 3,200종목 -> 약 190MB.
+#
+#   python ohlcv_matrix.py build KRX US --start 2016-01-01    # 장 마감 후 cron
+#   python ohlcv_matrix.py info KRX
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+FIELDS = PRICE_FIELDS + ("volume",)
+DTYPES = {**{f: np.float32 for f in PRICE_FIELDS}, "volume": np.float64}
+CHUNK = 200   # 빌드할 때 한 번에 읽는 종목 수 (전 종목 피벗을 메모리에 올리지 않음)
+KEEP = 2      # 남겨 둘 이전 빌드 수 (아직 열어 둔 프로세스가 있을 수 있음)
+
+
+def _root(market):
+    return data_path("matrix", market, "current.json")
+
+
+class OhlcvMatrix:
+    """빌드 하나를 읽기 전용 메모리 맵으로 연 것. 배열은 (날짜 x 종목)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.market = meta["market"]
+        self.built_at = meta["built_at"]
+        self.dates = pd.DatetimeIndex(meta["dates"])
+        self.tickers = meta["tickers"]
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        self._arrays = {f: np.load(os.path.join(path, f"{f}.npy"), mmap_mode="r") for f in FIELDS}
+
+    def __getitem__(self, field):
+        return self._arrays[field]
+
+    @property
+    def shape(self):
+        return len(self.dates), len(self.tickers)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self._arrays.values())
+
+    def rows(self, start=None, end=None):
+        """start~end (포함) 날짜 구간의 행 slice."""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start))
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side="right")
+        return slice(lo, hi)
+
+    def columns(self, tickers):
+        """종목 코드 -> 열 번호 배열 (없는 종목은 -1)."""
+        return np.array([self._pos.get(t, -1) for t in tickers], dtype=np.intp)
+
+    def panels(self, tickers=None, start=None, end=None, fields=("close", "high", "low", "volume")):
+        """(패널 튜플, 날짜). tickers 를 주면 backtest.load_panels 와 같은 float 복사본 (없는 종목은 NaN),
+        None 이면 전 종목을 저장된 dtype 그대로 복사 없이 (view)."""
+        rows = self.rows(start, end)
+        if tickers is None:
+            out = tuple(self._arrays[f][rows] for f in fields)
+        else:
+            cols = self.columns(tickers)
+            missing = cols < 0
+            out = []
+            for f in fields:
+                a = self._arrays[f][rows][:, np.where(missing, 0, cols)].astype(float)
+                a[:, missing] = np.nan
+                out.append(a)
+            out = tuple(out)
+        return out, self.dates[rows]
+
+    def frame(self, ticker, start=None, end=None, labels=None):
+        """종목 하나의 OHLCV DataFrame (labels: ohlcv_store.KRX_COLUMNS / US_COLUMNS 로 컬럼 이름 변경)."""
+        rows, col = self.rows(start, end), self._pos[ticker]
+        df = pd.DataFrame({f: self._arrays[f][rows, col] for f in FIELDS}, index=self.dates[rows])
+        df = df[df["close"].notna()]
+        return df.rename(columns=labels) if labels else df
+
+
+def build(market, store=None, start="2000-01-01", end="2100-01-01", tickers=None, chunk=CHUNK, log=None):
+    """저장소에서 새 빌드를 만들고 current.json 을 원자적으로 바꿉니다. 새 빌드 경로를 돌려줍니다."""
+    from ohlcv_store import get_store
+    store = store or get_store()
+    tickers = list(tickers or store.tickers(market))
+    dates = pd.DatetimeIndex(store.dates(market, start, end))
+    # 같은 초에 여러 번 빌드해도 열려 있는 이전 빌드를 덮어쓰지 않도록 항상 새 폴더
+    path = tempfile.mkdtemp(prefix=time.strftime("%Y%m%d-%H%M%S-"), dir=os.path.dirname(_root(market)))
+    built_at = os.path.basename(path)
+
+    arrays = {f: np.lib.format.open_memmap(os.path.join(path, f"{f}.npy"), mode="w+", dtype=DTYPES[f],
+                                           shape=(len(dates), len(tickers))) for f in FIELDS}
+    for lo in range(0, len(tickers), chunk):
+        part = tickers[lo:lo + chunk]
+        for f in FIELDS:
+            arrays[f][:, lo:lo + len(part)] = store.read_panel(market, part, start, end, f).reindex(dates).to_numpy(dtype=float)
+        if log: log(f"[{market}] {min(lo + chunk, len(tickers))}/{len(tickers)}종목")
+    for a in arrays.values():
+        a.flush()
+    del arrays
+
+    with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"market": market, "built_at": built_at, "dates": [d.strftime("%Y-%m-%d") for d in dates],
+                   "tickers": tickers}, f)
+    tmp = _root(market) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"build": built_at}, f)
+    os.replace(tmp, _root(market))   # 읽는 쪽은 항상 완성된 빌드만 봄
+    _cleanup(market)
+    return path
+
+
+def _cleanup(market):
+    root = os.path.dirname(_root(market))
+    builds = sorted((os.path.join(root, d) for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))),
+                    key=os.path.getmtime)
+    for path in builds[:-(KEEP + 1)]:
+        shutil.rmtree(path, ignore_errors=True)   # 열린 메모리 맵은 지워져도 계속 읽힘 (POSIX)
+
+
+# 프로세스 전역: 모든 세션이 같은 맵을 공유하고, current.json 이 바뀌면 다음 요청 때 새 빌드로 바꿔 엶
+_open = {}
+_open_lock = threading.Lock()
+
+
+def open_matrix(market):
+    """시장의 최신 빌드. 아직 빌드가 없으면 None."""
+    root = _root(market)
+    try:
+        mtime = os.path.getmtime(root)
+    except OSError:
+        return None
+    with _open_lock:
+        cached = _open.get(market)
+        if cached is None or cached[0] != mtime:
+            with open(root, encoding="utf-8") as f:
+                build_id = json.load(f)["build"]
+            _open[market] = cached = (mtime, OhlcvMatrix(os.path.join(os.path.dirname(root), build_id)))
+        return cached[1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="메모리 맵 OHLCV 행렬 빌드/확인")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("markets", nargs="+", choices=["KRX", "US"])
+    parser.add_argument("--start", default="2000-01-01")
+    parser.add_argument("--end", default="2100-01-01")
+    args = parser.parse_args()
+    for market in args.markets:
+        if args.command == "build":
+            started = time.perf_counter()
+            build(market, start=args.start, end=args.end, log=print)
+            print(f"[{market}] 빌드 완료 ({time.perf_counter() - started:.1f}s)")
+        m = open_matrix(market)
+        if m is None:
+            print(f"[{market}] 빌드 없음")
+            continue
+        span = f" ({m.dates[0]:%Y-%m-%d}~{m.dates[-1]:%Y-%m-%d})" if len(m.dates) else ""
+        print(f"[{market}] {m.built_at}: {m.shape[1]}종목 x {m.shape[0]}일{span}, {m.nbytes / 2**20:.1f}MB")
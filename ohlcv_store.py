@@ -0,0 +1,289 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from config import data_path
+from fetch_scheduler import call
+from parallel_scan import run_scan
+from profiling import hit
+from trading_calendar import get_calendar
+
+# --- 로컬 OHLCV 저장소 (SQLite) ---
+# (시장, 종목, 날짜) 단위로 일봉을 저장하고, 마지막 저장일 이후의 봉만 새로 받아 붙입니다.
+# 마지막 저장 봉은 겹쳐서 다시 받아 장중 미완성 봉을 갱신하고, 수정주가 변경(액면분할 등)을 감지합니다.
+
+# 장중에 같은 종목을 다시 확인하기까지의 최소 간격(초). 이 안에서는 네트워크 호출 없이 저장본만 읽습니다.
+# 장 마감 이후 확인한 종목은 다음 개장 전까지 다시 받지 않습니다.
+STORE_TTL = int(os.environ.get("MAGIC_STORE_TTL", "600"))
+# 마감 후 종가가 확정되기까지 기다리는 시간(초)
+SETTLE_SECONDS = 600
+# 여러 프로세스(scan_cli 등)가 같은 파일에 쓸 때 잠금 해제를 기다리는 시간(초)
+BUSY_TIMEOUT = 30
+
+KRX_COLUMNS = {"open": "시가", "high": "고가", "low": "저가", "close": "종가", "volume": "거래량"}
+US_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ohlcv (
+    market TEXT NOT NULL, ticker TEXT NOT NULL, date TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (market, ticker, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    market TEXT NOT NULL, ticker TEXT NOT NULL,
+    covered_from TEXT NOT NULL, last_date TEXT, checked_at REAL NOT NULL,
+    PRIMARY KEY (market, ticker)
+) WITHOUT ROWID;
+"""
+
+
+def _iso(d):
+    """'YYYYMMDD' / 'YYYY-MM-DD' / date 를 'YYYY-MM-DD' 로 맞춥니다."""
+    if isinstance(d, (datetime.date, datetime.datetime)):
+        return d.strftime("%Y-%m-%d")
+    d = str(d)
+    return f"{d[:4]}-{d[4:6]}-{d[6:8]}" if len(d) == 8 else d[:10]
+
+
+def _shift(iso_date, days):
+    return (datetime.date.fromisoformat(iso_date) + datetime.timedelta(days=days)).isoformat()
+
+
+# --- 원격 조회 (시장별) ---
+
+def fetch_krx(ticker, start, end):
+    from pykrx import stock
+    df = call("pykrx", stock.get_market_ohlcv_by_date, start.replace("-", ""), end.replace("-", ""), ticker)
+    return df.rename(columns={v: k for k, v in KRX_COLUMNS.items()})
+
+
+def fetch_us(ticker, start, end):
+    import yfinance as yf
+    # yfinance 의 end 는 해당일 미포함
+    df = call("yfinance", yf.Ticker(ticker).history, start=start, end=_shift(end, 1))
+    return df.rename(columns={v: k for k, v in US_COLUMNS.items()})
+
+
+def fetch_us_batch(tickers, start, end):
+    from us_batch import download_history
+    frames = download_history(tickers, start=start, end=_shift(end, 1))
+    return {t: df.rename(columns={v: k for k, v in US_COLUMNS.items()}) for t, df in frames.items()}
+
+
+FETCHERS = {"KRX": fetch_krx, "US": fetch_us}
+BATCH_FETCHERS = {"US": fetch_us_batch}
+
+
+class OhlcvStore:
+    def __init__(self, path=None, fetchers=None, batch_fetchers=None, ttl=None):
+        self.path = path or data_path("ohlcv.sqlite")
+        self.fetchers = dict(fetchers or FETCHERS)
+        self.batch_fetchers = dict(BATCH_FETCHERS if batch_fetchers is None else batch_fetchers)
+        self.ttl = STORE_TTL if ttl is None else ttl
+        self.fetch_count = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    # --- 내부 ---
+
+    def _coverage(self, market, ticker):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT covered_from, last_date, checked_at FROM coverage WHERE market=? AND ticker=?",
+                (market, ticker)).fetchone()
+
+    def _stored_close(self, market, ticker, date):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT close FROM ohlcv WHERE market=? AND ticker=? AND date=?", (market, ticker, date)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _rows(market, ticker, df):
+        if df is None or df.empty:
+            return []
+        return [(market, ticker, idx.strftime("%Y-%m-%d"),
+                 float(r.open), float(r.high), float(r.low), float(r.close), float(r.volume))
+                for idx, r in zip(df.index, df[["open", "high", "low", "close", "volume"]].itertuples())]
+
+    def _fetch(self, market, ticker, start, end):
+        self.fetch_count += 1
+        return self._rows(market, ticker, self.fetchers[market](ticker, start, end))
+
+    def _settled(self, market, checked_at, now):
+        """마지막 확인 이후 새 봉이 생겼을 수 없으면 True."""
+        if now - checked_at < self.ttl:
+            return True
+        cal = get_calendar(market)
+        if cal.is_open():
+            return False
+        return checked_at >= cal.last_close().timestamp() + SETTLE_SECONDS
+
+    def _plan(self, market, ticker, start, end, now):
+        """받아야 할 (시작, 끝) 구간 목록. 비어 있으면 저장본만으로 충분합니다."""
+        cov = self._coverage(market, ticker)
+        if cov is None:
+            return [(start, end)], None
+        covered_from, last_date, checked_at = cov
+        ranges = []
+        if start < covered_from:
+            ranges.append((start, _shift(covered_from, -1)))
+        if end >= (last_date or covered_from) and not self._settled(market, checked_at, now):
+            ranges.append((last_date or covered_from, end))
+        return ranges, cov
+
+    def _write(self, market, ticker, rows, covered_from, now, replace=False):
+        with self._lock, self._conn:
+            if replace:
+                self._conn.execute("DELETE FROM ohlcv WHERE market=? AND ticker=?", (market, ticker))
+            self._conn.executemany("INSERT OR REPLACE INTO ohlcv VALUES (?,?,?,?,?,?,?,?)", rows)
+            last = self._conn.execute(
+                "SELECT MAX(date) FROM ohlcv WHERE market=? AND ticker=?", (market, ticker)).fetchone()[0]
+            self._conn.execute("INSERT OR REPLACE INTO coverage VALUES (?,?,?,?,?)",
+                               (market, ticker, covered_from, last, now))
+
+    # --- 공개 API ---
+
+    def ensure(self, market, ticker, start, end, prefetched=None):
+        """[start, end] 구간이 저장소에 있도록 부족한 봉만 받아 채웁니다.
+
+        prefetched 로 일괄 조회 결과(행 리스트)를 넘기면 그 안에서 필요한 구간만 골라 씁니다.
+        """
+        start, end = _iso(start), _iso(end)
+        now = time.time()
+        ranges, cov = self._plan(market, ticker, start, end, now)
+        hit(f"ohlcv_store.{market}", not ranges)   # 저장본만으로 충분했는지
+        if not ranges:
+            return
+        covered_from = min(start, cov[0]) if cov else start
+        rows = []
+        for s, e in ranges:
+            if prefetched is not None:
+                fetched = [r for r in prefetched if s <= r[2] <= e]
+            else:
+                fetched = self._fetch(market, ticker, s, e)
+            # 겹친 마지막 봉의 종가가 달라졌으면 수정주가가 바뀐 것 -> 전체 재수집
+            if cov and cov[1] and fetched and fetched[0][2] == cov[1]:
+                stored = self._stored_close(market, ticker, cov[1])
+                if stored is not None and abs(stored - fetched[0][6]) > 1e-6 * max(abs(stored), 1.0):
+                    rows = self._fetch(market, ticker, covered_from, end)
+                    self._write(market, ticker, rows, covered_from, now, replace=True)
+                    return
+            rows.extend(fetched)
+        self._write(market, ticker, rows, covered_from, now)
+
+    def ensure_many(self, market, tickers, start, end, max_workers=None):
+        """콜드 스타트용 일괄 백필: 여러 종목의 부족분을 채우고 실패 종목 리스트를 돌려줍니다.
+
+        다중 종목 조회기(batch_fetchers)가 있는 시장은 부족한 종목을 한 번에 받고,
+        나머지는 워커 풀에서 종목별로 동시에 받습니다.
+        """
+        start, end = _iso(start), _iso(end)
+        tickers = list(tickers)
+        batch = self.batch_fetchers.get(market)
+        prefetched = {}
+        if batch is not None:
+            now = time.time()
+            plans = {t: self._plan(market, t, start, end, now)[0] for t in tickers}
+            needed = [t for t, ranges in plans.items() if ranges]
+            if needed:
+                batch_start = min(r[0] for t in needed for r in plans[t])
+                self.fetch_count += 1
+                try:
+                    frames = batch(needed, batch_start, end)
+                except Exception:
+                    frames = {}
+                prefetched = {t: self._rows(market, t, df) for t, df in frames.items()}
+
+        def _one(ticker):
+            try:
+                self.ensure(market, ticker, start, end, prefetched.get(ticker))
+                return None
+            except Exception:
+                return ticker
+        return [t for t in run_scan(tickers, _one, max_workers=max_workers) if t is not None]
+
+    def read(self, market, ticker, start, end):
+        start, end = _iso(start), _iso(end)
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT date, open, high, low, close, volume FROM ohlcv "
+                "WHERE market=? AND ticker=? AND date BETWEEN ? AND ? ORDER BY date",
+                self._conn, params=(market, ticker, start, end), index_col="date", parse_dates=["date"])
+        return df
+
+    def read_many(self, market, tickers, start, end):
+        """여러 종목을 쿼리 한 번으로 읽어 {종목: read() 와 같은 DataFrame} 으로 (봉이 없는 종목은 빠짐)."""
+        start, end = _iso(start), _iso(end)
+        tickers = list(tickers)
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT ticker, date, open, high, low, close, volume FROM ohlcv WHERE market=? "
+                f"AND date BETWEEN ? AND ? AND ticker IN ({','.join('?' * len(tickers))}) ORDER BY ticker, date",
+                self._conn, params=(market, start, end, *tickers), index_col="date", parse_dates=["date"])
+        return {t: g.drop(columns="ticker") for t, g in df.groupby("ticker", sort=False)}
+
+    def read_panel(self, market, tickers, start, end, field="close"):
+        """여러 종목을 (날짜 x 종목) 패널 DataFrame 으로 한 번에 읽습니다."""
+        start, end = _iso(start), _iso(end)
+        tickers = list(tickers)
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT date, ticker, {field} FROM ohlcv WHERE market=? AND date BETWEEN ? AND ? "
+                f"AND ticker IN ({','.join('?' * len(tickers))})",
+                self._conn, params=(market, start, end, *tickers), parse_dates=["date"])
+        return df.pivot(index="date", columns="ticker", values=field).reindex(columns=tickers)
+
+    def tickers(self, market):
+        """저장소에 봉이 있는 종목 목록."""
+        with self._lock:
+            rows = self._conn.execute("SELECT ticker FROM coverage WHERE market=? ORDER BY ticker", (market,)).fetchall()
+        return [r[0] for r in rows]
+
+    def dates(self, market, start, end):
+        """저장소에 봉이 하나라도 있는 날짜 목록 ('YYYY-MM-DD', 오름차순)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT date FROM ohlcv WHERE market=? AND date BETWEEN ? AND ? "
+                                      "ORDER BY date", (market, _iso(start), _iso(end))).fetchall()
+        return [r[0] for r in rows]
+
+    def history(self, market, ticker, start, end):
+        """부족분을 채운 뒤 저장본을 돌려줍니다."""
+        self.ensure(market, ticker, start, end)
+        return self.read(market, ticker, start, end)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_store():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = OhlcvStore()
+        return _default
+
+
+def krx_ohlcv(ticker, start, end):
+    """pykrx get_market_ohlcv_by_date 와 같은 한글 컬럼(시가/고가/저가/종가/거래량) DataFrame."""
+    return get_store().history("KRX", ticker, start, end).rename(columns=KRX_COLUMNS)
+
+
+def us_window(days=92, end=None):
+    """미국 종목 분석 구간 (start, end). 기본 약 3개월 (history(period="3mo") 대응)."""
+    end = _iso(end or get_calendar("US").latest_session())
+    return _shift(end, -days), end
+
+
+def us_history(ticker, days=92, end=None):
+    """yfinance history 와 같은 컬럼(Open/High/Low/Close/Volume) DataFrame."""
+    start, end = us_window(days, end)
+    return get_store().history("US", ticker, start, end).rename(columns=US_COLUMNS)
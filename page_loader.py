@@ -0,0 +1,44 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+# --- 화면 데이터 동시 로딩 ---
+# 재실행마다 지수 카드 / 거래 순위처럼 서로 독립인 조회를 한꺼번에 시작하고,
+# 끝나는 순서대로 on_ready 를 (스크립트 스레드에서) 불러 자리표시자(st.empty)를 채웁니다.
+# 전체 대기 시간은 가장 느린 조회 하나로 정해지고, deadline 을 넘긴 조회는 기다리지 않습니다.
+
+# 화면 데이터 전체를 기다리는 최대 시간(초, 환경 변수 MAGIC_PAGE_DEADLINE)
+PAGE_DEADLINE = float(os.environ.get("MAGIC_PAGE_DEADLINE", "8"))
+PAGE_WORKERS = 8
+
+# 프로세스 전역 풀: 세션마다 만들지 않고, deadline 을 넘긴 조회가 끝날 때까지 재실행을 붙잡지 않음
+_pool = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix="page")
+
+
+class PageTimeout(TimeoutError):
+    """deadline 안에 끝나지 않은 조회 (조회 자체는 뒤에서 계속되어 캐시를 채움)."""
+
+
+def load_page(tasks, on_ready=None, deadline=PAGE_DEADLINE):
+    """tasks: {키: (함수, 인자...)} 를 동시에 실행해 {키: 값} 을 돌려줍니다.
+
+    on_ready(키, 값) 은 끝나는 순서대로 호출 스레드에서 불립니다 (st 호출 가능).
+    실패한 조회는 값 자리에 예외를, deadline 을 넘긴 조회는 PageTimeout 을 넘깁니다.
+    """
+    futures = {_pool.submit(fn, *args): key for key, (fn, *args) in tasks.items()}
+    results = {}
+
+    def ready(key, value):
+        results[key] = value
+        if on_ready: on_ready(key, value)
+
+    started = time.monotonic()
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            error = future.exception()
+            ready(futures[future], error if error is not None else future.result())
+    except TimeoutError:
+        for future, key in futures.items():
+            if key not in results:
+                ready(key, PageTimeout(f"{key}: {time.monotonic() - started:.1f}초 안에 응답 없음"))
+    return results
@@ -0,0 +1,33 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 동시에 조회할 최대 종목 수 (환경 변수 MAGIC_SCAN_WORKERS 로 조정)
+SCAN_MAX_WORKERS = int(os.environ.get("MAGIC_SCAN_WORKERS", "8"))
+
+
+def run_scan(tickers, analyze_fn, max_workers=None, on_progress=None):
+    """종목별 분석 함수를 워커 풀에서 동시에 실행하고, 입력 순서 그대로 결과 리스트를 돌려줍니다.
+
+    on_progress(완료 개수, 전체 개수)는 메인 스레드에서만 호출되므로 st.progress 갱신에 그대로 쓸 수 있습니다.
+    워커는 호출한 쪽의 contextvar(fetch_scheduler.batch 등)를 그대로 물려받습니다.
+    """
+    tickers = list(tickers)
+    total = len(tickers)
+    results = [None] * total
+    workers = max(1, min(max_workers or SCAN_MAX_WORKERS, total or 1))
+
+    # 워커 1개면 기존 직렬 루프와 동일하게 동작
+    if workers == 1:
+        for i, ticker in enumerate(tickers):
+            results[i] = analyze_fn(ticker)
+            if on_progress: on_progress(i + 1, total)
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ctx = contextvars.copy_context()
+        futures = {pool.submit(ctx.copy().run, analyze_fn, ticker): i for i, ticker in enumerate(tickers)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress: on_progress(done, total)
+    return results
@@ -0,0 +1,279 @@
+import argparse
+import dataclasses
+import datetime
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from config import data_path
+from trading_calendar import get_calendar
+
+# --- 추천 기록 (SQLite) ---
+# 스냅샷을 계산할 때마다 (거래일, 시장, 종목, 점수, 추천가, 목표가, 채점 규칙 버전) 을 쌓아 두고,
+# 지난 추천과 그 뒤 성과를 다시 스캔하지 않고 조회합니다.
+# 같은 거래일을 다시 계산하면(장중 갱신, '새로 분석') 이전 실행은 지우지 않고 latest=0 으로 내려
+# 기본 조회는 거래일 · 스냅샷마다 마지막 실행만 봅니다.
+# 날짜 / 종목 / 점수 조회가 모두 색인을 타므로 수년치 (수십만 행) 도 수 ms 안에 읽습니다.
+#
+#   python pick_history.py import                          # 기존 스냅샷 파일을 기록으로 옮기기
+#   python pick_history.py query --ticker 005930 --outcomes
+#   python pick_history.py query --profile KOSPI --start 2026-09-01 --min-score 6
+
+# 여러 프로세스(precompute, scan_cli 등)가 같은 파일에 쓸 때 잠금 해제를 기다리는 시간(초)
+BUSY_TIMEOUT = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rules (
+    version TEXT PRIMARY KEY, params TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY, profile TEXT NOT NULL, market TEXT NOT NULL, session TEXT NOT NULL,
+    computed_at TEXT NOT NULL, rule_version TEXT NOT NULL, picks INTEGER NOT NULL, failed INTEGER NOT NULL,
+    latest INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_session ON runs (profile, session, latest);
+CREATE TABLE IF NOT EXISTS picks (
+    run_id INTEGER NOT NULL, rank INTEGER NOT NULL, latest INTEGER NOT NULL,
+    session TEXT NOT NULL, profile TEXT NOT NULL, market TEXT NOT NULL,
+    ticker TEXT NOT NULL, name TEXT, score INTEGER NOT NULL, price REAL NOT NULL, target REAL NOT NULL,
+    PRIMARY KEY (run_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS picks_date ON picks (latest, session, profile);
+CREATE INDEX IF NOT EXISTS picks_ticker ON picks (ticker, latest, session);
+CREATE INDEX IF NOT EXISTS picks_score ON picks (latest, score, session);
+"""
+
+COLUMNS = ["session", "profile", "market", "rank", "ticker", "name", "score", "price", "target",
+           "rule_version", "computed_at"]
+
+
+def rule_version(rule):
+    """채점 규칙 파라미터의 짧은 해시. 규칙을 바꾸면 버전이 달라져 전후 추천을 구분할 수 있습니다."""
+    params = json.dumps(dataclasses.asdict(rule), sort_keys=True)
+    return hashlib.sha1(params.encode()).hexdigest()[:10]
+
+
+def profile_market(profile):
+    """스냅샷 이름 -> 시장 (KOSPI-new -> KOSPI)."""
+    return profile.split("-")[0]
+
+
+def store_market(market):
+    """시장 -> OHLCV 저장소 시장 키."""
+    return "US" if market == "US" else "KRX"
+
+
+class PickHistory:
+    def __init__(self, path=None):
+        self.path = path or data_path("history.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def record(self, profile, snap, rule):
+        """save_snapshot 결과 하나를 실행 1건으로 기록하고 run_id 를 돌려줍니다."""
+        market = profile_market(profile)
+        version = rule_version(rule)
+        picks = snap["picks"]
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO rules VALUES (?,?)",
+                               (version, json.dumps(dataclasses.asdict(rule), sort_keys=True)))
+            old = [r[0] for r in self._conn.execute(
+                "SELECT run_id FROM runs WHERE profile=? AND session=? AND latest=1", (profile, snap["session"]))]
+            if old:
+                marks = ",".join("?" * len(old))
+                self._conn.execute(f"UPDATE runs SET latest=0 WHERE run_id IN ({marks})", old)
+                self._conn.execute(f"UPDATE picks SET latest=0 WHERE run_id IN ({marks})", old)
+            run_id = self._conn.execute(
+                "INSERT INTO runs (profile, market, session, computed_at, rule_version, picks, failed, latest) "
+                "VALUES (?,?,?,?,?,?,?,1)",
+                (profile, market, snap["session"], snap["computed_at"], version, len(picks),
+                 len(snap.get("failed", ())))).lastrowid
+            self._conn.executemany(
+                "INSERT INTO picks VALUES (?,?,1,?,?,?,?,?,?,?,?)",
+                [(run_id, i, snap["session"], profile, market, str(p["ticker"]), p.get("name"), int(p["score"]),
+                  float(p["price"]), float(p["target"])) for i, p in enumerate(picks)])
+        return run_id
+
+    def has_run(self, profile, computed_at):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM runs WHERE profile=? AND computed_at=?",
+                                      (profile, computed_at)).fetchone() is not None
+
+    def query(self, start=None, end=None, profiles=None, ticker=None, min_score=None, limit=1000, all_runs=False):
+        """지난 추천 (최근 거래일, 순위 순). all_runs=True 면 같은 거래일의 이전 실행까지."""
+        where, params = [], []
+        if not all_runs:
+            where.append("p.latest=1")
+        if start:
+            where.append("p.session >= ?")
+            params.append(str(start))
+        if end:
+            where.append("p.session <= ?")
+            params.append(str(end))
+        if profiles:
+            where.append(f"p.profile IN ({','.join('?' * len(profiles))})")
+            params.extend(profiles)
+        if ticker:
+            where.append("p.ticker = ?")
+            params.append(ticker)
+        if min_score is not None:
+            where.append("p.score >= ?")
+            params.append(int(min_score))
+        sql = ("SELECT p.session, p.profile, p.market, p.rank, p.ticker, p.name, p.score, p.price, p.target, "
+               "r.rule_version, r.computed_at FROM picks p JOIN runs r ON r.run_id = p.run_id "
+               f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+               "ORDER BY p.session DESC, p.profile, r.run_id DESC, p.rank LIMIT ?")
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, int(limit))).fetchall()
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def runs(self, profile=None, limit=30):
+        """최근 실행 목록 (거래일, 계산 시각, 추천/실패 수, 규칙 버전)."""
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT run_id, profile, session, computed_at, picks, failed, rule_version, latest FROM runs "
+                f"{'WHERE profile=?' if profile else ''} ORDER BY run_id DESC LIMIT ?",
+                self._conn, params=((profile,) if profile else ()) + (int(limit),))
+        return df
+
+    def rules(self):
+        """{규칙 버전: 파라미터 dict}."""
+        with self._lock:
+            return {v: json.loads(p) for v, p in self._conn.execute("SELECT version, params FROM rules")}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_history():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PickHistory()
+        return _default
+
+
+def with_outcomes(df, store=None, refresh=False):
+    """query() 결과에 추천 뒤 성과 열을 붙입니다 (로컬 OHLCV 저장소 기준, 시장별 쿼리 한 번).
+
+    last_close: 추천 거래일 이후 마지막 종가, return: 추천가 대비 수익률(%),
+    hit_target: 이후 고가가 목표가에 닿았는지, days: 이후 거래일 수,
+    missing: 거래일 달력상 마감된 거래일 중 저장소에 봉이 없는 날 수 (0 이 아니면 성과가 불완전).
+    저장소에는 종목이 스캔 후보였던 날의 봉만 있을 수 있으므로 refresh=True 면 부족한 봉을 먼저 받아 채웁니다 (네트워크).
+    """
+    from ohlcv_store import get_store
+    store = store or get_store()
+    out = df.copy()
+    out["last_close"], out["return"], out["hit_target"], out["days"] = float("nan"), float("nan"), False, 0
+    out["missing"] = 0
+    if out.empty:
+        return out
+    today = datetime.date.today().isoformat()
+    for market, group in out.groupby(out["market"].map(store_market)):
+        tickers = list(dict.fromkeys(group["ticker"]))
+        start = group["session"].min()
+        if refresh:
+            store.ensure_many(market, tickers, start, today)
+        frames = store.read_many(market, tickers, start, today)
+        cal = get_calendar("NYSE" if market == "US" else "KRX")
+        last_done = cal.latest_completed_session()
+        expected = {}   # 추천 거래일 -> 그 뒤 마감된 거래일들
+        for i, row in group.iterrows():
+            session = row["session"]
+            if session not in expected:
+                first = datetime.date.fromisoformat(session) + datetime.timedelta(days=1)
+                expected[session] = pd.DatetimeIndex(cal.sessions(first, last_done))
+            bars = frames.get(row["ticker"])
+            after = bars[bars.index > pd.Timestamp(session)] if bars is not None else None
+            out.at[i, "missing"] = len(expected[session].difference(after.index)) if after is not None \
+                else len(expected[session])
+            if after is None or after.empty:
+                continue
+            last = float(after["close"].iloc[-1])
+            out.at[i, "last_close"] = last
+            out.at[i, "return"] = (last / row["price"] - 1) * 100
+            out.at[i, "hit_target"] = bool(after["high"].max() >= row["target"])
+            out.at[i, "days"] = len(after)
+    return out
+
+
+def import_snapshots(history=None, log=print):
+    """data/snapshots 의 스냅샷 파일 중 아직 기록에 없는 것을 옮깁니다 (기록 기능 이전 계산분)."""
+    from snapshots import PROFILES
+    history = history or get_history()
+    for path in sorted(glob.glob(data_path("snapshots", "*.json"))):
+        profile = os.path.basename(path)[:-len(".json")]
+        if profile not in PROFILES:
+            continue
+        with open(path, encoding="utf-8") as f:
+            snap = json.load(f)
+        if history.has_run(profile, snap["computed_at"]):
+            continue
+        history.record(profile, snap, PROFILES[profile][1])
+        log(f"{profile}: {snap['session']} {len(snap['picks'])}개")
+
+
+def render_history(profiles, key, us=False):
+    """지난 추천 기록 표 (기간 / 종목 / 최소 점수 필터, 이후 성과 포함)."""
+    import streamlit as st
+    with st.expander("📜 지난 추천 기록", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        days = col1.selectbox("기간", [7, 30, 90, 365, 3650], index=1, key=f"{key}-days",
+                              format_func=lambda d: f"최근 {d}일" if d < 3650 else "전체")
+        ticker = col2.text_input("종목 코드 / 티커", key=f"{key}-ticker").strip().upper()
+        min_score = col3.slider("최소 점수", 0, 8, 0, key=f"{key}-score")
+        refresh = st.checkbox("최신 시세로 성과 갱신 (느림)", key=f"{key}-refresh")
+        start = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+        df = get_history().query(start=start, profiles=profiles, ticker=ticker or None, min_score=min_score or None)
+        if df.empty:
+            st.info("해당 조건의 추천 기록이 없습니다.")
+            return
+        df = with_outcomes(df, refresh=refresh)
+        money = "${:,.2f}" if us else "{:,.0f}"
+        table = pd.DataFrame({
+            "거래일": df["session"], "구분": df["profile"], "종목": df["ticker"], "종목명": df["name"],
+            "점수": df["score"], "추천가": df["price"].map(money.format), "목표가": df["target"].map(money.format),
+            "최근 종가": df["last_close"].map(lambda v: "" if pd.isna(v) else money.format(v)),
+            "수익률(%)": df["return"].round(2), "목표 도달": df["hit_target"], "경과 거래일": df["days"],
+            "규칙": df["rule_version"],
+        })
+        st.caption(f"{len(table)}건 (최근 거래일 순)")
+        incomplete = int((df["missing"] > 0).sum())
+        if incomplete:
+            table["성과"] = df["missing"].map(lambda n: f"⚠ {n}일 봉 없음" if n else "")
+            st.caption(f"⚠ {incomplete}건은 로컬 시세에 빠진 거래일이 있어 최근 종가/수익률/목표 도달이 불완전합니다. "
+                       f"'최신 시세로 성과 갱신' 을 켜면 채웁니다.")
+        st.dataframe(table, hide_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="추천 기록 조회 / 가져오기")
+    parser.add_argument("command", choices=["import", "query", "runs"])
+    parser.add_argument("--profile", action="append", help="스냅샷 이름 (여러 번 지정 가능)")
+    parser.add_argument("--ticker")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--outcomes", action="store_true", help="추천 이후 성과 (로컬 저장소 기준)")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_snapshots()
+    elif args.command == "runs":
+        print(get_history().runs(args.profile[0] if args.profile else None, args.limit).to_string(index=False))
+    else:
+        df = get_history().query(args.start, args.end, args.profile, args.ticker and args.ticker.upper(),
+                                 args.min_score, args.limit)
+        if args.outcomes:
+            df = with_outcomes(df)
+        print(df.to_string(index=False) if not df.empty else "기록 없음")
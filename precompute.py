@@ -0,0 +1,111 @@
+import argparse
+import datetime
+import os
+import threading
+import time
+
+from snapshots import PROFILES, compute_snapshot, load_snapshot
+from trading_calendar import get_calendar
+
+# --- 장 마감 후 추천종목 사전 계산 ---
+# 각 거래소 마감(+종가 확정 여유) 후 한 번 스캔을 돌려 스냅샷을 저장합니다.
+# intraday_minutes 를 주면 장중에도 그 간격으로 갱신합니다.
+# 앱 안에서는 그 앱이 보여주는 스냅샷만 계산합니다 (app.py 가 미국 전 종목을 스캔하지 않도록).
+# 계산에 실패한 스냅샷은 매 확인마다 다시 시도하지 않고 RETRY_MINUTES 간격을 늘려 가며 다시 시도합니다.
+#
+#   python precompute.py                     # 상주 실행 (마감 후 1회)
+#   python precompute.py --intraday-minutes 5
+#   python precompute.py --once              # 지금 한 번만 계산 (cron 용)
+
+SETTLE = datetime.timedelta(minutes=10)   # 마감 후 종가 확정 대기
+POLL_SECONDS = 60
+RETRY_MINUTES = (5, 15, 60)   # 연속 실패 횟수별 재시도 대기(분). 마지막 값에서 멈춤
+# 앱 안에서 도는 사전 계산의 장중 갱신 간격(분). 0 이면 마감 후 1회만.
+INTRADAY_MINUTES = int(os.environ.get("MAGIC_PRECOMPUTE_INTRADAY", "0")) or None
+# 앱 안에서 도는 사전 계산이 첫 화면의 임포트/조회와 겹치지 않도록 처음 확인까지 기다리는 시간(초)
+STARTUP_DELAY = float(os.environ.get("MAGIC_PRECOMPUTE_DELAY", "15"))
+
+
+def due(name, intraday_minutes=None, now=None):
+    """스냅샷 name 을 지금 다시 계산해야 하는지."""
+    cal = get_calendar(PROFILES[name][0])
+    now = cal.local_now(now)
+    snap = load_snapshot(name)
+    if snap is None:
+        return True
+    computed_at = datetime.datetime.fromisoformat(snap["computed_at"])
+    last_close = cal.last_close(now)
+    # 마감 후 확정 시각 이후에 아직 계산하지 않았으면
+    if now >= last_close + SETTLE and computed_at < last_close + SETTLE:
+        return True
+    if intraday_minutes and cal.is_open(now):
+        return now - computed_at >= datetime.timedelta(minutes=intraday_minutes)
+    return False
+
+
+def run_once(names=None, log=print):
+    """계산하고 실패한 스냅샷 이름 목록을 돌려줍니다."""
+    errors = []
+    for name in names or PROFILES:
+        started = time.perf_counter()
+        try:
+            snap = compute_snapshot(name)
+            failed = f", 조회 실패 {len(snap['failed'])}" if snap.get("failed") else ""
+            log(f"[precompute] {name}: {len(snap['picks'])}개{failed} ({time.perf_counter() - started:.1f}s)")
+        except Exception as e:
+            log(f"[precompute] {name} 실패: {e}")
+            errors.append(name)
+    return errors
+
+
+def run_forever(intraday_minutes=None, names=None, stop=None, log=print, delay=0):
+    stop = stop or threading.Event()
+    if stop.wait(delay):
+        return
+    failures = {}   # 이름 -> (연속 실패 횟수, 다시 시도할 시각)
+    while not stop.is_set():
+        now = time.monotonic()
+        pending = [n for n in names or PROFILES
+                   if failures.get(n, (0, now))[1] <= now and due(n, intraday_minutes)]
+        if pending:
+            errors = run_once(pending, log)
+            for name in pending:
+                if name in errors:
+                    count = failures.get(name, (0, 0))[0] + 1
+                    wait = RETRY_MINUTES[min(count, len(RETRY_MINUTES)) - 1] * 60
+                    failures[name] = (count, time.monotonic() + wait)
+                    log(f"[precompute] {name}: {wait // 60:.0f}분 뒤 다시 시도")
+                else:
+                    failures.pop(name, None)
+        stop.wait(POLL_SECONDS)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_background(names, intraday_minutes=INTRADAY_MINUTES):
+    """Streamlit 프로세스 안에서 사전 계산 스레드를 한 번만 띄웁니다 (세션 수와 무관).
+    names: 그 앱이 보여주는 스냅샷 이름들 (PROFILES 의 키)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_forever, kwargs={"names": list(names),
+                                                                   "intraday_minutes": intraday_minutes,
+                                                                   "log": lambda msg: None,
+                                                                   "delay": STARTUP_DELAY},
+                                       name="precompute", daemon=True)
+            _worker.start()
+    return _worker
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI 추천종목 사전 계산")
+    parser.add_argument("--once", action="store_true", help="지금 한 번만 계산하고 종료")
+    parser.add_argument("--intraday-minutes", type=int, default=None, help="장중 갱신 간격(분)")
+    parser.add_argument("names", nargs="*", help=f"계산할 스냅샷 (기본: 전체 {', '.join(PROFILES)})")
+    args = parser.parse_args()
+    if args.once:
+        run_once(args.names or None)
+    else:
+        run_forever(args.intraday_minutes, args.names or None)
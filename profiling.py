@@ -0,0 +1,189 @@
+import bisect
+import functools
+import hmac
+import json
+import os
+import threading
+import time
+
+from config import data_path
+
+# --- 성능 계측 ---
+# 조회/채점/렌더링 구간마다 걸린 시간을 로그 눈금 히스토그램으로, 캐시 적중을 횟수로 메모리에 모읍니다.
+# 꺼져 있으면 (기본) 감싼 함수는 전역 플래그 하나만 확인하고 바로 원래 함수를 부릅니다.
+# 켜는 법: 환경 변수 MAGIC_PROFILE=1, 또는 운영자가 정한 MAGIC_ADMIN_TOKEN 을 앱 주소에 ?admin=<토큰> 으로 붙여 관리자 패널에서 켜기.
+# 패널은 프로세스 전체 계측을 켜고 끄며 서버에 파일을 쓰므로, 둘 다 없으면 누구에게도 보이지 않습니다.
+#
+#   python profiling.py data/profiles/20261017-2130.json    # 저장한 계측 결과 보기
+
+ENABLED = os.environ.get("MAGIC_PROFILE") == "1"
+ADMIN_TOKEN = os.environ.get("MAGIC_ADMIN_TOKEN", "")   # 비어 있으면 ?admin= 으로는 패널을 열 수 없음
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)   # 마지막 칸은 그 이상
+
+
+class Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, q):
+        """q 분위가 들어 있는 칸의 상한 (ms, 마지막 칸이면 최대값)."""
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return 0.0
+
+    def summary(self):
+        return {"count": self.count, "avg_ms": round(self.total / self.count, 2) if self.count else 0.0,
+                "p50_ms": self.percentile(0.5), "p95_ms": self.percentile(0.95), "max_ms": round(self.max, 2),
+                "total_s": round(self.total / 1000, 3), "buckets": list(self.buckets)}
+
+
+_timings = {}
+_counters = {}   # 이름 -> [적중, 실패]
+_lock = threading.Lock()
+_started = time.time()
+
+
+def record(name, ms):
+    with _lock:
+        hist = _timings.get(name)
+        if hist is None:
+            hist = _timings[name] = Histogram()
+        hist.add(ms)
+
+
+def hit(name, found):
+    """캐시 등의 적중(found=True)/실패를 셉니다."""
+    if not ENABLED:
+        return
+    with _lock:
+        counts = _counters.setdefault(name, [0, 0])
+        counts[0 if found else 1] += 1
+
+
+def timed(name):
+    """함수 실행 시간을 name 으로 기록하는 데코레이터 (예외로 끝나도 기록)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorator
+
+
+class span:
+    """with span("render.picks"): ... 구간 시간 기록."""
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter() if ENABLED else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.started is not None:
+            record(self.name, (time.perf_counter() - self.started) * 1000)
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def reset():
+    global _started
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _started = time.time()
+
+
+def snapshot():
+    """지금까지의 계측 결과 (내보내기/패널용 dict). 공유 캐시와 제공자 스케줄러 통계도 함께."""
+    from fetch_scheduler import stats as provider_stats
+    from market_cache import cache
+    with _lock:
+        timings = {name: hist.summary() for name, hist in sorted(_timings.items())}
+        counters = {name: {"hits": h, "misses": m, "hit_rate": round(h / (h + m), 3) if h + m else 0.0}
+                    for name, (h, m) in sorted(_counters.items())}
+    return {"enabled": ENABLED, "since": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_started)),
+            "buckets_ms": list(BUCKETS_MS), "timings": timings,
+            "caches": {**counters, "market_cache": cache.stats()}, "providers": provider_stats()}
+
+
+def export(path=None):
+    """계측 결과를 JSON 으로 저장하고 경로를 돌려줍니다 (기본: data/profiles/<시각>.json)."""
+    path = path or data_path("profiles", f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=1)
+    return path
+
+
+def _table(snap):
+    rows = [{"구간": name, "횟수": t["count"], "평균(ms)": t["avg_ms"], "p50(ms)": t["p50_ms"],
+             "p95(ms)": t["p95_ms"], "최대(ms)": t["max_ms"], "합계(s)": t["total_s"]}
+            for name, t in snap["timings"].items()]
+    return sorted(rows, key=lambda r: -r["합계(s)"])
+
+
+def is_admin(token):
+    """?admin= 값이 MAGIC_ADMIN_TOKEN 과 같은지 (토큰을 정하지 않았으면 항상 False)."""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(str(token or "").encode(), ADMIN_TOKEN.encode())
+
+
+def render_panel():
+    """MAGIC_PROFILE=1 로 띄웠거나 ?admin=<MAGIC_ADMIN_TOKEN> 일 때만 화면 맨 아래에 계측 패널을 그립니다.
+    ENABLED 는 패널에서 켤 수 있으므로 보일지 말지는 시작할 때의 환경 변수로 정합니다."""
+    import streamlit as st
+    if os.environ.get("MAGIC_PROFILE") != "1" and not is_admin(st.query_params.get("admin")):
+        return
+    with st.expander("⏱ 성능 계측 (관리자)", expanded=False):
+        on = st.toggle("계측 켜기 (프로세스 전체)", value=ENABLED, key="profiling-on")
+        if on != ENABLED:
+            enable(on)
+        snap = snapshot()
+        st.caption(f"{snap['since']} 부터 · 히스토그램 칸 상한(ms): {', '.join(map(str, BUCKETS_MS))}")
+        if snap["timings"]:
+            st.dataframe(_table(snap), hide_index=True)
+        else:
+            st.info("아직 기록이 없습니다. 계측을 켠 뒤 화면을 다시 실행하세요.")
+        st.json({"caches": snap["caches"], "providers": snap["providers"]}, expanded=False)
+        col1, col2 = st.columns(2)
+        if col1.button("파일로 내보내기", key="profiling-export"):
+            st.success(f"저장: {export()}")
+        if col2.button("초기화", key="profiling-reset"):
+            reset()
+
+
+if __name__ == "__main__":
+    import sys
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            snap = json.load(f)
+        print(f"{path} ({snap['since']} 부터)")
+        for row in _table(snap):
+            print(f"  {row['구간']:<32} {row['횟수']:7d}회  평균 {row['평균(ms)']:9.2f}ms  "
+                  f"p95 ≤{row['p95(ms)']:>7}ms  합계 {row['합계(s)']:8.3f}s")
+        for name, c in snap["caches"].items():
+            print(f"  [캐시] {name:<25} 적중률 {c['hit_rate']:.1%} ({c['hits']}/{c['hits'] + c['misses']})")
@@ -0,0 +1,123 @@
+import math
+import time
+from html import escape
+
+import streamlit as st
+
+from profiling import span
+
+# --- 목록 렌더링 ---
+# 추천 종목 / 거래 TOP 순위 / 관심 종목 목록 / 지수 카드를 행마다 st.markdown 으로 보내지 않고
+# 전체를 HTML 조각 하나로 만들어 한 번에 보냅니다 (프론트엔드 갱신 1회).
+# 행은 한 줄 HTML 로 만들어 마크다운 들여쓰기/빈 줄 해석에 걸리지 않게 합니다.
+
+PAGE_SIZE = 30   # 이보다 많으면 페이지로 나눠 보여줌
+LIST_BOX = '<div style="background: white; border-radius: 12px; overflow: hidden; border: 1px solid #E5E8EB;">{}</div>'
+
+
+def _signed(rate):
+    return f"{'+' if rate > 0 else ''}{rate:.2f}%"
+
+
+def pick_row(p, us=False):
+    color_class = "up" if p['rate'] > 0 else "down"
+    code = escape(str(p['ticker']))   # 미국 종목도 회사명과 함께 티커를 보여줌
+    price = f"${p['price']:,.2f}" if us else f"{p['price']:,}"
+    target = f"${p['target']:,.2f}" if us else f"{p['target']:,}"
+    return (
+        f'<div class="stock-row">'
+        f'<div class="stock-info-main">'
+        f'<span class="stock-name">{escape(str(p["name"]))}</span>'
+        f'<span class="stock-code">{code} | <b style="color:#0052CC">SCORE {p["score"]}</b></span>'
+        f'</div>'
+        f'<div class="stock-price-area">'
+        f'<div class="current-price {color_class}">{price}</div>'
+        f'<div class="price-change {color_class}">{_signed(p["rate"])}</div>'
+        f'<div style="font-size:11px; color:#34C759; margin-top:2px;">Target: {target}</div>'
+        f'</div>'
+        f'</div>'
+    )
+
+
+def picks_html(picks, us=False):
+    """추천 리스트 전체 HTML (목록 상자 포함)."""
+    return LIST_BOX.format("".join(pick_row(p, us) for p in picks))
+
+
+def top_nav_html(now):
+    """상단 네비게이션 (브랜드 + 시계). now: 표시할 시각 (datetime)."""
+    return (
+        f'<div class="top-nav">'
+        f'<div class="brand-name">📊 매직스톡 Ai</div>'
+        f'<div id="live-clock-text" class="live-clock">{now.strftime("%Y.%m.%d %H:%M:%S")}</div>'
+        f'</div>'
+    )
+
+
+def stale_note(since):
+    """원격 조회가 실패해 마지막 정상값을 보여줄 때 붙이는 표시. since: 값을 받아 온 시각(epoch 초) 또는 None."""
+    if since is None:
+        return ""
+    return (f'<div style="font-size:11px; color:#F59F00; margin-top:2px;">'
+            f'⏱ 지연 · {time.strftime("%m/%d %H:%M", time.localtime(since))} 기준</div>')
+
+
+def index_card_html(name, val, chg, rt, stale=None):
+    """지수 카드 (국내/미국 공통). stale: 마지막 정상값을 받아 온 시각이면 '지연' 표시."""
+    color_class = "up" if chg > 0 else "down"
+    sign = "+" if chg > 0 else ""
+    return (
+        f'<div class="index-card">'
+        f'<div class="index-name">{escape(str(name))}</div>'
+        f'<div class="index-value">{val:,.2f}</div>'
+        f'<div class="index-change {color_class}">{sign}{chg:,.2f} ({sign}{rt:.2f}%)</div>'
+        f'{stale_note(stale)}'
+        f'</div>'
+    )
+
+
+def volume_rank_rows(rows):
+    """거래 TOP 순위 행별 HTML 목록 (실시간 갱신은 바뀐 행만 다시 보냄). rows: (종목명, 거래량) 반복 가능 객체."""
+    return [
+        f'<div style="display:flex; justify-content:space-between; padding: 10px 5px; border-bottom: 1px solid #E5E8EB;">'
+        f'<span style="font-size:14px; font-weight:500;">{escape(str(name))}</span>'
+        f'<span style="font-size:14px; color:#6B7684;">{int(volume) // 10000:,}만</span>'
+        f'</div>'
+        for name, volume in rows]
+
+
+def volume_rank_html(rows):
+    """거래 TOP 순위. rows: (종목명, 거래량) 반복 가능 객체."""
+    return "".join(volume_rank_rows(rows))
+
+
+def watch_list_rows(quotes):
+    """미국 관심 종목 행별 HTML 목록. quotes: (종목, 현재가, 전일대비, 등락률) 반복 가능 객체."""
+    return [
+        f'<div style="display:flex; justify-content:space-between; padding: 15px 5px; border-bottom: 1px solid #E5E8EB;">'
+        f'<span style="font-size:14px; font-weight:600;">{escape(str(ticker))}</span>'
+        f'<span style="font-size:14px; color:{"#E52E2E" if chg > 0 else "#0055FF"}; font-weight:700;">${curr:.2f} ({rt:.2f}%)</span>'
+        f'</div>'
+        for ticker, curr, chg, rt in quotes]
+
+
+def watch_list_html(quotes):
+    """미국 관심 종목. quotes: (종목, 현재가, 전일대비, 등락률) 반복 가능 객체."""
+    return "".join(watch_list_rows(quotes))
+
+
+def paginate(items, key, page_size=PAGE_SIZE):
+    """items 가 page_size 보다 많으면 페이지 선택 위젯을 그리고 현재 페이지 항목만 돌려줍니다."""
+    pages = math.ceil(len(items) / page_size)
+    if pages <= 1:
+        return items
+    page = st.number_input(f"페이지 (전체 {len(items)}개, {pages}쪽)", min_value=1, max_value=pages,
+                           value=1, step=1, key=key)
+    start = (int(page) - 1) * page_size
+    return items[start:start + page_size]
+
+
+def render_picks(picks, key, us=False, page_size=PAGE_SIZE):
+    """추천 리스트를 (필요하면 페이지로 나눠) 한 번의 st.markdown 으로 그립니다."""
+    with span("render.picks"):
+        st.markdown(picks_html(paginate(picks, key, page_size), us), unsafe_allow_html=True)
@@ -0,0 +1,177 @@
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from config import data_path
+from fetch_scheduler import batch
+from indicators import KRX_RULE, NEWSTOCK_RULE, US_RULE, frame_indicators, score_frame
+
+# --- 헤드리스 스캐너 (cron / 서버용) ---
+# 브라우저 없이 analyze_stock / analyze_us_stock 규칙으로 시장 전체를 채점합니다.
+# 종목을 샤드로 나눠 프로세스 풀에 보내고, 각 프로세스는 샤드 안에서 스레드로 동시에 조회합니다.
+# 점수순 추천과 종목별 지표 값을 JSON / CSV / Parquet 으로 저장합니다.
+#
+#   python scan_cli.py KOSPI KOSDAQ US                    # 앱과 같은 후보(거래량 상위 20)
+#   python scan_cli.py KOSPI KOSDAQ --all -p 8 -o data/scans/krx.parquet
+#   python scan_cli.py US --picks-only -o -                # 표준 출력으로 JSON
+
+MARKETS = ("KOSPI", "KOSDAQ", "US")
+RULES = {"krx": KRX_RULE, "new": NEWSTOCK_RULE, "us": US_RULE}
+FORMATS = ("json", "csv", "parquet")
+SHARDS_PER_PROCESS = 4   # 느린 샤드 하나가 전체를 붙잡지 않도록 프로세스보다 잘게 나눔
+
+
+def _row(ticker, df, rule, close, low, volume):
+    values = frame_indicators(df, rule, close, low, volume)
+    closes = df[close]
+    rate = (closes.iloc[-1] / closes.iloc[-2] - 1) * 100 if len(closes) > 1 else math.nan
+    return {"ticker": ticker, "score": score_frame(df, rule, close, low, volume),
+            "price": values["close"], "rate": float(rate), **values, "error": None}
+
+
+def _krx_row(ticker, date, rule):
+    from scanner import krx_window
+    try:
+        return _row(ticker, krx_window(ticker, date), rule, "종가", "저가", "거래량")
+    except Exception as e:
+        return {"ticker": ticker, "score": -1, "error": str(e)}
+
+
+def _us_row(ticker, rule):
+    from ohlcv_store import us_history
+    try:
+        return _row(ticker, us_history(ticker), rule, "Close", "Low", "Volume")
+    except Exception as e:
+        return {"ticker": ticker, "score": -1, "error": str(e)}
+
+
+_shared = False
+
+
+def _share_limits(processes):
+    """자식 프로세스에서 한 번만: 제공자 속도 제한을 프로세스 수로 나눠 전체 합이 한 프로세스와 같게."""
+    global _shared
+    if processes > 1 and not _shared:
+        from fetch_scheduler import share
+        share(processes)
+        _shared = True
+
+
+@batch()   # 회로가 열려도 종목을 바로 실패시키지 않고 회복을 기다림
+def scan_shard(market, tickers, date, rule, threads=None, processes=1):
+    """프로세스 하나가 맡는 샤드. 종목별 결과 dict 리스트 (입력 순서)."""
+    from ohlcv_store import get_store, us_window
+    from parallel_scan import run_scan
+    _share_limits(processes)
+    if market == "US":
+        get_store().ensure_many("US", tickers, *us_window())   # 샤드 단위 다중 종목 요청
+        return run_scan(tickers, lambda t: _us_row(t, rule), threads)
+    return run_scan(tickers, lambda t: _krx_row(t, date, rule), threads)
+
+
+def universe(market, date, limit=20, all_tickers=False, tickers=None):
+    """스캔 대상 종목. 국내는 앱과 같은 1차 필터 + 거래량 상위 limit (all_tickers 면 전 종목)."""
+    if tickers:
+        return list(tickers)
+    if market == "US":
+        from us_universe import universe as us_universe
+        return us_universe()   # S&P 500 + NASDAQ-100 (목록이 없으면 인기 종목 20개)
+    from scanner import krx_candidates
+    return list(krx_candidates(market, date, None if all_tickers else limit, prefilter=not all_tickers).index)
+
+
+def _shards(tickers, n):
+    size = max(1, math.ceil(len(tickers) / n))
+    return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+
+def scan_market(market, date=None, rule=None, limit=20, all_tickers=False, tickers=None,
+                processes=None, threads=None, log=None):
+    """시장 하나를 프로세스 풀로 채점해 점수 내림차순 DataFrame 으로 돌려줍니다."""
+    from name_index import krx_name, us_name
+    from trading_calendar import KRX
+    rule = rule or (US_RULE if market == "US" else KRX_RULE)
+    date = date or KRX.latest_session().strftime("%Y%m%d")
+    tickers = universe(market, date, limit, all_tickers, tickers)
+    processes = max(1, min(processes or os.cpu_count() or 1, len(tickers) or 1))
+
+    rows = []
+    shards = _shards(tickers, processes * SHARDS_PER_PROCESS)
+    if processes == 1:
+        for shard in shards:
+            rows.extend(scan_shard(market, shard, date, rule, threads))
+    else:
+        # spawn: 부모의 SQLite 연결/스레드 상태를 자식에게 복제하지 않음
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=ctx) as pool:
+            futures = [pool.submit(scan_shard, market, shard, date, rule, threads, processes) for shard in shards]
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows.extend(future.result())
+                if log: log(f"[{market}] {done}/{len(shards)} 샤드")
+
+    df = pd.DataFrame(rows, columns=["ticker", "score", "price", "rate", "close", "bb_low", "prev_bb_low",
+                                     "sma", "rsi", "volume", "vol_mean", "bars", "error"])
+    df.insert(0, "market", market)
+    names = us_name if market == "US" else krx_name
+    df.insert(2, "name", [names(t) for t in df["ticker"]])
+    df["pick"] = df["score"] >= rule.cutoff
+    df["target"] = df["price"] * 1.05
+    if market != "US":
+        df["target"] = df["target"].floordiv(1)   # 앱과 같이 원 단위 절사
+    df = df.sort_values(["score", "volume"], ascending=False, kind="stable").reset_index(drop=True)
+    df.insert(1, "rank", range(1, len(df) + 1))
+    return df
+
+
+def write(df, out, fmt=None):
+    """out 확장자(또는 fmt)에 맞춰 저장합니다. out 이 '-' 면 표준 출력 (json/csv)."""
+    fmt = fmt or (os.path.splitext(out)[1].lstrip(".").lower() if out != "-" else "json")
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {fmt} ({', '.join(FORMATS)})")
+    if out == "-":
+        if fmt == "parquet":
+            raise ValueError("parquet 은 파일로만 저장할 수 있습니다")
+        out = sys.stdout
+    elif os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    if fmt == "json":
+        df.to_json(out, orient="records", force_ascii=False, indent=1)
+    elif fmt == "csv":
+        df.to_csv(out, index=False, encoding="utf-8-sig")   # 엑셀에서 한글이 깨지지 않도록 BOM
+    else:
+        df.to_parquet(out, index=False)   # pyarrow 또는 fastparquet 필요
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="헤드리스 AI 추천종목 스캐너")
+    parser.add_argument("markets", nargs="*", default=list(MARKETS), choices=MARKETS, metavar="MARKET",
+                        help=f"스캔할 시장 (기본: {' '.join(MARKETS)})")
+    parser.add_argument("--date", default=None, help="국내 기준일 YYYYMMDD (기본: 최근 거래일)")
+    parser.add_argument("--rule", default=None, choices=list(RULES), help="채점 규칙 (기본: 국내 krx, 미국 us)")
+    parser.add_argument("--limit", type=int, default=20, help="국내 후보 수 (거래량 상위)")
+    parser.add_argument("--all", action="store_true", help="국내 1차 필터 없이 전 종목")
+    parser.add_argument("--tickers", nargs="+", default=None, help="종목을 직접 지정 (시장 1개일 때)")
+    parser.add_argument("-p", "--processes", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("-t", "--threads", type=int, default=None, help="프로세스당 동시 조회 수")
+    parser.add_argument("-o", "--out", default=None, help="저장 경로 (.json/.csv/.parquet, '-' 는 표준 출력)")
+    parser.add_argument("-f", "--format", default=None, choices=FORMATS)
+    parser.add_argument("--picks-only", action="store_true", help="추천 편입 종목만 저장")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    log = lambda msg: print(msg, file=sys.stderr)
+    frames = [scan_market(m, args.date, RULES[args.rule] if args.rule else None, args.limit, args.all,
+                          args.tickers, args.processes, args.threads, log) for m in args.markets]
+    result = pd.concat(frames, ignore_index=True)
+    if args.picks_only:
+        result = result[result["pick"]]
+    out = args.out or data_path("scans", f"{time.strftime('%Y%m%d-%H%M')}.{args.format or 'json'}")
+    write(result, out, args.format)
+    log(f"{len(result)}개 종목 ({int(result['pick'].sum())}개 추천, 조회 실패 {int((result['score'] < 0).sum())}) "
+        f"-> {out} ({time.perf_counter() - started:.1f}s)")
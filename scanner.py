@@ -0,0 +1,178 @@
+import contextvars
+import hashlib
+import json
+import threading
+from fetch_scheduler import batch, call
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import data_path
+from indicators import KRX_RULE, US_RULE, panel_from_frames, score_frame, score_panel
+from live_indicators import LiveBook
+from market_cache import market_cached
+from name_index import krx_name, update_krx, us_name
+from ohlcv_store import get_store, krx_ohlcv, us_history, us_window
+from parallel_scan import run_scan
+from profiling import timed
+from trading_calendar import KRX
+
+# --- AI 추천종목 스캔 ---
+# Streamlit 화면과 분리된 스캔 로직. 앱, 사전 계산 작업, CLI 가 모두 이 함수들을 씁니다.
+
+ANALYSIS_SESSIONS = 41  # 분석에 쓰는 일봉 수 (기존 달력 60일 ≈ 41 거래일)
+
+US_CHUNK = 100   # 미국 스캔 묶음 크기 (us_batch.BATCH_SIZE 와 같게: 묶음당 다중 종목 요청 1회)
+US_FETCH_WORKERS = 4   # 동시에 받는 묶음 수 (yfinance 스케줄러 동시 호출 수와 같게)
+US_TICKERS = ['AAPL', 'NVDA', 'TSLA', 'MSFT', 'AMZN', 'GOOGL', 'META', 'AMD', 'INTC', 'QQQ', 'SPY', 'SOXL', 'TQQQ', 'COIN', 'PLTR', 'IONQ', 'JOBY', 'NFLX', 'DIS', 'KO']
+
+
+_books = {}
+_books_lock = threading.Lock()
+
+
+def live_book(rule=KRX_RULE):
+    """국내 채점 규칙별 장중 채점 상태 (프로세스당 하나, 체크포인트 data/live/krx-<규칙 해시>.json)."""
+    with _books_lock:
+        if rule not in _books:
+            digest = hashlib.sha1(json.dumps(rule.__dict__, sort_keys=True).encode()).hexdigest()[:8]
+            _books[rule] = LiveBook(rule, data_path("live", f"krx-{digest}.json"))
+        return _books[rule]
+
+
+def krx_window(ticker, today):
+    """analyze_stock 이 채점하는 최근 ANALYSIS_SESSIONS 거래일 일봉 (로컬 저장소, 부족한 봉만 조회)."""
+    start = KRX.sessions_back(ANALYSIS_SESSIONS - 1, today).strftime("%Y%m%d")  # 정확한 거래일 수 기준
+    return krx_ohlcv(ticker, start, today)
+
+
+@timed("scan.analyze_stock")
+def analyze_stock(ticker, today, rule=KRX_RULE):
+    """국내 종목 점수. 데이터 부족 0, 조회 실패 -1."""
+    try:
+        df = krx_window(ticker, today)
+        # BB 하단 터치 후 회복 +4, 종가 > SMA5 +1, RSI 구간 +2, 거래량 급증 +1 (score_frame 과 같은 점수)
+        # 장중 재채점은 지난 봉이 그대로면 당일 봉만 반영 (live_indicators.LiveBook)
+        return live_book(rule).score(ticker, df)
+    except Exception:
+        return -1
+
+
+@timed("scan.analyze_us_stock")
+def analyze_us_stock(ticker, rule=US_RULE):
+    """미국 종목 (점수, 현재가, 등락률). 데이터 부족 (0, 0, 0), 조회 실패 (-1, 0, 0)."""
+    try:
+        df = us_history(ticker)  # 로컬 저장소 (약 3개월, 부족한 봉만 조회)
+        if len(df) < rule.min_bars: return 0, 0, 0
+        score = score_frame(df, rule, close="Close", low="Low", volume="Volume")
+        curr_close = df['Close'].iloc[-1]
+        prev_close = df['Close'].iloc[-2]
+        rate = ((curr_close - prev_close) / prev_close) * 100
+        return score, curr_close, rate
+    except Exception:
+        return -1, 0, 0
+
+
+@market_cached("KRX", open_ttl=60)
+def price_change_table(market, date):
+    """전 종목 등락률/거래량 표 (시장 전체 1회 조회). 공유 캐시라 스캔과 종목명 인덱스가 같이 쓰고 재시작 때 되살립니다."""
+    from pykrx import stock
+    return call("pykrx", stock.get_market_price_change_by_ticker, date, date, market=market)
+
+
+@timed("scan.krx_candidates")
+def krx_candidates(market, date, limit=20, prefilter=True):
+    """상승(+0.5% 이상) & 거래량 10만주 초과 종목 중 거래량 상위 limit 개 (시세 DataFrame).
+
+    prefilter=False 면 조건 없이 전 종목, limit=None 이면 개수 제한 없음.
+    """
+    df_base = price_change_table(market, date)
+    if '종목명' in df_base: update_krx(df_base['종목명'], market)  # 받은 김에 종목명 인덱스 갱신
+    filtered = df_base[(df_base['등락률'] >= 0.5) & (df_base['거래량'] > 100000)] if prefilter else df_base
+    filtered = filtered.sort_values('거래량', ascending=False)
+    return filtered.head(limit) if limit else filtered
+
+
+@batch()   # 회로가 열려도 종목을 바로 실패시키지 않고 회복을 기다림
+def scan_krx(market, date=None, rule=KRX_RULE, limit=20, on_progress=None, max_workers=None, failed=None):
+    """국내 시장 스캔. 점수 내림차순 추천 리스트를 돌려줍니다.
+
+    failed 에 리스트를 넘기면 재시도 후에도 조회에 실패한 종목을 담아 줍니다 (순위에서 빠진 종목).
+    """
+    date = date or KRX.latest_session().strftime("%Y%m%d")
+    filtered = krx_candidates(market, date, limit)
+    # 종목별 조회/채점을 워커 풀에서 동시에 실행 (결과는 입력 순서 유지)
+    tickers = list(filtered.index)
+    scores = run_scan(tickers, lambda t: analyze_stock(t, date, rule), max_workers, on_progress)
+    try:
+        live_book(rule).save()   # 다음 장중 갱신/재시작이 이어서 쓰도록
+    except OSError:
+        pass
+
+    picks = []
+    for ticker, score in zip(tickers, scores):
+        if score < 0 and failed is not None: failed.append(ticker)
+        if score >= rule.cutoff:
+            price = filtered.loc[ticker, '종가']
+            picks.append({
+                'ticker': ticker, 'name': krx_name(ticker),
+                'price': int(price), 'rate': float(filtered.loc[ticker, '등락률']),
+                'score': int(score), 'target': int(price * 1.05)
+            })
+    return sorted(picks, key=lambda x: x['score'], reverse=True)
+
+
+@batch()
+def scan_us(tickers=None, rule=US_RULE, on_progress=None, max_workers=None, failed=None,
+            on_partial=None, chunk_size=US_CHUNK):
+    """미국 종목 스캔. 점수 내림차순 추천 리스트를 돌려줍니다. failed 는 scan_krx 와 같습니다.
+
+    chunk_size 종목씩 묶어 부족한 일봉을 다중 종목 요청으로 동시에 받고(최대 US_FETCH_WORKERS 묶음),
+    받은 묶음부터 저장소에서 한 번에 읽어 배열로 채점합니다 (analyze_us_stock 과 같은 점수).
+    묶음이 끝날 때마다 on_progress(완료 종목 수, 전체) / on_partial(지금까지의 추천 리스트, 완료 종목 수, 전체)
+    를 호출 스레드에서 부릅니다. max_workers 는 묶음 안 종목별 조회 스레드 수입니다.
+    """
+    tickers = list(tickers or US_TICKERS)
+    total = len(tickers)
+    store = get_store()
+    start, end = us_window()
+    chunks = [tickers[lo:lo + chunk_size] for lo in range(0, total, chunk_size)]
+    picks, done = [], 0
+    with ThreadPoolExecutor(max_workers=min(US_FETCH_WORKERS, len(chunks) or 1)) as pool:
+        ctx = contextvars.copy_context()   # batch() 를 묶음 조회 스레드로 넘김
+        futures = {pool.submit(ctx.copy().run, store.ensure_many, "US", chunk, start, end, max_workers): chunk
+                   for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            chunk_failed = set(future.result())
+            for ticker, score, price, rate in _score_us_chunk(store, chunk, start, end, rule, chunk_failed):
+                if score < 0 and failed is not None: failed.append(ticker)
+                if score >= rule.cutoff:
+                    picks.append({
+                        'ticker': ticker, 'name': us_name(ticker),
+                        'price': float(price), 'rate': float(rate),
+                        'score': int(score), 'target': float(price) * 1.05
+                    })
+            done += len(chunk)
+            picks.sort(key=lambda x: x['score'], reverse=True)
+            if on_progress: on_progress(done, total)
+            if on_partial: on_partial(list(picks), done, total)
+    order = {t: i for i, t in enumerate(tickers)}   # 같은 점수는 입력 순서 (묶음 도착 순서와 무관하게)
+    return sorted(picks, key=lambda x: (-x['score'], order[x['ticker']]))
+
+
+def _score_us_chunk(store, chunk, start, end, rule, chunk_failed):
+    """묶음 하나를 쿼리 한 번 + score_panel 로 채점. (종목, 점수, 현재가, 등락률) 을 입력 순서로."""
+    frames = {t: df for t, df in store.read_many("US", chunk, start, end).items() if t not in chunk_failed}
+    names, (close, low, volume) = panel_from_frames(frames, ["close", "low", "volume"])
+    scores = dict(zip(names, score_panel(close, low, volume, rule))) if names else {}
+    rows = []
+    for ticker in chunk:
+        if ticker in chunk_failed:
+            rows.append((ticker, -1, 0, 0))
+            continue
+        closes = frames[ticker]["close"] if ticker in frames else ()
+        if len(closes) < rule.min_bars:
+            rows.append((ticker, 0, 0, 0))
+            continue
+        curr_close, prev_close = closes.iloc[-1], closes.iloc[-2]
+        rows.append((ticker, scores[ticker], curr_close, (curr_close - prev_close) / prev_close * 100))
+    return rows
@@ -0,0 +1,99 @@
+import datetime
+import json
+import os
+import threading
+
+from config import data_path
+from indicators import KRX_RULE, NEWSTOCK_RULE, US_RULE
+from pick_history import get_history
+from scanner import scan_krx, scan_us
+from trading_calendar import get_calendar, korea
+from us_universe import universe as us_universe
+
+# --- 추천종목 스냅샷 ---
+# 장 마감 후(또는 장중 주기적으로) 계산한 추천 리스트를 파일로 저장해 두고,
+# 버튼을 누르면 스캔 없이 바로 읽어 보여줍니다. 계산할 때마다 추천 기록(pick_history)에도 쌓습니다.
+# 같은 스냅샷을 사전 계산 스레드와 버튼(또는 여러 세션)이 동시에 계산하지 않도록, 나중에 온 쪽은 기다렸다가 그 결과를 씁니다.
+
+# 스냅샷 이름 -> (거래소, 채점 규칙, 스캔 함수)
+PROFILES = {
+    "KOSPI": ("KRX", KRX_RULE, lambda date, rule, **kw: scan_krx("KOSPI", date, rule, limit=20, **kw)),
+    "KOSDAQ": ("KRX", KRX_RULE, lambda date, rule, **kw: scan_krx("KOSDAQ", date, rule, limit=20, **kw)),
+    # new-stock.py: RSI 30~60, BB 1.02 터치, 상위 30개
+    "KOSPI-new": ("KRX", NEWSTOCK_RULE, lambda date, rule, **kw: scan_krx("KOSPI", date, rule, limit=30, **kw)),
+    "KOSDAQ-new": ("KRX", NEWSTOCK_RULE, lambda date, rule, **kw: scan_krx("KOSDAQ", date, rule, limit=30, **kw)),
+    # S&P 500 + NASDAQ-100 구성 종목 전체 (목록이 없으면 인기 종목 20개)
+    "US": ("NYSE", US_RULE, lambda date, rule, **kw: scan_us(us_universe(), rule=rule, **kw)),
+}
+
+
+def snapshot_path(name):
+    return data_path("snapshots", f"{name}.json")
+
+
+def save_snapshot(name, session, picks, failed=()):
+    snap = {
+        "name": name,
+        "session": session,
+        "computed_at": datetime.datetime.now(korea).isoformat(timespec="seconds"),
+        "picks": picks,
+        "failed": list(failed),   # 조회 실패로 채점하지 못한 종목
+    }
+    path = snapshot_path(name)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snap, f, ensure_ascii=False)
+    os.replace(tmp, path)   # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 원자적 교체
+    return snap
+
+
+def load_snapshot(name):
+    try:
+        with open(snapshot_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_compute_locks = {name: threading.Lock() for name in PROFILES}
+_computed = {}   # 스냅샷 이름 -> 마지막으로 계산을 마친 스냅샷 (기다린 요청이 받아 감)
+
+
+def compute_snapshot(name, on_progress=None, on_partial=None):
+    """지금 스캔을 실행하고 스냅샷으로 저장합니다 (추천 기록 DB 에도 남김).
+    on_partial 은 묶음 단위로 중간 결과를 내는 스캔(US)만 씁니다.
+    같은 이름을 다른 스레드가 계산 중이면 끝나기를 기다려 그 결과를 돌려줍니다 (실패했으면 직접 계산)."""
+    lock = _compute_locks[name]
+    waited = not lock.acquire(blocking=False)
+    if waited:
+        before = _computed.get(name)
+        lock.acquire()
+    try:
+        if waited and _computed.get(name) is not before:
+            return _computed[name]
+        exchange, rule, scan = PROFILES[name]
+        session = get_calendar(exchange).latest_session()
+        failed = []
+        extra = {"on_partial": on_partial} if on_partial else {}
+        picks = scan(session.strftime("%Y%m%d"), rule, on_progress=on_progress, failed=failed, **extra)
+        snap = save_snapshot(name, session.isoformat(), picks, failed)
+        get_history().record(name, snap, rule)
+        _computed[name] = snap
+        return snap
+    finally:
+        lock.release()
+
+
+def is_current(snap, exchange):
+    """스냅샷이 마지막으로 마감된 거래일 이후 기준인지."""
+    if snap is None:
+        return False
+    return snap["session"] >= get_calendar(exchange).latest_completed_session().isoformat()
+
+
+def latest_picks(name, on_progress=None, on_partial=None):
+    """버튼용: 최신 스냅샷을 바로 돌려주고, 없거나 지난 거래일 것이면 그때만 계산합니다."""
+    snap = load_snapshot(name)
+    if not is_current(snap, PROFILES[name][0]):
+        snap = compute_snapshot(name, on_progress, on_partial)
+    return snap
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+# --- 앱 시작 시간 리포트 ---
+# 새 파이썬 프로세스에서 앱을 (Streamlit AppTest 로) 탭별로 실행하며
+# 실행마다 걸린 시간과, 그 실행 중 처음 임포트된 모듈의 임포트 시간(-X importtime)을 보여줍니다.
+# 네트워크 시간은 빼고 보도록 MAGIC_OFFLINE=1 로 원격 조회를 즉시 실패시킵니다 (네트워크는 benchmark.py).
+#
+#   python startup_report.py                 # app_us.py: 국내 탭 첫 실행 -> 재실행 -> 미국 탭 -> 재실행
+#   python startup_report.py app.py --json
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+US_TAB = "🇺🇸 미국주식 (US)"
+MARKER = "### startup-report "
+HEAVY_MS = 30   # 이보다 오래 걸린 패키지만 표시
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _child(app):
+    """자식 프로세스: 단계마다 표식을 stderr 에 남기고 결과를 stdout JSON 으로."""
+    def mark(label):
+        sys.stderr.write(f"{MARKER}{label}\n")
+        sys.stderr.flush()
+
+    mark("streamlit")
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(app, default_timeout=300)
+    steps = [("국내 탭 첫 실행", None), ("국내 탭 재실행", None)]
+    if os.path.basename(app) == "app_us.py":
+        steps += [("미국 탭 전환", US_TAB), ("미국 탭 재실행", None)]
+    runs = []
+    for label, tab in steps:
+        mark(label)
+        started = time.perf_counter()
+        if tab:
+            at.radio[0].set_value(tab)
+        at.run()
+        runs.append({"step": label, "seconds": round(time.perf_counter() - started, 3),
+                     "errors": [str(e.value)[:120] for e in at.exception]})
+    mark("end")
+    print(json.dumps(runs, ensure_ascii=False))
+
+
+def parse_importtime(stderr):
+    """{단계: [(모듈, 누적 ms, 깊이), ...]} — 단계 표식 사이에 처음 임포트된 모듈들."""
+    stages, current = {}, None
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            current = line[len(MARKER):]
+            stages[current] = []
+            continue
+        m = _LINE.match(line)
+        if m and current is not None:
+            stages[current].append((m.group(4), int(m.group(2)) / 1000, len(m.group(3)) // 2))
+    return stages
+
+
+def report(app="app_us.py", python=sys.executable):
+    env = dict(os.environ, MAGIC_OFFLINE="1", MAGIC_DATA_DIR=tempfile.mkdtemp(prefix="magic-startup-"),
+               PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run([python, "-X", "importtime", os.path.abspath(__file__), "--child", app],
+                          capture_output=True, text=True, env=env, cwd=ROOT)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr[-2000:])
+    runs = json.loads(proc.stdout.strip().splitlines()[-1])
+    stages = parse_importtime(proc.stderr)
+    for run in runs:
+        imports = stages.get(run["step"], [])
+        run["import_ms"] = round(sum(ms for _, ms, depth in imports if depth == 0))
+        # 패키지 루트별 누적 시간 (바깥 모듈 시간에 안쪽 패키지가 포함되어 합은 겹칩니다)
+        run["modules"] = sorted(((n, round(ms)) for n, ms, _ in imports if "." not in n and ms >= HEAVY_MS),
+                                key=lambda x: -x[1])
+    return {"app": app, "streamlit_ms": round(sum(ms for _, ms, d in stages.get("streamlit", []) if d == 0)),
+            "runs": runs}
+
+
+def _print(result):
+    print(f"{result['app']}  (streamlit 자체 임포트 {result['streamlit_ms']}ms 제외)")
+    for run in result["runs"]:
+        print(f"  {run['step']:<10} {run['seconds']:6.2f}s   임포트 {run['import_ms']:5d}ms"
+              + (f"   오류 {len(run['errors'])}" if run["errors"] else ""))
+        for name, ms in run["modules"]:
+            print(f"      {name:<24} {ms:6d}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="앱 탭별 시작/재실행 시간과 모듈별 임포트 시간")
+    parser.add_argument("app", nargs="?", default="app_us.py")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.app)
+    else:
+        result = report(args.app)
+        print(json.dumps(result, ensure_ascii=False, indent=1)) if args.json else _print(result)
@@ -0,0 +1,223 @@
+import argparse
+import datetime
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backtest import US_LOOKBACK, _shift, candidate_mask, market_prefilter, simulate, windowed_rsi
+from config import data_path
+from indicators import KRX_RULE, NEWSTOCK_RULE, US_RULE, rolling_mean, rolling_std
+from scanner import ANALYSIS_SESSIONS
+
+# --- 채점 규칙 파라미터 스윕 ---
+# BB 기간/배수, RSI 구간, 터치 허용치, 거래량 배수, 편입 점수의 격자를 로컬 저장소 일봉으로 백테스트해
+# 추천 편입 신호의 목표가 도달률 순으로 정리합니다.
+# 격자점마다 score_series 를 다시 돌리지 않고, 격자와 무관한 지표(RSI, SMA, 평균 거래량, 매매 결과, 1차 필터)와
+# BB 기간별 이동평균/표준편차를 한 번만 계산합니다. 계산한 값은 1차 필터를 통과한 (날짜, 종목) 칸만 1차원으로
+# 추려 .npy 로 두고, 워커 프로세스는 np.load(mmap_mode="r") 로 열어 복사 없이 공유합니다.
+# 워커 작업 하나가 (BB 기간, BB 배수, 터치 허용치) 한 조합을 맡아 나머지 격자를 배열 덧셈 몇 번으로 채점합니다.
+#
+#   python sweep.py --market KRX --matrix                        # 기본 격자 (약 1,500점), 최근 5년
+#   python sweep.py --rsi-high 50,55,60 --touch-tol 1,1.02 --cutoff 4,5 --workers 8
+#   python sweep.py --market US --rule us --top 30
+
+GRID = {
+    "bb_window": (15, 20, 25),
+    "bb_dev": (1.5, 2.0, 2.5),
+    "rsi_low": (25, 30, 35),
+    "rsi_high": (50, 60),
+    "touch_tol": (1.0, 1.01, 1.02),
+    "vol_mult": (1.0, 1.1, 1.3),
+    "cutoff": (4, 5, 6),
+}
+MIN_SIGNALS = 30   # 이보다 신호가 적은 조합은 순위에서 뺌 (우연한 고적중 방지)
+MAX_SCORE = 8      # BB 4 + SMA 1 + RSI 2 + 거래량 1
+
+_shared = {}   # 워커 프로세스: 이름 -> 메모리 맵 배열
+
+
+def with_rule(grid, rule):
+    """격자 각 축에 기준 규칙 값을 넣어 현재 규칙도 항상 함께 평가되게 합니다."""
+    return {k: tuple(sorted(set(v) | {getattr(rule, k)})) for k, v in grid.items()}
+
+
+def grid_size(grid):
+    return int(np.prod([len(v) for v in grid.values()]))
+
+
+def prepare(close, high, low, volume, grid, rule=KRX_RULE, lookback=ANALYSIS_SESSIONS,
+            horizon=10, target=0.05, stop=0.03, top_n=None, prefilter=True):
+    """격자와 무관한 배열을 계산해 평가 대상 칸만 남긴 1차원 배열 dict 로 돌려줍니다."""
+    close, high, low, volume = (np.asarray(a, dtype=float) for a in (close, high, low, volume))
+    outcome, ret, holding = simulate(close, high, low, horizon, target, stop)
+    valid = ~np.isnan(ret) & ~np.isnan(close)
+    if prefilter:
+        valid &= candidate_mask(close, volume, top_n=top_n)
+    # score_series 와 같은 조건: 구간 안 유효 봉이 min_bars 미만이면 0 점
+    bars = np.minimum(np.cumsum(~np.isnan(close), axis=0), lookback)
+    vol_mean = _shift(rolling_mean(volume, rule.vol_window - 1))
+
+    with np.errstate(invalid="ignore"):
+        arrays = {
+            "close": close[valid], "low": low[valid], "prev_low": _shift(low)[valid],
+            "volume": volume[valid], "vol_mean": vol_mean[valid],
+            "rsi": windowed_rsi(close, rule.rsi_window, lookback)[valid],
+            "sma_hit": (close > rolling_mean(close, rule.sma_window))[valid],
+            "bars_ok": (bars >= rule.min_bars)[valid],
+            "outcome": outcome[valid].astype(np.int8), "ret": ret[valid], "holding": holding[valid],
+        }
+    for window in grid["bb_window"]:
+        mean, std = rolling_mean(close, window), rolling_std(close, window)
+        arrays[f"mean{window}"], arrays[f"std{window}"] = mean[valid], std[valid]
+        arrays[f"prev_mean{window}"], arrays[f"prev_std{window}"] = _shift(mean)[valid], _shift(std)[valid]
+    return arrays
+
+
+def _init(folder):
+    for name in os.listdir(folder):
+        _shared[name[:-len(".npy")]] = np.load(os.path.join(folder, name), mmap_mode="r")
+
+
+def _evaluate(window, dev, tol, grid, vol_mean_positive):
+    """(BB 기간, 배수, 터치 허용치) 하나에 대해 나머지 격자 전체의 편입 성과 행 리스트."""
+    a = _shared
+    bb_low = a[f"mean{window}"] - dev * a[f"std{window}"]
+    prev_bb = a[f"prev_mean{window}"] - dev * a[f"prev_std{window}"]
+    with np.errstate(invalid="ignore"):
+        touched = (a["prev_low"] <= prev_bb * tol) | (a["low"] <= bb_low * tol)
+        base = np.where(touched & (a["close"] > bb_low), 4, 0) + a["sma_hit"]
+        rsi = np.asarray(a["rsi"])
+        bands = {(lo, hi): 2 * ((rsi >= lo) & (rsi <= hi)) for lo in grid["rsi_low"] for hi in grid["rsi_high"]}
+        vol_hits = {}
+        for mult in grid["vol_mult"]:
+            hit = a["volume"] > a["vol_mean"] * mult
+            if vol_mean_positive:
+                hit &= a["vol_mean"] > 0
+            vol_hits[mult] = hit
+    bars_ok = np.asarray(a["bars_ok"])
+    outcome = np.asarray(a["outcome"])
+    weights = {"win": outcome == 1, "loss": outcome == -1, "ret": np.asarray(a["ret"]),
+               "holding": np.asarray(a["holding"])}
+
+    rows = []
+    for (lo, hi), band in bands.items():
+        for mult, vol_hit in vol_hits.items():
+            score = np.where(bars_ok, base + band + vol_hit, 0)
+            # 점수별 합계를 한 번에 구해 뒤에서부터 누적하면 모든 편입 점수(score >= cutoff)가 나옴
+            sums = {k: np.bincount(score, weights=w, minlength=MAX_SCORE + 1)[::-1].cumsum()[::-1]
+                    for k, w in weights.items()}
+            counts = np.bincount(score, minlength=MAX_SCORE + 1)[::-1].cumsum()[::-1]
+            for cutoff in grid["cutoff"]:
+                n = int(counts[cutoff])
+                avg = {k: float(v[cutoff] / n) if n else np.nan for k, v in sums.items()}
+                rows.append({
+                    "bb_window": window, "bb_dev": dev, "rsi_low": lo, "rsi_high": hi, "touch_tol": tol,
+                    "vol_mult": mult, "cutoff": cutoff, "signals": n, "hit_rate": avg["win"],
+                    "stop_rate": avg["loss"], "avg_return": avg["ret"], "avg_holding": avg["holding"],
+                })
+    return rows
+
+
+def sweep(close, high, low, volume, grid=GRID, rule=KRX_RULE, lookback=ANALYSIS_SESSIONS, horizon=10,
+          target=0.05, stop=0.03, top_n=None, prefilter=True, workers=None, min_signals=MIN_SIGNALS, log=None):
+    """격자 전체 성과표 (DataFrame). 신호 min_signals 개 이상인 조합을 목표가 도달률 순으로 앞에 둡니다."""
+    grid = with_rule(grid, rule)
+    bad = [c for c in grid["cutoff"] if not 0 <= c <= MAX_SCORE]
+    if bad:
+        raise ValueError(f"편입 점수는 0~{MAX_SCORE} 사이여야 합니다: {', '.join(map(str, bad))}")
+    started = time.perf_counter()
+    arrays = prepare(close, high, low, volume, grid, rule, lookback, horizon, target, stop, top_n, prefilter)
+    if log: log(f"공통 지표 {len(arrays['close']):,}칸 ({time.perf_counter() - started:.1f}s)")
+
+    tasks = list(itertools.product(grid["bb_window"], grid["bb_dev"], grid["touch_tol"]))
+    folder = tempfile.mkdtemp(prefix="sweep-")
+    rows = []
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(folder, f"{name}.npy"), arr)
+        del arrays
+        workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+        if workers == 1:   # 워커 1개면 프로세스를 띄우지 않고 이 프로세스에서
+            _init(folder)
+            for task in tasks:
+                rows.extend(_evaluate(*task, grid, rule.vol_mean_positive))
+            _shared.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(folder,)) as pool:
+                futures = [pool.submit(_evaluate, *task, grid, rule.vol_mean_positive) for task in tasks]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    rows.extend(future.result())
+                    if log and done % max(1, len(tasks) // 10) == 0:
+                        log(f"  {done}/{len(tasks)} ({time.perf_counter() - started:.1f}s)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    report = pd.DataFrame(rows)
+    report["ranked"] = report["signals"] >= min_signals
+    report["current"] = np.logical_and.reduce([report[k] == getattr(rule, k) for k in grid])
+    report = report.sort_values(["ranked", "hit_rate", "signals"], ascending=False, ignore_index=True)
+    report.attrs["seconds"] = time.perf_counter() - started
+    return report
+
+
+def _values(text, cast):
+    return tuple(cast(v) for v in text.split(","))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="채점 규칙 파라미터 스윕 (로컬 저장소 일봉 사용)")
+    parser.add_argument("--market", default="KRX", choices=["KRX", "US"])
+    parser.add_argument("--rule", default=None, choices=["krx", "new", "us"], help="격자 밖 파라미터와 비교 기준")
+    parser.add_argument("--start", default=(datetime.date.today() - datetime.timedelta(days=5 * 365)).isoformat())
+    parser.add_argument("--end", default="2100-01-01")
+    parser.add_argument("--horizon", type=int, default=10, help="보유 기간 (거래일)")
+    parser.add_argument("--target", type=float, default=0.05)
+    parser.add_argument("--stop", type=float, default=0.03)
+    parser.add_argument("--top-n", type=int, default=None, help="날짜별 거래량 상위 N 개만 (앱: 20)")
+    parser.add_argument("--prefilter", action=argparse.BooleanOptionalAction, default=None,
+                        help="등락률/거래량 1차 필터 (기본: 스캔과 같게 KRX 켬, US 끔)")
+    parser.add_argument("--matrix", action="store_true", help="SQLite 대신 메모리 맵 행렬(ohlcv_matrix)에서 읽기")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--min-signals", type=int, default=MIN_SIGNALS)
+    parser.add_argument("--top", type=int, default=20, help="출력할 상위 조합 수")
+    casts = {"bb_window": int, "cutoff": int}
+    for key, default in GRID.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", default=",".join(map(str, default)),
+                            help=f"쉼표로 구분 (기본 {','.join(map(str, default))})")
+    args = parser.parse_args()
+
+    from backtest import load_panels
+    from ohlcv_store import get_store
+    rule = {"krx": KRX_RULE, "new": NEWSTOCK_RULE, "us": US_RULE}[args.rule or ("us" if args.market == "US" else "krx")]
+    grid = {key: _values(getattr(args, key), casts.get(key, float)) for key in GRID}
+    if not all(0 <= c <= MAX_SCORE for c in grid["cutoff"]):
+        parser.error(f"--cutoff 는 0~{MAX_SCORE} 사이여야 합니다")
+    if args.matrix:
+        from ohlcv_matrix import open_matrix
+        matrix = open_matrix(args.market)
+        if matrix is None:
+            parser.error(f"{args.market} 행렬 빌드가 없습니다 (python ohlcv_matrix.py build {args.market})")
+        tickers = matrix.tickers
+        (close, high, low, volume), dates = matrix.panels(tickers, args.start, args.end)
+    else:
+        tickers = get_store().tickers(args.market)
+        (close, high, low, volume), dates = load_panels(args.market, tickers, args.start, args.end)
+    prefilter = market_prefilter(args.market) if args.prefilter is None else args.prefilter
+    print(f"{args.market} {len(tickers)}종목 x {len(dates)}일, 격자 {grid_size(with_rule(grid, rule)):,}점, "
+          f"보유 {args.horizon}일, 목표 +{args.target:.0%}, 손절 -{args.stop:.0%}, 1차 필터 {'켬' if prefilter else '끔'}")
+    report = sweep(close, high, low, volume, grid, rule, US_LOOKBACK if args.market == "US" else ANALYSIS_SESSIONS,
+                   args.horizon, args.target, args.stop, args.top_n, prefilter, args.workers,
+                   args.min_signals, log=print)
+    path = data_path("sweeps", f"{args.market}-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+    report.to_csv(path, index=False)
+    fmt = lambda v: f"{v:.4f}"
+    print(f"{report.attrs['seconds']:.1f}s, 전체 결과: {path}")
+    print(report[report["ranked"]].head(args.top).drop(columns=["ranked"]).to_string(float_format=fmt))
+    print("현재 규칙:")
+    print(report[report["current"]].drop(columns=["ranked", "current"]).to_string(float_format=fmt))
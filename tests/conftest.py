@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소가 패키지가 아니라 최상위 모듈 모음이므로 테스트에서 바로 import 할 수 있게 경로를 추가합니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
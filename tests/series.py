@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import SMAIndicator
+from ta.volatility import BollingerBands
+
+# 테스트용 임의 일봉과 기존 ta 기반 채점 (비교 기준).
+
+
+def ta_score(df, rule):
+    """app.py 의 원래 analyze_stock 규칙을 ta 로 그대로 계산 (rule 의 파라미터만 반영)."""
+    if len(df) < rule.min_bars:
+        return 0
+    bb_low = BollingerBands(close=df["종가"], window=rule.bb_window, window_dev=rule.bb_dev).bollinger_lband()
+    curr_close, curr_low, prev_low = df["종가"].iloc[-1], df["저가"].iloc[-1], df["저가"].iloc[-2]
+    rsi = RSIIndicator(close=df["종가"], window=rule.rsi_window).rsi().iloc[-1]
+    sma = SMAIndicator(close=df["종가"], window=rule.sma_window).sma_indicator().iloc[-1]
+    score = 0
+    if (prev_low <= bb_low.iloc[-2] * rule.touch_tol) or (curr_low <= bb_low.iloc[-1] * rule.touch_tol):
+        if curr_close > bb_low.iloc[-1]: score += 4
+    if curr_close > sma: score += 1
+    if rule.rsi_low <= rsi <= rule.rsi_high: score += 2
+    vol_mean = df["거래량"].iloc[-rule.vol_window:-1].mean()
+    if (vol_mean > 0 or not rule.vol_mean_positive) and df["거래량"].iloc[-1] > vol_mean * rule.vol_mult: score += 1
+    return score
+
+
+def random_frame(rng, n=None):
+    """정수(원화)/실수(달러) 가격, 보합 구간, 하단 터치가 섞인 임의 일봉 n 개 (기본: 25~69 개)."""
+    n = n or int(rng.integers(25, 70))
+    if rng.random() < 0.5:
+        close = np.round(np.cumprod(1 + rng.normal(0, 0.02, n)) * rng.integers(1000, 100000), -1)
+    else:
+        close = np.cumprod(1 + rng.normal(0, 0.02, n)) * rng.uniform(1, 500)
+    kind = rng.random()
+    if kind < 0.3:
+        # 끝쪽 보합 구간 (거래정지, 상한가 등). 실수 가격의 끝자리 오차가 드러나는 값도 포함
+        flat = rng.choice([0.1 + 0.2, 12345.67, 33.33, close[-1]])
+        close[-int(rng.integers(5, 40)):] = flat
+    elif kind < 0.4:
+        close[-1] = close[-2] * 0.9   # 급락 (BB 하단 터치)
+    low = close * (1 - rng.uniform(0, 0.03, n))
+    if kind < 0.3 and rng.random() < 0.5:
+        low[:] = close   # 보합 구간에서 저가 = 종가 = BB 하단
+    volume = rng.integers(0, 10 ** 6, n).astype(float)
+    if rng.random() < 0.1:
+        volume[-20:-1] = 0
+    return pd.DataFrame({"종가": close, "저가": low, "거래량": volume})
@@ -0,0 +1,53 @@
+import importlib
+import threading
+
+import api_server
+from api_server import Api
+
+# 본문/ETag 캐시가 원본 토큰이 바뀔 때만 다시 만들어지는지, 앱 안 서버가 기본으로 꺼져 있는지 확인합니다.
+
+
+class FakeSource:
+    name = "fake"
+
+    def __init__(self):
+        self.version = 1
+        self.built = 0
+
+    def token(self):
+        return self.version
+
+    def entries(self):
+        self.built += 1
+        key = ("app.get_market_data", ("KOSPI",), ())
+        return [(key, 2e9, (2500.0 + self.version, 1.0, 0.04), 1.7e9)]
+
+
+def test_etag_and_rebuild_on_token_change():
+    source = FakeSource()
+    api = Api(source)
+    status, body, etag = api.respond("/indices")
+    assert status == 200 and b"2501.0" in body
+    assert api.respond("/indices", etag) == (304, b"", etag)
+    assert source.built == 1
+    source.version = 2
+    status, body, new_etag = api.respond("/indices", etag)
+    assert status == 200 and b"2502.0" in body and new_etag != etag
+    assert api.respond("/nope")[0] == 404
+
+
+def test_concurrent_requests_are_counted():
+    api = Api(FakeSource())
+    threads = [threading.Thread(target=lambda: [api.respond("/indices") for _ in range(50)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert api.requests == 400
+
+
+def test_start_api_is_opt_in(monkeypatch):
+    monkeypatch.delenv("MAGIC_API_PORT", raising=False)
+    module = importlib.reload(api_server)
+    assert module.API_PORT == 0
+    assert module.start_api() is None   # MAGIC_API_PORT 를 지정하지 않으면 띄우지 않음
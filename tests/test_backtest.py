@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import US_LOOKBACK, market_prefilter, run_backtest, score_series, simulate
+from indicators import KRX_RULE, US_RULE, score_frame, score_panel
+from scanner import ANALYSIS_SESSIONS
+from series import random_frame
+
+# 백테스트의 전 날짜 일괄 채점이 날짜마다 최근 lookback 봉으로 score_frame 을 돌린 것과 같은지 확인합니다.
+
+
+def random_panel(rng, tickers=40, days=120):
+    """(날짜 x 종목) close/low/volume 패널. 상장이 늦은 종목은 앞쪽이 NaN."""
+    close, low, volume = (np.full((days, tickers), np.nan) for _ in range(3))
+    for j in range(tickers):
+        df = random_frame(rng, int(rng.integers(20, days + 1)))
+        n = len(df)
+        close[-n:, j], low[-n:, j], volume[-n:, j] = df["종가"], df["저가"], df["거래량"]
+    return close, low, volume
+
+
+@pytest.mark.parametrize("rule", [KRX_RULE, US_RULE], ids=["krx", "us"])
+def test_score_series_matches_score_frame(rule):
+    rng = np.random.default_rng(5)
+    for _ in range(5):
+        close, low, volume = random_panel(rng)
+        score = score_series(close, low, volume, rule)
+        for j in range(close.shape[1]):
+            listed = ~np.isnan(close[:, j])
+            for t in np.flatnonzero(listed):
+                start = max(np.argmax(listed), t - ANALYSIS_SESSIONS + 1)
+                df = pd.DataFrame({"종가": close[start:t + 1, j], "저가": low[start:t + 1, j],
+                                   "거래량": volume[start:t + 1, j]})
+                assert score[t, j] == score_frame(df, rule), (j, t)
+
+
+def test_us_backtest_counts_the_us_scan_population():
+    """미국 백테스트의 편입 신호 수 = 날짜마다 최근 US_LOOKBACK 봉으로 미국 스캔(score_panel, 1차 필터 없음)이 고른 수."""
+    rng = np.random.default_rng(11)
+    close, low, volume = random_panel(rng, days=150)
+    high = close * 1.03
+    assert market_prefilter("KRX") and not market_prefilter("US")
+    picks = run_backtest(close, high, low, volume, US_RULE, US_LOOKBACK,
+                         prefilter=market_prefilter("US")).attrs["picks"]
+    _, ret, _ = simulate(close, high, low)
+    expected = 0
+    for t in range(len(close)):
+        window = slice(max(0, t - US_LOOKBACK + 1), t + 1)
+        scores = score_panel(close[window], low[window], volume[window], US_RULE)
+        expected += int(((scores >= US_RULE.cutoff) & ~np.isnan(ret[t]) & ~np.isnan(close[t])).sum())
+    assert expected > 0
+    assert picks["signals"] == expected
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from fetch_scheduler import FetchError, ProviderScheduler, batch
+from parallel_scan import run_scan
+
+# 엔드포인트 회로가 열렸을 때: 화면 단건 조회는 바로 실패, 일괄 스캔(batch)은 회복을 기다려 모든 종목을 받음.
+
+
+def flaky(fail_until):
+    """fail_until 시각 전에는 예외를 내는 조회 함수."""
+    def get_ohlcv(ticker):
+        if time.monotonic() < fail_until:
+            raise ConnectionError("down")
+        return ticker
+    return get_ohlcv
+
+
+def scheduler():
+    return ProviderScheduler("test", max_rate=1000, retries=0, breaker_threshold=3, breaker_cooldown=0.2,
+                             breaker_wait=5.0)
+
+
+def trip(s, fn):
+    for _ in range(3):
+        with pytest.raises(FetchError):
+            s.call(fn, "X")
+    assert s.breaker(fn).state == "open"
+
+
+def test_single_lookup_fails_fast_when_open():
+    s = scheduler()
+    fn = flaky(time.monotonic() + 0.1)
+    trip(s, fn)
+    time.sleep(0.1)   # 원격은 이미 회복했지만 쉬는 시간이 남음
+    started = time.monotonic()
+    with pytest.raises(FetchError):
+        s.call(fn, "Y")
+    assert time.monotonic() - started < 0.05
+
+
+def test_batch_waits_for_recovery():
+    s = scheduler()
+    fn = flaky(time.monotonic() + 0.1)
+    trip(s, fn)
+    tickers = [f"T{i}" for i in range(50)]
+    with batch():
+        results = run_scan(tickers, lambda t: s.call(fn, t), max_workers=8)
+    assert results == tickers
+    assert s.breaker(fn).state == "closed"
+
+
+def test_batch_gives_up_after_breaker_wait():
+    s = scheduler()
+    s.breaker_wait = 0.3
+    fn = flaky(time.monotonic() + 60)
+    trip(s, fn)
+    started = time.monotonic()
+    with batch(), pytest.raises(FetchError):
+        s.call(fn, "Y")
+    assert time.monotonic() - started < 1.0
+
+
+def test_batch_flag_does_not_leak_to_other_threads():
+    s = scheduler()
+    fn = flaky(time.monotonic() + 60)
+    trip(s, fn)
+    errors = []
+
+    def interactive():
+        try:
+            s.call(fn, "Y")
+        except FetchError as e:
+            errors.append(e)
+    with batch():
+        t = threading.Thread(target=interactive)   # run_scan 밖의 스레드는 batch 를 물려받지 않음
+        started = time.monotonic()
+        t.start()
+        t.join()
+    assert errors and time.monotonic() - started < 0.1
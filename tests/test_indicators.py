@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import KRX_RULE, NEWSTOCK_RULE, US_RULE, rolling_mean, rolling_std, score_frame
+from series import random_frame, ta_score
+
+# 기존 analyze_stock / analyze_us_stock (ta 기반) 과 벡터 채점 엔진이 같은 점수를 내는지 확인합니다.
+
+
+@pytest.mark.parametrize("rule", [KRX_RULE, NEWSTOCK_RULE, US_RULE], ids=["krx", "newstock", "us"])
+def test_score_frame_matches_ta(rule):
+    rng = np.random.default_rng(2024)
+    mismatches = []
+    for i in range(3000):
+        df = random_frame(rng)
+        got, want = score_frame(df, rule), ta_score(df, rule)
+        if got != want:
+            mismatches.append((i, got, want))
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("value", [0.1 + 0.2, 12345.67, 1 / 3])
+def test_flat_float_window(value):
+    x = np.full(30, value)
+    assert (rolling_mean(x, 20)[19:] == value).all()
+    assert (rolling_std(x, 20)[19:] == 0).all()
+    df = pd.DataFrame({"종가": x, "저가": x, "거래량": np.ones(30)})
+    assert score_frame(df, US_RULE) == ta_score(df, US_RULE)
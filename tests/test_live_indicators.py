@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from ta.momentum import RSIIndicator
+from ta.volatility import BollingerBands
+
+from indicators import KRX_RULE, US_RULE, score_frame
+from live_indicators import LiveBook, LiveScorer, load_checkpoint, save_checkpoint
+from scanner import ANALYSIS_SESSIONS
+from series import random_frame
+
+# 봉 단위 O(1) 갱신(update / revise)이 ta 와 전체 재계산(score_frame)과 같은 값을 내는지 확인합니다.
+
+
+def close_to(a, b):
+    return (np.isnan(a) and np.isnan(b)) or abs(a - b) <= 1e-9 * max(1.0, abs(b))
+
+
+@pytest.mark.parametrize("rule", [KRX_RULE, US_RULE], ids=["krx", "us"])
+def test_stream_matches_ta_and_score_frame(rule):
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        df = random_frame(rng)
+        bb = BollingerBands(close=df["종가"], window=rule.bb_window, window_dev=rule.bb_dev).bollinger_lband()
+        rsi = RSIIndicator(close=df["종가"], window=rule.rsi_window).rsi()
+        scorer = LiveScorer(rule)
+        for t, (c, l, v) in enumerate(zip(df["종가"], df["저가"], df["거래량"])):
+            score = scorer.update(c, l, v)
+            assert close_to(scorer.bb_low, bb.iloc[t])
+            assert close_to(scorer.rsi.value, rsi.iloc[t])
+            assert score == score_frame(df.iloc[:t + 1], rule)
+
+
+def test_revise_matches_final_bar():
+    rng = np.random.default_rng(11)
+    for _ in range(300):
+        df = random_frame(rng)
+        bb = BollingerBands(close=df["종가"], window=20, window_dev=2).bollinger_lband()
+        rsi = RSIIndicator(close=df["종가"], window=14).rsi()
+        scorer = LiveScorer()
+        for t, (c, l, v) in enumerate(zip(df["종가"], df["저가"], df["거래량"])):
+            # 장중: 임시 봉으로 추가한 뒤 두 번 고쳐 최종 봉이 됨
+            scorer.update(c * 1.01, l, v / 2)
+            scorer.revise(c * 0.99, l, v / 3)
+            score = scorer.revise(c, l, v)
+            assert close_to(scorer.bb_low, bb.iloc[t])
+            assert close_to(scorer.rsi.value, rsi.iloc[t])
+            assert score == score_frame(df.iloc[:t + 1])
+
+
+def test_checkpoint_round_trip(tmp_path):
+    rng = np.random.default_rng(3)
+    frames = {f"T{i}": random_frame(rng) for i in range(50)}
+    cut = {t: len(df) // 2 for t, df in frames.items()}
+    scorers = {t: LiveScorer.from_frame(df.iloc[:cut[t]], US_RULE) for t, df in frames.items()}
+    path = str(tmp_path / "live.json")
+    save_checkpoint(scorers, path)
+    restored = load_checkpoint(path)
+    for t, df in frames.items():
+        for c, l, v in zip(*(df[col].iloc[cut[t]:] for col in ("종가", "저가", "거래량"))):
+            assert restored[t].update(c, l, v) == scorers[t].update(c, l, v)
+        assert restored[t].score() == score_frame(df, US_RULE)
+
+
+def intraday_windows(df):
+    """analyze_stock 처럼 날마다 최근 ANALYSIS_SESSIONS 봉 구간. 당일 봉은 장중 임시 값 두 번 뒤 최종 값."""
+    df = df.set_axis(np.arange(len(df)))   # 날짜 대신 봉 번호
+    for t in range(len(df)):
+        window = df.iloc[max(0, t - ANALYSIS_SESSIONS + 1):t + 1]
+        for price, vol in ((1.01, 0.5), (0.99, 0.7), (1.0, 1.0)):
+            tick = window.copy()
+            tick.loc[t, "종가"] *= price
+            tick.loc[t, "거래량"] *= vol
+            yield t, tick
+
+
+def test_live_book_matches_score_frame_and_revises(tmp_path):
+    rng = np.random.default_rng(13)
+    frames = {f"T{i}": random_frame(rng, 70) for i in range(40)}
+    book = LiveBook(KRX_RULE, str(tmp_path / "book.json"))
+    for ticker, df in frames.items():
+        for t, tick in intraday_windows(df.iloc[:60]):
+            assert book.score(ticker, tick) == score_frame(tick), (ticker, t)
+    scored = sum(1 for df in frames.values() for t in range(60) if t + 1 >= KRX_RULE.min_bars)
+    assert book.rebuilt == scored              # 거래일마다 한 번
+    assert book.revised == 2 * scored          # 나머지 장중 갱신은 당일 봉만
+
+    book.save()
+    restored = LiveBook(KRX_RULE, book.path)   # 재시작: 체크포인트에서 이어서
+    assert LiveBook(US_RULE, book.path).entries == {}   # 규칙이 다르면 버림
+    for ticker, df in frames.items():
+        for t, tick in intraday_windows(df):
+            if t >= 59:
+                assert restored.score(ticker, tick) == score_frame(tick), (ticker, t)
+    assert restored.revised > 0
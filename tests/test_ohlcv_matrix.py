@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+import backtest
+import config
+import ohlcv_matrix
+
+# 메모리 맵 행렬(--matrix)과 SQLite 저장소(load_panels)가 빠진 봉까지 같은 패널을 내는지 확인합니다.
+
+
+class FakeStore:
+    """read_panel / tickers / dates 만 있는 저장소. 종목 B 는 중간에 거래정지, D 는 늦게 상장."""
+
+    def __init__(self):
+        rng = np.random.default_rng(1)
+        self.index = pd.bdate_range("2024-01-01", periods=80)
+        self.data = {f: pd.DataFrame(rng.uniform(100, 200, (80, 5)), index=self.index, columns=list("ABCDE"))
+                     for f in ohlcv_matrix.FIELDS}
+        self.data["volume"] = self.data["volume"].round() * 1000
+        for df in self.data.values():
+            df.iloc[10:15, 1] = np.nan
+            df.iloc[:30, 3] = np.nan
+
+    def tickers(self, market):
+        return list("ABCDE")
+
+    def dates(self, market, start, end):
+        return list(self.index)
+
+    def read_panel(self, market, tickers, start, end, field="close"):
+        return self.data[field][tickers]
+
+
+def test_matrix_matches_load_panels(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", str(tmp_path))
+    store = FakeStore()
+    ohlcv_matrix.build("KRX", store=store)
+    tickers = list("ABCDE")
+    (close, high, low, volume), _ = ohlcv_matrix.open_matrix("KRX").panels(tickers)
+    (close2, high2, low2, volume2), _ = backtest.load_panels("KRX", tickers, None, None, store=store)
+    assert np.array_equal(volume, volume2, equal_nan=True)
+    assert np.allclose(close, close2, equal_nan=True)
+    assert np.isnan(volume[10:15, 1]).all()
+    assert (backtest.score_series(close, low, volume) == backtest.score_series(close2, low2, volume2)).all()
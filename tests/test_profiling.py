@@ -0,0 +1,13 @@
+import profiling
+
+# 관리자 패널은 운영자가 정한 토큰으로만 열립니다.
+
+
+def test_admin_requires_configured_token(monkeypatch):
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "")
+    assert not profiling.is_admin("1")
+    assert not profiling.is_admin("")
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "s3cret")
+    assert profiling.is_admin("s3cret")
+    assert not profiling.is_admin("1")
+    assert not profiling.is_admin(None)
@@ -0,0 +1,64 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from backtest import US_LOOKBACK, market_prefilter, run_backtest
+from indicators import KRX_RULE, US_RULE
+from scanner import ANALYSIS_SESSIONS
+from series import random_frame
+from sweep import sweep
+
+# 스윕의 격자점별 편입 성과가 같은 규칙으로 run_backtest 를 돌린 결과와 같은지 확인합니다.
+
+GRID = {
+    "bb_window": (15, 20),
+    "bb_dev": (2.0, 2.5),
+    "rsi_low": (30,),
+    "rsi_high": (50, 60),
+    "touch_tol": (1.0, 1.02),
+    "vol_mult": (1.1, 1.3),
+    "cutoff": (4, 5, 8),
+}
+
+
+def random_panel(rng, tickers=30, days=150):
+    """(날짜 x 종목) close/high/low/volume 패널. 상장이 늦은 종목은 앞쪽이 NaN."""
+    close, high, low, volume = (np.full((days, tickers), np.nan) for _ in range(4))
+    for j in range(tickers):
+        df = random_frame(rng, int(rng.integers(20, days + 1)))
+        n = len(df)
+        close[-n:, j], low[-n:, j], volume[-n:, j] = df["종가"], df["저가"], df["거래량"]
+        high[-n:, j] = df["종가"] * (1 + rng.uniform(0, 0.06, n))
+    return close, high, low, volume
+
+
+@pytest.mark.parametrize("rule, lookback, prefilter", [
+    (KRX_RULE, ANALYSIS_SESSIONS, False),
+    (KRX_RULE, ANALYSIS_SESSIONS, market_prefilter("KRX")),
+    (US_RULE, US_LOOKBACK, market_prefilter("US")),   # CLI --market US 기본값
+], ids=["krx", "krx-prefilter", "us"])
+def test_sweep_matches_run_backtest(rule, lookback, prefilter):
+    rng = np.random.default_rng(23)
+    close, high, low, volume = random_panel(rng)
+    report = sweep(close, high, low, volume, GRID, rule, lookback, prefilter=prefilter, workers=1)
+    assert len(report) == 2 * 2 * 1 * 2 * 2 * 2 * 3
+    assert report["current"].sum() == 1
+    for row in report.itertuples():
+        params = {k: getattr(row, k) for k in GRID}
+        picks = run_backtest(close, high, low, volume, dataclasses.replace(rule, **params), lookback,
+                             prefilter=prefilter).attrs.get("picks")
+        if picks is None:
+            assert row.signals == 0, params
+            continue
+        assert row.signals == picks["signals"], params
+        assert row.hit_rate == pytest.approx(picks["hit_rate"]), params
+        assert row.avg_return == pytest.approx(picks["avg_return"]), params
+        assert row.avg_holding == pytest.approx(picks["avg_holding"]), params
+
+
+@pytest.mark.parametrize("cutoff", [-1, 9])
+def test_sweep_rejects_cutoff_out_of_range(cutoff):
+    close, high, low, volume = random_panel(np.random.default_rng(0), tickers=3, days=40)
+    with pytest.raises(ValueError):
+        sweep(close, high, low, volume, {**GRID, "cutoff": (4, cutoff)}, workers=1)
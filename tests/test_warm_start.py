@@ -0,0 +1,57 @@
+import json
+import os
+import threading
+
+import pytest
+
+import config
+import warm_start
+from api_server import Api, WarmFileSource
+from market_cache import cache
+
+# 앱별 예열 파일이 서로 덮어쓰지 않는지, 따로 띄운 API 가 모든 앱의 파일을 합쳐 읽는지 확인합니다.
+
+KRX_KEY = ("app.get_market_data", ("KOSPI",), ())
+US_KEY = ("app_us.get_us_quotes", (("^GSPC", "AAPL"),), ())
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DATA_DIR", str(tmp_path))
+    cache.clear()
+    yield tmp_path
+    cache.clear()
+
+
+def test_saves_from_different_apps_do_not_clobber():
+    cache.set(KRX_KEY, (2500.0, 10.0, 0.4), 600)
+    warm_start.save(warm_start._path("app"))
+    cache.clear()
+    cache.set(US_KEY, {"^GSPC": (5000.0, 5.0, 0.1), "AAPL": (200.0, -1.0, -0.5)}, 600)
+    warm_start.save(warm_start._path("app_us"))
+
+    assert [os.path.basename(p) for p in warm_start.paths()] == ["app.bin", "app_us.bin"]
+    cache.clear()
+    assert warm_start.restore(warm_start._path("app")) == (1, 0)
+    assert [e[0] for e in cache.dump()] == [KRX_KEY]
+    cache.clear()
+    assert warm_start.restore(warm_start._path("app_us")) == (1, 0)
+    assert [e[0] for e in cache.dump()] == [US_KEY]
+
+    api = Api(WarmFileSource())
+    indices = json.loads(api.respond("/indices")[1])
+    assert set(indices) == {"KOSPI", "^GSPC"}
+    assert set(json.loads(api.respond("/quotes")[1])) == {"AAPL"}
+
+
+def test_concurrent_saves_leave_a_readable_file():
+    for i in range(200):
+        cache.set(("app.get_market_data", (f"K{i}",), ()), (float(i), 0.0, 0.0), 600)
+    path = warm_start._path("app")
+    threads = [threading.Thread(target=lambda: [warm_start.save(path) for _ in range(10)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(warm_start.read(path)["entries"]) == 200
+    assert os.listdir(os.path.dirname(path)) == ["app.bin"]   # 임시 파일이 남지 않음
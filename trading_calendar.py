@@ -0,0 +1,197 @@
+import datetime
+
+import pytz
+
+# --- 거래일 달력 (네트워크 호출 없음) ---
+# KRX / NYSE 휴장일과 장 운영 시간을 미리 넣어 두고 "최근 거래일", "이전 거래일", "N 거래일 전" 을 계산합니다.
+# 휴장일 목록은 매년 말 거래소 공지(다음 해 휴장일)를 보고 추가해야 합니다.
+# 목록이 없는 연도는 주말만 휴장으로 처리합니다.
+
+korea = pytz.timezone("Asia/Seoul")
+new_york = pytz.timezone("America/New_York")
+
+
+def _dates(*values):
+    return frozenset(datetime.date.fromisoformat(v) for v in values)
+
+
+KRX_HOLIDAYS = _dates(
+    # 2023
+    "2023-01-23", "2023-01-24", "2023-03-01", "2023-05-01", "2023-05-05", "2023-05-29", "2023-06-06",
+    "2023-08-15", "2023-09-28", "2023-09-29", "2023-10-02", "2023-10-03", "2023-10-09", "2023-12-25",
+    "2023-12-29",
+    # 2024
+    "2024-01-01", "2024-02-09", "2024-02-12", "2024-03-01", "2024-04-10", "2024-05-01", "2024-05-06",
+    "2024-05-15", "2024-06-06", "2024-08-15", "2024-09-16", "2024-09-17", "2024-09-18", "2024-10-01",
+    "2024-10-03", "2024-10-09", "2024-12-25", "2024-12-31",
+    # 2025
+    "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30", "2025-03-03", "2025-05-01",
+    "2025-05-05", "2025-05-06", "2025-06-03", "2025-06-06", "2025-08-15", "2025-10-03", "2025-10-06",
+    "2025-10-07", "2025-10-08", "2025-10-09", "2025-12-25", "2025-12-31",
+    # 2026
+    "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02", "2026-05-01", "2026-05-05",
+    "2026-05-25", "2026-06-03", "2026-08-17", "2026-09-24", "2026-09-25", "2026-09-28", "2026-10-05",
+    "2026-10-09", "2026-12-25", "2026-12-31",
+    # 2027
+    "2027-01-01", "2027-02-08", "2027-02-09", "2027-03-01", "2027-05-05", "2027-05-13", "2027-08-16",
+    "2027-09-14", "2027-09-15", "2027-09-16", "2027-10-04", "2027-10-11", "2027-12-27", "2027-12-31",
+)
+
+NYSE_HOLIDAYS = _dates(
+    # 2023
+    "2023-01-02", "2023-01-16", "2023-02-20", "2023-04-07", "2023-05-29", "2023-06-19", "2023-07-04",
+    "2023-09-04", "2023-11-23", "2023-12-25",
+    # 2024
+    "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27", "2024-06-19", "2024-07-04",
+    "2024-09-02", "2024-11-28", "2024-12-25",
+    # 2025
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26", "2025-06-19",
+    "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    # 2026
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19", "2026-07-03",
+    "2026-09-07", "2026-11-26", "2026-12-25",
+    # 2027
+    "2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31", "2027-06-18", "2027-07-05",
+    "2027-09-06", "2027-11-25", "2027-12-24",
+)
+
+# 개장/마감 시간이 다른 날: 날짜 -> (개장, 마감)
+KRX_SPECIAL_SESSIONS = {
+    # 연초 첫 거래일 10시 개장
+    datetime.date(2024, 1, 2): (datetime.time(10, 0), datetime.time(15, 30)),
+    datetime.date(2025, 1, 2): (datetime.time(10, 0), datetime.time(15, 30)),
+    datetime.date(2026, 1, 2): (datetime.time(10, 0), datetime.time(15, 30)),
+    datetime.date(2027, 1, 4): (datetime.time(10, 0), datetime.time(15, 30)),
+    # 대학수학능력시험일 1시간 지연
+    datetime.date(2023, 11, 16): (datetime.time(10, 0), datetime.time(16, 30)),
+    datetime.date(2024, 11, 14): (datetime.time(10, 0), datetime.time(16, 30)),
+    datetime.date(2025, 11, 13): (datetime.time(10, 0), datetime.time(16, 30)),
+    datetime.date(2026, 11, 19): (datetime.time(10, 0), datetime.time(16, 30)),
+}
+
+NYSE_SPECIAL_SESSIONS = {
+    # 조기 폐장 (13시)
+    datetime.date(2023, 7, 3): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2023, 11, 24): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2024, 7, 3): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2024, 11, 29): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2024, 12, 24): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2025, 7, 3): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2025, 11, 28): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2025, 12, 24): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2026, 11, 27): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2026, 12, 24): (datetime.time(9, 30), datetime.time(13, 0)),
+    datetime.date(2027, 11, 26): (datetime.time(9, 30), datetime.time(13, 0)),
+}
+
+
+def _as_date(d):
+    """'YYYYMMDD' / 'YYYY-MM-DD' / datetime / date 를 date 로."""
+    if isinstance(d, datetime.datetime):
+        return d.date()
+    if isinstance(d, datetime.date):
+        return d
+    d = str(d)
+    return datetime.datetime.strptime(d[:8], "%Y%m%d").date() if "-" not in d else datetime.date.fromisoformat(d[:10])
+
+
+class TradingCalendar:
+    def __init__(self, name, tz, open_time, close_time, holidays, special_sessions=None):
+        self.name = name
+        self.tz = tz
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = holidays
+        self.special_sessions = special_sessions or {}
+
+    def local_now(self, now=None):
+        """now(없으면 현재)를 거래소 시간대로."""
+        return now.astimezone(self.tz) if now is not None else datetime.datetime.now(self.tz)
+
+    def is_session(self, day):
+        day = _as_date(day)
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session_times(self, day):
+        """해당 거래일의 (개장, 마감) 시각 (거래소 시간대 기준 aware datetime)."""
+        day = _as_date(day)
+        open_t, close_t = self.special_sessions.get(day, (self.open_time, self.close_time))
+        return (self.tz.localize(datetime.datetime.combine(day, open_t)),
+                self.tz.localize(datetime.datetime.combine(day, close_t)))
+
+    def next_session(self, day):
+        day = _as_date(day) + datetime.timedelta(days=1)
+        while not self.is_session(day):
+            day += datetime.timedelta(days=1)
+        return day
+
+    def previous_session(self, day):
+        day = _as_date(day) - datetime.timedelta(days=1)
+        while not self.is_session(day):
+            day -= datetime.timedelta(days=1)
+        return day
+
+    def sessions_back(self, n, day=None):
+        """day(거래일이 아니면 그 이전 거래일)로부터 n 거래일 전 날짜. n=0 이면 기준 거래일 자신."""
+        day = self.latest_session() if day is None else _as_date(day)
+        if not self.is_session(day):
+            day = self.previous_session(day)
+        for _ in range(n):
+            day = self.previous_session(day)
+        return day
+
+    def sessions(self, start, end):
+        """[start, end] 사이의 거래일 리스트."""
+        day, end = _as_date(start), _as_date(end)
+        out = []
+        while day <= end:
+            if self.is_session(day):
+                out.append(day)
+            day += datetime.timedelta(days=1)
+        return out
+
+    def is_open(self, now=None):
+        now = self.local_now(now)
+        if not self.is_session(now.date()):
+            return False
+        opens, closes = self.session_times(now.date())
+        return opens <= now < closes
+
+    def latest_session(self, now=None):
+        """개장한(장중 포함) 가장 최근 거래일. 개장 전이면 전 거래일."""
+        now = self.local_now(now)
+        today = now.date()
+        if self.is_session(today) and now >= self.session_times(today)[0]:
+            return today
+        return self.previous_session(today)
+
+    def latest_completed_session(self, now=None):
+        """마감까지 끝난 가장 최근 거래일."""
+        now = self.local_now(now)
+        today = now.date()
+        if self.is_session(today) and now >= self.session_times(today)[1]:
+            return today
+        return self.previous_session(today)
+
+    def last_close(self, now=None):
+        """가장 최근 마감 시각."""
+        return self.session_times(self.latest_completed_session(now))[1]
+
+    def next_open(self, now=None):
+        """다음 개장 시각 (장중이면 다음 거래일의 개장)."""
+        now = self.local_now(now)
+        today = now.date()
+        if self.is_session(today) and now < self.session_times(today)[0]:
+            return self.session_times(today)[0]
+        return self.session_times(self.next_session(today))[0]
+
+
+KRX = TradingCalendar("KRX", korea, datetime.time(9, 0), datetime.time(15, 30), KRX_HOLIDAYS, KRX_SPECIAL_SESSIONS)
+NYSE = TradingCalendar("NYSE", new_york, datetime.time(9, 30), datetime.time(16, 0), NYSE_HOLIDAYS,
+                       NYSE_SPECIAL_SESSIONS)
+
+CALENDARS = {"KRX": KRX, "NYSE": NYSE, "US": NYSE}
+
+
+def get_calendar(exchange):
+    return CALENDARS[exchange]
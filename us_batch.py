@@ -0,0 +1,57 @@
+import pandas as pd
+
+from fetch_scheduler import call
+
+# --- 미국 종목 일괄 조회 ---
+# yf.download 한 번으로 여러 종목을 받아 종목별 DataFrame 으로 나눕니다.
+
+BATCH_SIZE = 100   # 요청 1회당 최대 종목 수
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def split_frames(df, symbols):
+    """yf.download(group_by='ticker') 결과를 {종목: OHLCV DataFrame} 으로 나눕니다. 데이터 없는 종목은 제외."""
+    frames = {}
+    if df is None or df.empty:
+        return frames
+    for symbol in symbols:
+        if isinstance(df.columns, pd.MultiIndex):
+            if symbol not in df.columns.get_level_values(0):
+                continue
+            sub = df[symbol]
+        else:
+            sub = df
+        sub = sub[[c for c in FIELDS if c in sub.columns]].dropna(subset=["Close"])
+        if not sub.empty:
+            frames[symbol] = sub
+    return frames
+
+
+def download_history(symbols, start=None, end=None, period=None, batch_size=BATCH_SIZE):
+    """여러 종목의 일봉을 batch_size 단위 다중 종목 요청으로 받아 {종목: DataFrame} 으로 돌려줍니다.
+
+    end 는 yfinance 와 같이 해당일 미포함입니다.
+    """
+    import yfinance as yf
+    symbols = list(dict.fromkeys(symbols))
+    frames = {}
+    for i in range(0, len(symbols), batch_size):
+        chunk = symbols[i:i + batch_size]
+        kwargs = {"period": period} if period else {"start": start, "end": end}
+        # yf.download 은 실패를 삼키고 빈 표를 돌려주므로 통째로 비었으면 재시도
+        df = call("yfinance", yf.download, chunk, group_by="ticker", auto_adjust=True, threads=True,
+                  progress=False, multi_level_index=True, retry_if=lambda d: d is None or d.empty, **kwargs)
+        frames.update(split_frames(df, chunk))
+    return frames
+
+
+def latest_quotes(symbols, period="5d"):
+    """{종목: (현재가, 전일대비, 등락률%)}. 최근 두 봉이 없는 종목은 제외."""
+    quotes = {}
+    for symbol, df in download_history(symbols, period=period).items():
+        if len(df) < 2:
+            continue
+        curr, prev = df['Close'].iloc[-1], df['Close'].iloc[-2]
+        change = curr - prev
+        quotes[symbol] = (curr, change, (change / prev) * 100)
+    return quotes
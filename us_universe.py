@@ -0,0 +1,118 @@
+import argparse
+import datetime
+import io
+import json
+import threading
+import urllib.request
+
+from config import data_path
+from fetch_scheduler import call
+
+# --- 미국 스캔 대상 (S&P 500 / NASDAQ-100 구성 종목) ---
+# 지수별 구성 종목과 이름을 로컬 JSON 으로 두고, REFRESH_DAYS 가 지나면 위키백과 표에서 다시 받습니다.
+# 받지 못하면 가지고 있던 목록을 계속 쓰고, 목록이 하나도 없으면 기존 인기 종목(scanner.US_TICKERS)으로 스캔합니다.
+#
+#   python us_universe.py refresh            # 지금 다시 받기
+#   python us_universe.py list NDX
+
+INDEXES = {
+    # 지수 -> (구성 종목 표가 있는 주소, 종목 열, 이름 열)
+    "SP500": ("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies", "Symbol", "Security"),
+    "NDX": ("https://en.wikipedia.org/wiki/Nasdaq-100", "Ticker", "Company"),
+}
+DEFAULT_INDEXES = ("SP500", "NDX")
+REFRESH_DAYS = 30
+USER_AGENT = "Mozilla/5.0 (magic-stock universe refresh)"   # 기본 urllib UA 는 거절됨
+
+_lock = threading.Lock()
+_lists = {}   # 지수 -> {"date": ..., "symbols": {종목: 이름}}
+
+
+def _path(index):
+    return data_path("universe", f"{index}.json")
+
+
+def yahoo_symbol(symbol):
+    """BRK.B -> BRK-B (Yahoo 표기)."""
+    return symbol.strip().replace(".", "-")
+
+
+def _download(url):
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=15) as resp:
+        return resp.read().decode("utf-8")
+
+
+def fetch(index):
+    """위키백과 표에서 {종목: 이름} 을 받습니다 (pandas.read_html, lxml 필요)."""
+    import pandas as pd
+    url, symbol_col, name_col = INDEXES[index]
+    for table in pd.read_html(io.StringIO(call("web", _download, url))):
+        if symbol_col in table.columns and name_col in table.columns:
+            return {yahoo_symbol(str(s)): str(n) for s, n in zip(table[symbol_col], table[name_col])}
+    raise ValueError(f"{index}: 구성 종목 표를 찾지 못했습니다")
+
+
+def refresh(index):
+    """구성 종목을 새로 받아 저장하고 종목명 인덱스에도 넣습니다."""
+    from name_index import update_us
+    symbols = fetch(index)
+    saved = {"date": datetime.date.today().isoformat(), "symbols": symbols}
+    with open(_path(index), "w", encoding="utf-8") as f:
+        json.dump(saved, f, ensure_ascii=False)
+    update_us(symbols)   # 스캔 결과 이름 표시에 .info 조회가 500번 나가지 않도록
+    with _lock:
+        _lists[index] = saved
+    return symbols
+
+
+def _load(index):
+    with _lock:
+        if index in _lists:
+            return _lists[index]
+    try:
+        with open(_path(index), encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    from name_index import update_us
+    update_us(saved["symbols"])   # 다른 프로세스가 받아 둔 목록이어도 이름은 이 프로세스 인덱스에
+    with _lock:
+        _lists[index] = saved
+    return saved
+
+
+def constituents(index, max_age_days=REFRESH_DAYS, refresh_stale=True):
+    """{종목: 이름}. 오래됐으면 다시 받아 보고, 실패하면 가지고 있던 목록 (없으면 빈 dict).
+    refresh_stale=False 면 네트워크 없이 로컬 목록만 (화면 표시용)."""
+    saved = _load(index)
+    age = (datetime.date.today() - datetime.date.fromisoformat(saved["date"])).days if saved else None
+    if refresh_stale and (saved is None or age >= max_age_days):
+        try:
+            return refresh(index)
+        except Exception:
+            pass
+    return saved["symbols"] if saved else {}
+
+
+def universe(indexes=DEFAULT_INDEXES, refresh_stale=True):
+    """여러 지수 구성 종목의 합집합 (처음 나온 순서). 목록이 하나도 없으면 scanner.US_TICKERS."""
+    symbols = {}
+    for index in indexes:
+        symbols.update(constituents(index, refresh_stale=refresh_stale))
+    if not symbols:
+        from scanner import US_TICKERS
+        return list(US_TICKERS)
+    return list(symbols)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="미국 스캔 대상 (지수 구성 종목) 관리")
+    parser.add_argument("command", choices=["refresh", "list"])
+    parser.add_argument("indexes", nargs="*", default=list(DEFAULT_INDEXES), choices=list(INDEXES))
+    args = parser.parse_args()
+    for index in args.indexes:
+        symbols = refresh(index) if args.command == "refresh" else constituents(index)
+        print(f"{index}: {len(symbols)}종목")
+        if args.command == "list":
+            print(" ".join(symbols))
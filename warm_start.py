@@ -0,0 +1,140 @@
+import argparse
+import atexit
+import os
+import glob
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from config import data_path
+from market_cache import cache
+
+# --- 재시작 예열 (warm start) ---
+# 공유 시세 캐시(market_cache: 지수, 거래 순위, 미국 시세, 전 종목 등락률 표)를 주기적으로, 그리고 종료할 때
+# 앱(스크립트)마다 압축 바이너리 파일 하나(data/warm/<앱>.bin)로 저장하고, 같은 앱의 다음 프로세스가 처음 화면을 그릴 때 되살립니다.
+# 앱마다 캐시 키가 달라서(cache_name) 한 파일을 같이 쓰면 마지막에 저장한 앱만 남으므로 파일을 나눕니다.
+# 되살린 값은 거래일 달력으로 만료를 다시 계산해 아직 유효하면 그대로 쓰고,
+# 만료된 값만 첫 요청에 '지연' 표시와 함께 바로 내준 뒤 뒤에서 다시 조회합니다.
+# 일봉(ohlcv_store), 추천 스냅샷, 종목명 인덱스는 원래 디스크에 있으므로 여기 넣지 않습니다.
+#
+#   python warm_start.py info          # 저장된 앱별 예열 파일 내용
+
+SAVE_INTERVAL = float(os.environ.get("MAGIC_WARM_INTERVAL", "300"))   # 바뀐 게 있을 때 저장하는 주기(초)
+MAGIC = b"MWS2"   # 파일 머리 (형식이 바뀌면 올림)
+
+
+_app = None   # start_warm 이 정한 이 프로세스의 앱 이름
+
+
+def app_name():
+    """실행한 스크립트 파일 이름 (app, app_us, new-stock). Streamlit 은 스크립트를 __main__ 으로 실행합니다."""
+    path = getattr(sys.modules.get("__main__"), "__file__", None) or sys.argv[0] or "cache"
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _path(app=None):
+    return data_path("warm", f"{app or _app or app_name()}.bin")
+
+
+def paths():
+    """저장된 앱별 예열 파일 전체 (이름순)."""
+    return sorted(glob.glob(os.path.join(os.path.dirname(_path("cache")), "*.bin")))
+
+
+def save(path=None):
+    """이 프로세스의 캐시 전체를 저장하고 (경로, 항목 수, 바이트) 를 돌려줍니다. 피클할 수 없는 값은 건너뜁니다."""
+    path = path or _path()
+    entries = []
+    for entry in cache.dump():
+        try:
+            entries.append(pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            continue
+    blob = MAGIC + zlib.compress(pickle.dumps({"saved_at": time.time(), "entries": entries},
+                                              protocol=pickle.HIGHEST_PROTOCOL), 6)
+    # 임시 파일 이름을 매번 새로: 두 프로세스가 동시에 저장해도 한 임시 파일에 섞여 쓰지 않음
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".",
+                                     suffix=".tmp", delete=False) as f:
+        f.write(blob)
+    try:
+        os.replace(f.name, path)   # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 원자적 교체
+    except OSError:
+        os.unlink(f.name)
+        raise
+    return path, len(entries), len(blob)
+
+
+def read(path=None):
+    """저장된 {"saved_at", "entries": [(키, 만료, 값, 받아 온 시각)...]}. 없거나 형식이 다르면 None."""
+    try:
+        with open(path or _path(), "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    if not blob.startswith(MAGIC):
+        return None
+    try:
+        saved = pickle.loads(zlib.decompress(blob[len(MAGIC):]))
+        saved["entries"] = [pickle.loads(e) for e in saved["entries"]]
+    except Exception:
+        return None
+    return saved
+
+
+def restore(path=None):
+    """저장된 캐시를 되살려 (유효, 만료) 개수를 돌려줍니다."""
+    saved = read(path)
+    if saved is None:
+        return 0, 0
+    return cache.restore(saved["entries"])
+
+
+def run_forever(stop, interval=SAVE_INTERVAL):
+    saved_version = cache.version
+    while not stop.wait(interval):
+        if cache.version != saved_version:
+            saved_version = cache.version
+            try:
+                save()
+            except OSError:
+                pass
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_warm(app=None):
+    """프로세스당 한 번: 이 앱(기본: 실행한 스크립트 이름)의 저장된 캐시를 되살리고, 주기 저장 스레드와 종료 시 저장을 겁니다.
+    market_cached 함수가 모두 정의된 뒤에 불러야 만료를 그 함수의 거래소 기준으로 다시 계산합니다."""
+    global _started, _app
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+        _app = app or app_name()
+    restore()
+    threading.Thread(target=run_forever, args=(threading.Event(),), name="warm-save", daemon=True).start()
+    atexit.register(save)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="시세 캐시 예열 파일")
+    parser.add_argument("command", choices=["info"])
+    args = parser.parse_args()
+    now = time.time()
+    if not paths():
+        print("예열 파일 없음")
+    for path in paths():
+        saved = read(path)
+        if saved is None:
+            print(f"{path}: 형식이 다름")
+            continue
+        print(f"{path} ({os.path.getsize(path):,} bytes, "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(saved['saved_at']))} 저장)")
+        for key, expires, value, fetched_at in saved["entries"]:
+            state = "유효" if expires > now else "만료"
+            print(f"  {state} {key[0]}{key[1]} · {time.strftime('%m/%d %H:%M', time.localtime(fetched_at))} 조회")